@@ -0,0 +1,130 @@
+"""
+@file led_bus_benchmark.py
+@brief Throughput and latency of LedController against the simulated RS485 bus.
+
+Drives LedController with bursts of random multi-position commands and reports
+frames/sec, command-to-visible latency percentiles and the frame error rate,
+without any Raspberry Pi hardware.
+
+Usage:
+    python benchmarks/led_bus_benchmark.py --boxes 8 --baud 9600 --bursts 20 --burst-size 10
+"""
+from typing import List
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from modules.FileManager import FileManager
+from modules.LedController import LedController
+from modules.Logger import Logger
+from rs485_simulator import RS485BusSimulator
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(p / 100 * len(ordered)))) - 1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type = int, default = 8)
+    parser.add_argument("--leds", type = int, default = 24, help = "LEDs per box")
+    parser.add_argument("--baud", type = int, default = 9600)
+    parser.add_argument("--data-size", type = int, default = 8, help = "Length of the broadcast clear pattern")
+    parser.add_argument("--bursts", type = int, default = 20)
+    parser.add_argument("--burst-size", type = int, default = 10, help = "Commands issued back to back per burst")
+    parser.add_argument("--burst-gap", type = float, default = 0.05, help = "Idle seconds between bursts")
+    parser.add_argument("--max-positions", type = int, default = 3, help = "Positions lit per command (1..N)")
+    parser.add_argument("--turnaround", type = float, default = 0.0005, help = "Modeled half-duplex turnaround in seconds")
+    parser.add_argument("--corrupt-rate", type = float, default = 0.0, help = "Probability of a bit flip per byte")
+    parser.add_argument("--protocol", type = int, choices = (0, 1), default = 0, help = "0 raw frames, 1 framed with CRC-16")
+    parser.add_argument("--ack", action = "store_true", help = "Boxes acknowledge frames (framed protocol)")
+    parser.add_argument("--window", type = int, default = 4, help = "Frames in flight before waiting for ACKs")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--json", help = "Write the report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    simulator = RS485BusSimulator(args.boxes, args.baud, args.turnaround, args.corrupt_rate, args.seed,
+                                  protocol = args.protocol, ack = args.ack).start()
+
+    workdir = tempfile.mkdtemp(prefix = "echo_bus_")
+    logger = Logger(FileManager(workdir))
+    controller = LedController(
+        logger, port = simulator.port, baud_rate = args.baud, timeout = 1.0, rs_485_pin = 4,
+        data_size = args.data_size, led_quantity = args.leds, box_quantity = args.boxes,
+        protocol = args.protocol, ack = args.ack, window = args.window
+    )
+    # Wait for the start-up broadcast clear to reach the boxes.
+    controller._turn_off_leds().result()
+    time.sleep(0.1)
+    offset = simulator.bytes_received
+
+    positions = args.boxes * args.leds
+    commands = []
+    start = time.perf_counter()
+    for _ in range(args.bursts):
+        for _ in range(args.burst_size):
+            target = rng.sample(range(1, positions + 1), rng.randint(1, args.max_positions))
+            submitted = time.perf_counter()
+            commands.append((submitted, controller.light_positions(target)))
+        time.sleep(args.burst_gap)
+
+    latencies = []
+    failures = 0
+    for submitted, future in commands:
+        try:
+            sent = future.result(timeout = 30)
+        except Exception:
+            failures += 1
+            continue
+        offset += sent
+        if sent == 0:
+            latencies.append(0.0)
+            continue
+        deadline = time.perf_counter() + 5
+        visible = simulator.visible_time(offset)
+        while visible is None and time.perf_counter() < deadline:
+            time.sleep(0.001)
+            visible = simulator.visible_time(offset)
+        if visible is not None:
+            latencies.append(visible - submitted)
+    elapsed = time.perf_counter() - start
+
+    final_ok = simulator.state() == dict(controller._shadow)
+    frames = simulator.frames_ok + simulator.frame_errors
+    report = {
+        "commands": len(commands),
+        "elapsed_s": round(elapsed, 4),
+        "bytes": simulator.bytes_received,
+        "frames": simulator.frames_ok,
+        "frames_per_s": round(simulator.frames_ok / elapsed, 1),
+        "latency_ms": {f"p{p}": round(percentile(latencies, p) * 1000, 3) for p in (50, 90, 95, 99, 100)},
+        "frame_error_rate": round(simulator.frame_errors / frames, 6) if frames else 0.0,
+        "failed_commands": failures,
+        "final_state_matches": final_ok,
+    }
+
+    controller.close()
+    simulator.stop()
+
+    print(json.dumps(report, indent = 4))
+    if args.json:
+        with open(args.json, "w", encoding = "utf-8") as file:
+            json.dump(report, file, indent = 4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
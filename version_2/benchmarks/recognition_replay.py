@@ -0,0 +1,266 @@
+"""
+@file recognition_replay.py
+@brief Replays labeled WAV recordings through the voice-command pipeline.
+
+Each recording goes through MicroPhone.preprocess, the selected recognition
+backend and CommandMatcher (the matcher behind EchoGabinet._find_best_command_match).
+Per-stage latency percentiles, real-time factor, word and component accuracy and
+peak RSS are reported, and per-file rows plus a summary are written as CSV/JSON.
+The first recording is run once untimed beforehand, so lazy imports and backend
+start-up do not land in the first file's latency.
+
+The directory must contain a labels.csv with the columns:
+    file,transcript,component
+where `component` is the catalog entry the command should select (leave it empty
+for recordings that should be rejected).
+
+Usage:
+    python benchmarks/recognition_replay.py DATA_DIR --backend stub \\
+        --threshold 0.5,0.6,0.7 --out bench_results
+"""
+from typing import Dict, List, Optional
+import argparse
+import csv
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from modules.CommandMatcher import CommandMatcher
+from modules.FileManager import FileManager
+from modules.Logger import Logger
+from modules.Microphone import MicroPhone
+from modules.Recognizers import RECOGNIZERS, create_recognizer
+
+
+STAGES = ("load", "preprocess", "recognize", "match", "total")
+
+# Recordings are cut into stream-sized chunks, as MicroPhone.recordAudio returns them.
+# preprocess() joins them back, so the chunk size has no effect on the measured stages.
+CHUNK = 4096
+
+
+def load_labels(data_dir: str) -> List[Dict[str, str]]:
+    with open(os.path.join(data_dir, "labels.csv"), newline = "", encoding = "utf-8") as file:
+        return [row for row in csv.DictReader(file) if row.get("file")]
+
+
+def load_catalog(path: Optional[str], labels: List[Dict[str, str]]) -> List[str]:
+    if path:
+        with open(path, encoding = "utf-8") as file:
+            return [line.strip() for line in file if line.strip()]
+    return sorted({row["component"] for row in labels if row.get("component")})
+
+
+def word_errors(reference: str, hypothesis: str) -> int:
+    """Word-level Levenshtein distance."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(p / 100 * len(ordered)))) - 1]
+
+
+def peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def read_wav(path: str):
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        return wf.getframerate(), wf.getnchannels(), wf.readframes(wf.getnframes())
+
+
+def make_backend(args, labels: List[Dict[str, str]], language: str):
+    if args.backend == "stub":
+        return create_recognizer(
+            "stub", language,
+            transcripts = {row["file"]: row["transcript"] for row in labels},
+            word_error_rate = args.stub_wer,
+            real_time_factor = args.stub_rtf,
+            seed = args.seed
+        )
+    return create_recognizer(args.backend, language)
+
+
+def split_frames(pcm: bytes, channels: int) -> List[bytes]:
+    step = CHUNK * channels * 2
+    return [pcm[i:i + step] for i in range(0, len(pcm), step)]
+
+
+class Replayer:
+    """
+    @brief Runs recordings through the pipeline, with one MicroPhone per sample format.
+    """
+
+    def __init__(self, args, backend, logger, files) -> None:
+        self._args = args
+        self._backend = backend
+        self._logger = logger
+        self._files = files
+        self._microphones: Dict[tuple, MicroPhone] = {}
+
+
+    def microphone(self, rate: int, channels: int) -> MicroPhone:
+        key = (rate, channels)
+        if key not in self._microphones:
+            self._microphones[key] = MicroPhone(
+                self._logger, self._files, audio_path = "audio_path", audio_file = "audio_path/replay.wav",
+                channels = channels, rate = rate, chunk = CHUNK, record_time = 0,
+                language = self._args.language, recognizer = self._backend
+            )
+        return self._microphones[key]
+
+
+    def warm_up(self, label: Dict[str, str], catalog: List[str]) -> None:
+        """
+        @brief Runs one recording untimed (lazy numpy import, backend start-up).
+        """
+        rate, channels, pcm = read_wav(os.path.join(self._args.data_dir, label["file"]))
+        microphone = self.microphone(rate, channels)
+        hypothesis = microphone.transcribe(microphone.preprocess(split_frames(pcm, channels)), source = label["file"])
+        if hypothesis:
+            CommandMatcher().best_match(hypothesis, catalog)
+
+
+def run_config(args, labels, catalog, replayer: Replayer, threshold: float):
+    matcher = CommandMatcher(threshold)
+    rows = []
+
+    for label in labels:
+        timings = {}
+        start = time.perf_counter()
+        rate, channels, pcm = read_wav(os.path.join(args.data_dir, label["file"]))
+        timings["load"] = time.perf_counter() - start
+
+        microphone = replayer.microphone(rate, channels)
+        frames = split_frames(pcm, channels)
+
+        t = time.perf_counter()
+        processed = microphone.preprocess(frames)
+        timings["preprocess"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        hypothesis = microphone.transcribe(processed, source = label["file"]) or ""
+        timings["recognize"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        match = matcher.best_match(hypothesis, catalog) if hypothesis else None
+        timings["match"] = time.perf_counter() - t
+        timings["total"] = time.perf_counter() - start
+
+        duration = len(pcm) / (rate * channels * 2)
+        expected = label.get("component") or ""
+        matched = match[0] if match else ""
+        rows.append({
+            "file": label["file"],
+            "backend": args.backend,
+            "threshold": threshold,
+            "duration_s": round(duration, 4),
+            **{f"{stage}_ms": round(timings[stage] * 1000, 3) for stage in STAGES},
+            "rtf": round((timings["preprocess"] + timings["recognize"]) / duration, 4) if duration else 0.0,
+            "reference": label["transcript"],
+            "hypothesis": hypothesis,
+            "word_errors": word_errors(label["transcript"], hypothesis),
+            "reference_words": len(label["transcript"].split()),
+            "expected": expected,
+            "matched": matched,
+            "score": round(match[1], 4) if match else 0.0,
+            "correct": matched.lower() == expected.lower(),
+        })
+
+    return rows
+
+
+def summarize(rows) -> Dict:
+    summary = {
+        "backend": rows[0]["backend"],
+        "threshold": rows[0]["threshold"],
+        "files": len(rows),
+        "latency_ms": {
+            stage: {f"p{p}": percentile([r[f"{stage}_ms"] for r in rows], p) for p in (50, 90, 95, 99)}
+            for stage in STAGES
+        },
+        "rtf_mean": round(sum(r["rtf"] for r in rows) / len(rows), 4),
+        "rtf_p95": percentile([r["rtf"] for r in rows], 95),
+    }
+    reference_words = sum(r["reference_words"] for r in rows)
+    summary["word_accuracy"] = round(1 - sum(r["word_errors"] for r in rows) / reference_words, 4) if reference_words else None
+    summary["component_accuracy"] = round(sum(r["correct"] for r in rows) / len(rows), 4)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dir", help = "Directory with WAV files and labels.csv")
+    parser.add_argument("--backend", choices = sorted(RECOGNIZERS), default = "stub")
+    parser.add_argument("--language", default = "pt-PT")
+    parser.add_argument("--catalog", help = "File with one component name per line (default: components in labels.csv)")
+    parser.add_argument("--threshold", default = "0.6", help = "Comma-separated matcher thresholds")
+    parser.add_argument("--stub-wer", type = float, default = 0.0, help = "Simulated word error rate of the stub backend")
+    parser.add_argument("--stub-rtf", type = float, default = 0.0, help = "Simulated real-time factor of the stub backend")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--out", default = "bench_results", help = "Output directory for results.csv and summary.json")
+    args = parser.parse_args()
+
+    labels = load_labels(args.data_dir)
+    if not labels:
+        print("labels.csv has no entries.")
+        return 1
+    catalog = load_catalog(args.catalog, labels)
+
+    workdir = tempfile.mkdtemp(prefix = "echo_replay_")
+    files = FileManager(workdir)
+    logger = Logger(files)
+    backend = make_backend(args, labels, args.language)
+    replayer = Replayer(args, backend, logger, files)
+    replayer.warm_up(labels[0], catalog)
+
+    thresholds = [float(t) for t in args.threshold.split(",")]
+
+    all_rows, summaries = [], []
+    for threshold in thresholds:
+        rows = run_config(args, labels, catalog, replayer, threshold)
+        all_rows.extend(rows)
+        summaries.append(summarize(rows))
+
+    os.makedirs(args.out, exist_ok = True)
+    with open(os.path.join(args.out, "results.csv"), "w", newline = "", encoding = "utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames = list(all_rows[0]))
+        writer.writeheader()
+        writer.writerows(all_rows)
+
+    report = {"peak_rss_kb": peak_rss_kb(), "configs": summaries}
+    with open(os.path.join(args.out, "summary.json"), "w", encoding = "utf-8") as file:
+        json.dump(report, file, indent = 4)
+
+    for s in summaries:
+        total = s["latency_ms"]["total"]
+        print(f"{s['backend']:<7} threshold={s['threshold']:<5} "
+              f"total p50={total['p50']:.1f}ms p95={total['p95']:.1f}ms rtf={s['rtf_mean']:.3f} "
+              f"words={s['word_accuracy']} components={s['component_accuracy']}")
+    print(f"peak RSS: {report['peak_rss_kb']} KB, results in {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+@file rs485_simulator.py
+@brief Pseudo-terminal RS485 bus with emulated shield boxes.
+
+LedController opens the slave end of a pty as its serial port; the simulator
+reads the master end, replays every byte on a modeled wire (10 bits per byte at
+the configured baud rate, plus a half-duplex turnaround between transactions)
+and feeds it to N emulated boxes that parse frames and keep their LED state.
+With the framed protocol the boxes check the CRC and can acknowledge frames.
+"""
+from typing import Dict, List, Optional
+import bisect
+import os
+import pty
+import random
+import select
+import sys
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from modules.RS485Protocol import BROADCAST, PROTOCOL_RAW, FrameParser, encode_frame
+
+
+class SimulatedBox:
+    """
+    @class SimulatedBox
+    @brief LED state of one shield box.
+    """
+
+    def __init__(self, box_id: int) -> None:
+        self.box_id = box_id
+        self.rgb = bytes(3)
+        self.updates = 0
+
+
+class RS485BusSimulator:
+    """
+    @class RS485BusSimulator
+    @brief Emulates N shield boxes on the master side of a pty pair.
+    """
+
+    BITS_PER_CHARACTER = 10
+
+    def __init__(self, box_count: int, baud_rate: int, turnaround: float = 0.0005,
+                 corrupt_rate: float = 0.0, seed: int = 0, protocol: int = PROTOCOL_RAW, ack: bool = False) -> None:
+        """
+        @param box_count Number of emulated boxes (IDs 1..box_count).
+        @param baud_rate Baud rate used to model the time each byte spends on the wire.
+        @param turnaround Idle time the line needs between two transactions (driver switch-over).
+        @param corrupt_rate Probability of flipping one bit of each received byte.
+        @param seed Seed of the corruption generator.
+        @param protocol Protocol version spoken by the boxes (see RS485Protocol).
+        @param ack Answer every valid framed message addressed to a box with an ACK.
+        """
+        self.boxes: Dict[int, SimulatedBox] = {i: SimulatedBox(i) for i in range(1, box_count + 1)}
+        self._character_time = self.BITS_PER_CHARACTER / baud_rate
+        self._turnaround = turnaround
+        self._corrupt_rate = corrupt_rate
+        self._random = random.Random(seed)
+        self._protocol = protocol
+        self._ack = ack
+        self._parser = FrameParser()
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._thread = threading.Thread(target = self._run, name = "rs485-sim", daemon = True)
+
+        self._buffer = bytearray()
+        self._wire_free_at = 0.0
+        self.bytes_received = 0
+        self.frames_ok = 0
+        self.frame_errors = 0
+        self.clears = 0
+        # Byte offset just after each frame and the modeled time it became visible.
+        self._visible_offsets: List[int] = []
+        self._visible_times: List[float] = []
+
+
+    def start(self) -> "RS485BusSimulator":
+        self._running.set()
+        self._thread.start()
+        return self
+
+
+    def stop(self) -> None:
+        self._running.clear()
+        self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+
+    def _wire_time(self, count: int, received_at: float) -> float:
+        """
+        @brief Models when the last of `count` bytes read at `received_at` leaves the wire.
+        """
+        if received_at > self._wire_free_at + self._character_time:
+            # Line was idle: a new transaction only starts after the driver turnaround.
+            start = max(received_at, self._wire_free_at + self._turnaround)
+        else:
+            start = max(received_at, self._wire_free_at)
+        self._wire_free_at = start + count * self._character_time
+        return self._wire_free_at
+
+
+    def _corrupt(self, data: bytes) -> bytes:
+        if self._corrupt_rate <= 0:
+            return data
+        out = bytearray(data)
+        for i in range(len(out)):
+            if self._random.random() < self._corrupt_rate:
+                out[i] ^= 1 << self._random.randrange(8)
+        return bytes(out)
+
+
+    def _parse(self, offset: int, visible_at: float) -> None:
+        """
+        @brief Consumes complete frames from the receive buffer.
+
+        A 0x00 byte where a box ID is expected is part of the broadcast clear
+        pattern; otherwise [box_id, R, G, B] updates a single box.
+        """
+        buffer = self._buffer
+        consumed = 0
+        while consumed < len(buffer):
+            box_id = buffer[consumed]
+            if box_id == 0:
+                for box in self.boxes.values():
+                    box.rgb = bytes(3)
+                self.clears += 1
+                consumed += 1
+                self._mark_visible(offset - (len(buffer) - consumed), visible_at)
+                continue
+            if box_id not in self.boxes:
+                self.frame_errors += 1
+                consumed += 1
+                continue
+            if len(buffer) - consumed < 4:
+                break
+            box = self.boxes[box_id]
+            box.rgb = bytes(buffer[consumed + 1:consumed + 4])
+            box.updates += 1
+            self.frames_ok += 1
+            consumed += 4
+            self._mark_visible(offset - (len(buffer) - consumed), visible_at)
+        del buffer[:consumed]
+
+
+    def _parse_framed(self, offset: int, visible_at: float) -> List[bytes]:
+        """
+        @brief Consumes version 1 frames; CRC failures count as (detected) frame errors.
+        @return Acknowledgements to send back.
+        """
+        errors = self._parser.crc_errors
+        acks = []
+        for address, seq, payload in self._parser.feed(bytes(self._buffer)):
+            if address == BROADCAST:
+                for box in self.boxes.values():
+                    box.rgb = bytes(3)
+                self.clears += 1
+            elif address in self.boxes and len(payload) == 3:
+                box = self.boxes[address]
+                box.rgb = bytes(payload)
+                box.updates += 1
+                self.frames_ok += 1
+                if self._ack:
+                    acks.append(encode_frame(address, seq))
+            else:
+                self.frame_errors += 1
+                continue
+            self._mark_visible(offset, visible_at)
+        self.frame_errors += self._parser.crc_errors - errors
+        self._buffer.clear()
+        return acks
+
+
+    def _mark_visible(self, offset: int, visible_at: float) -> None:
+        self._visible_offsets.append(offset)
+        self._visible_times.append(visible_at)
+
+
+    def _run(self) -> None:
+        while self._running.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                break
+            received_at = time.perf_counter()
+            visible_at = self._wire_time(len(data), received_at)
+
+            delay = visible_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            with self._lock:
+                self.bytes_received += len(data)
+                self._buffer.extend(self._corrupt(data))
+                if self._protocol == PROTOCOL_RAW:
+                    self._parse(self.bytes_received, visible_at)
+                    continue
+                acks = self._parse_framed(self.bytes_received, visible_at)
+
+            if acks:
+                # Boxes answer one after another once the master has released the line.
+                time.sleep(self._turnaround)
+                reply = b"".join(acks)
+                self._wire_time(len(reply), time.perf_counter())
+                os.write(self._master, reply)
+
+
+    def state(self) -> Dict[int, bytes]:
+        """
+        @brief Snapshot of the R/G/B state of every lit box.
+        """
+        with self._lock:
+            return {box_id: box.rgb for box_id, box in self.boxes.items() if any(box.rgb)}
+
+
+    def visible_time(self, byte_offset: int) -> Optional[float]:
+        """
+        @brief Modeled time at which the frame ending at or after `byte_offset` became visible.
+        """
+        with self._lock:
+            i = bisect.bisect_left(self._visible_offsets, byte_offset)
+            return self._visible_times[i] if i < len(self._visible_times) else None
@@ -0,0 +1,104 @@
+"""
+@file startup_benchmark.py
+@brief Import cost of the start-up path, measured with `python -X importtime`.
+
+Each target module is imported in a fresh interpreter several times; the
+report gives the median cumulative import time, the heaviest modules pulled
+in, and any module that should only be loaded on demand (wizard UI, serial,
+numpy, recognizer backends, multiprocessing). The voice path
+(modules.EchoGabinnet) is checked against a budget so regressions fail the run.
+
+Time-to-ready after boot is the import time plus hardware initialization;
+main.py logs it against its READY_TARGET in Logs/systemActivity.log.
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 5 --budget-ms 1500
+"""
+from typing import Dict, List, Tuple
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+DEFAULT_TARGETS = ["modules.EchoGabinnet", "modules.WebServer"]
+
+# Modules the start-up path must not import eagerly.
+LAZY_MODULES = [
+    "questionary", "prompt_toolkit", "pyfiglet", "termcolor",
+    "serial", "numpy", "pyaudio", "speech_recognition", "vosk",
+    "difflib", "multiprocessing", "modules.RecognitionPool", "modules.KeywordSpotter",
+]
+
+
+def import_profile(module: str) -> Tuple[float, Dict[str, int]]:
+    """
+    @brief Imports a module in a fresh interpreter with -X importtime.
+    @return (cumulative import time of the module in ms, cumulative µs per imported module).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd = SRC, capture_output = True, text = True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    modules: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit():
+            modules[name] = int(cumulative)
+    return modules.get(module, 0) / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs = "*", default = DEFAULT_TARGETS, help = "Modules to import")
+    parser.add_argument("--runs", type = int, default = 5, help = "Fresh interpreters per target")
+    parser.add_argument("--top", type = int, default = 10, help = "Heaviest imported modules listed")
+    parser.add_argument("--budget-ms", type = float, default = 1500.0,
+                        help = "Import budget of modules.EchoGabinnet (Raspberry Pi 4 target)")
+    parser.add_argument("--json", help = "Also write the report to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for target in args.targets:
+        times: List[float] = []
+        modules: Dict[str, int] = {}
+        for _ in range(args.runs):
+            elapsed, modules = import_profile(target)
+            times.append(elapsed)
+
+        heaviest = sorted(((name, us) for name, us in modules.items() if name != target), key = lambda item: -item[1])
+        report[target] = {
+            "median_ms": round(statistics.median(times), 1),
+            "min_ms": round(min(times), 1),
+            "modules_imported": len(modules),
+            "heaviest_ms": {name: round(us / 1000, 1) for name, us in heaviest[:args.top]},
+            "eager_lazy_modules": [name for name in LAZY_MODULES if name in modules],
+        }
+
+    print(json.dumps(report, indent = 4))
+    if args.json:
+        with open(args.json, "w", encoding = "utf-8") as file:
+            json.dump(report, file, indent = 4)
+
+    voice = report.get("modules.EchoGabinnet")
+    if voice is not None:
+        if voice["median_ms"] > args.budget_ms:
+            print(f"FAIL: modules.EchoGabinnet imports in {voice['median_ms']} ms (budget {args.budget_ms:g} ms)", file = sys.stderr)
+            return 1
+        if voice["eager_lazy_modules"]:
+            print(f"FAIL: imported at start-up: {', '.join(voice['eager_lazy_modules'])}", file = sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,66 @@
+import time
+
+# Reference point for the time-to-ready reported below.
+STARTED = time.monotonic()
+
 from modules.BackupManager import BackupManager
 from modules.ThreadManager import ThreadManager
 from modules.FileManager import FileManager
-from modules.EchoGabinet import EchoGabinet
+from modules.EchoGabinnet import EchoGabinet
 from modules.Logger import Logger
-from modules.WebServer import WebServer
+from modules.Scheduler import Scheduler
 from modules.WifiManager import WifiManager
 
-    
+# Seconds from start until the cabinet accepts commands (see benchmarks/startup_benchmark.py).
+READY_TARGET = 5.0
+
+
 if __name__ == "__main__":
     file = FileManager()
     log = Logger(file)
 
     bck = BackupManager(log, file)
     echo = EchoGabinet(log, file)
+
+    th = ThreadManager(4, logger = log)
+    th.startService("voice-loop", echo.run, stop = echo.stop)
+
+    # The voice loop comes first; Flask is only imported once the cabinet accepts commands.
+    if echo.ready.wait(timeout = 3 * READY_TARGET):
+        ready = time.monotonic() - STARTED
+        level = "INFO" if ready <= READY_TARGET else "WARNING"
+        log.write_log("Logs/systemActivity.log", level, f"Ready for commands {ready:.2f}s after start (target {READY_TARGET:g}s).")
+
+    from modules.WebServer import WebServer
+
     wifi = WifiManager()
     ip = wifi.getLocalIP()
-    
-    server = WebServer(ip, 8080 ,log, file)
-
-    th = ThreadManager(10, 1)
-    th.createNewTask(echo.run)
-    th.createNewTask(bck.automateBackup(30))
-    th.createNewTask(server.run)
-    th.runThreads()
+
+    server = WebServer(
+        ip, 8080, log, file,
+        admin_token = echo.settings.get("admin_token"),
+        threads = int(echo.settings.get("web_threads", 8)),
+        keep_alive = float(echo.settings.get("web_keep_alive", 15)),
+        request_timeout = float(echo.settings.get("web_request_timeout", 30)),
+        gzip = str(echo.settings.get("web_gzip", "true")).lower() == "true",
+        page_cache_bytes = int(echo.settings.get("web_page_cache_bytes", 2 * 1024 * 1024)),
+        debug = str(echo.settings.get("web_debug", "false")).lower() == "true"
+    )
+    th.startService("web-server", server.run, stop = server.stop)
+
+    # Every periodic job shares the scheduler thread; the runs themselves go to the pool.
+    scheduler = Scheduler(log, th)
+    bck.automateBackup(scheduler, 30)
+    scheduler.add_cron("log-rotation", "0 3 * * *", log.rotate_logs)
+    scheduler.add_cron("db-maintenance", "30 3 * * 0", bck.optimize)
+    if echo.has_recognition_workers:
+        scheduler.add_interval("cache-warm-up", 600, echo.warm_up, jitter = 30, run_immediately = True)
+    scheduler.start()
+
+    try:
+        th.waitServices()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        th.shutdown(timeout = 5)
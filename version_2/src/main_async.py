@@ -0,0 +1,44 @@
+from modules.AsyncRuntime import AsyncRuntime
+from modules.BackupManager import BackupManager
+from modules.FileManager import FileManager
+from modules.EchoGabinnet import EchoGabinet
+from modules.Logger import Logger
+from modules.Scheduler import Scheduler
+from modules.WebServer import WebServer
+from modules.WifiManager import WifiManager
+
+import asyncio
+
+
+if __name__ == "__main__":
+    file = FileManager()
+    log = Logger(file)
+
+    bck = BackupManager(log, file)
+    echo = EchoGabinet(log, file)
+    wifi = WifiManager()
+    ip = wifi.getLocalIP()
+
+    # The runtime serves the application itself; only the app-level options apply here.
+    server = WebServer(
+        ip, 8080, log, file,
+        admin_token = echo.settings.get("admin_token"),
+        gzip = str(echo.settings.get("web_gzip", "true")).lower() == "true",
+        page_cache_bytes = int(echo.settings.get("web_page_cache_bytes", 2 * 1024 * 1024))
+    )
+
+    # Maintenance jobs run on the scheduler thread, off the event loop.
+    scheduler = Scheduler(log)
+    bck.automateBackup(scheduler, 30)
+    scheduler.add_cron("log-rotation", "0 3 * * *", log.rotate_logs)
+    scheduler.add_cron("db-maintenance", "30 3 * * 0", bck.optimize)
+    if echo.has_recognition_workers:
+        scheduler.add_interval("cache-warm-up", 600, echo.warm_up, jitter = 30, run_immediately = True)
+    scheduler.start()
+
+    runtime = AsyncRuntime(log, echo, web_app = server.app, host = ip, port = 8080,
+                           web_workers = int(echo.settings.get("web_threads", 8)))
+    try:
+        asyncio.run(runtime.run())
+    finally:
+        scheduler.stop()
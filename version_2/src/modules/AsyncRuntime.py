@@ -0,0 +1,204 @@
+from modules.AsyncWsgiServer import AsyncWsgiServer
+from modules.Tracer import tracer
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Set
+import asyncio
+import contextvars
+import functools
+import signal
+import time
+
+
+class BoundedExecutor:
+    """
+    @class BoundedExecutor
+    @brief Thread pool whose admission is bounded by an asyncio semaphore.
+
+    At most `workers + max_pending` calls are in flight; further callers wait
+    on the loop (not on a thread) until a slot frees up.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int = 0) -> None:
+        self._executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = name)
+        self._slots = asyncio.Semaphore(workers + max_pending)
+
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        @brief Runs a blocking call on the pool and awaits its result.
+
+        The slot is held until the call returns on its thread, even if the awaiting coroutine is
+        cancelled (e.g. by a timeout), so calls that hang cannot pile up past the bound.
+        """
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the caller's context so the active trace follows the call.
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(functools.partial(context.run, func, *args, **kwargs))
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._release(loop))
+        return await asyncio.wrap_future(future, loop = loop)
+
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            pass  # the loop is closed
+
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait = wait, cancel_futures = True)
+
+
+class AsyncRuntime:
+    """
+    @class AsyncRuntime
+    @brief asyncio entry point running the command cycle, the inputs and the web server on one loop.
+
+    Each button press or wake-word command becomes a coroutine: recording runs
+    on the single-worker audio executor, recognition and matching on the
+    recognizer executor (or the recognition worker processes), and LED
+    updates are awaited through their transmission futures. Only recording is serialized
+    (there is one microphone), so a cycle can be recognized while the next one
+    records, and web requests run alongside both.
+    """
+
+    def __init__(self, logger, echo, web_app: Optional[Callable] = None, host: str = "0.0.0.0", port: int = 8080,
+                 recognizer_workers: int = 2, web_workers: int = 8, max_pending_cycles: int = 4) -> None:
+        """
+        @brief Initializes the runtime.
+        @param logger Logger instance for writing logs.
+        @param echo EchoGabinet providing the inputs and the cycle stages.
+        @param web_app WSGI application to serve (None to run without the web server).
+        @param host Web server address.
+        @param port Web server port.
+        @param recognizer_workers Threads available for speech recognition and matching.
+        @param web_workers Threads available to the WSGI application.
+        @param max_pending_cycles Commands waiting for the microphone before new ones are dropped.
+        """
+        self._log = logger
+        self._echo = echo
+        self._web_app = web_app
+        self._host = host
+        self._port = port
+        self._recognizer_workers = recognizer_workers
+        self._web_workers = web_workers
+        self._max_pending_cycles = max_pending_cycles
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._cycles: Set[asyncio.Task] = set()
+
+
+    # ------- Inputs -------
+    def _post(self, source: str, payload: Any) -> None:
+        """
+        @brief Thread-safe entry for input events (GPIO and listener threads).
+        """
+        self._loop.call_soon_threadsafe(self._start_cycle, source, payload)
+
+
+    def _start_cycle(self, source: str, payload: Any) -> None:
+        # A press while the microphone is busy is stale, as in the threaded loop.
+        if source == "button" and self._microphone.locked():
+            return
+        if len(self._cycles) >= self._max_pending_cycles:
+            self._log.write_log("Logs/systemActivity.log", "WARNING", f"Dropped {source} command: too many cycles in progress.")
+            return
+
+        task = asyncio.create_task(self._cycle(source, payload))
+        self._cycles.add(task)
+        task.add_done_callback(self._cycles.discard)
+
+
+    # ------- Command cycle -------
+    async def _cycle(self, source: str, payload: Any) -> None:
+        pressed = payload if source == "button" else None
+        with tracer.trace("voice-command", start_ns = pressed, source = source) as trace:
+            try:
+                async with self._microphone:
+                    if pressed:
+                        trace.add_span("button.wait", pressed, time.perf_counter_ns())
+                    self._echo.acknowledge()
+                    frames = await self._audio.run(self._echo.record, source, payload)
+
+                # analyze() blocks only when recognition runs in-process; with worker
+                # processes it returns at once and the loop awaits the remote future.
+                with tracer.span("recognition"):
+                    analysis = await self._recognizer.run(self._echo.analyze, source, frames)
+                    _, position = await asyncio.wrap_future(analysis)
+
+                transmission = self._echo.show(position)
+                if transmission is not None:
+                    await asyncio.wrap_future(transmission)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._log.write_log("Logs/errorEvents.log", "ERROR", f"Command cycle failed: {e}")
+                self._echo.show(None)
+
+
+    # ------- Lifecycle -------
+    async def run(self) -> None:
+        """
+        @brief Runs until stop() is called or SIGTERM/SIGINT is received, then shuts down.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._microphone = asyncio.Lock()
+
+        self._audio = BoundedExecutor("audio", 1)
+        self._recognizer = BoundedExecutor("recognizer", self._recognizer_workers, self._recognizer_workers)
+        self._web = BoundedExecutor("web", self._web_workers, 2 * self._web_workers)
+
+        handled = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self._loop.add_signal_handler(signum, self._stop_event.set)
+                handled.append(signum)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        server = None
+        try:
+            self._echo.start_inputs(self._post)
+            if self._web_app is not None:
+                server = AsyncWsgiServer(self._web_app, self._host, self._port, self._web, self._log)
+                await server.start()
+
+            self._log.write_log("Logs/systemActivity.log", "INFO", "Async runtime started.")
+            await self._stop_event.wait()
+        finally:
+            await self._shutdown(server)
+            for signum in handled:
+                self._loop.remove_signal_handler(signum)
+
+
+    async def _shutdown(self, server: Optional[AsyncWsgiServer]) -> None:
+        self._log.write_log("Logs/systemActivity.log", "INFO", "Async runtime shutting down.")
+
+        if server is not None:
+            await server.close()
+
+        for task in list(self._cycles):
+            task.cancel()
+        if self._cycles:
+            await asyncio.gather(*self._cycles, return_exceptions = True)
+
+        for executor in (self._audio, self._recognizer, self._web):
+            executor.shutdown(wait = False)
+
+        await self._loop.run_in_executor(None, self._echo.close)
+
+
+    def stop(self) -> None:
+        """
+        @brief Requests shutdown; safe to call from any thread.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
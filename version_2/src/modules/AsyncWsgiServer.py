@@ -0,0 +1,314 @@
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+import asyncio
+import io
+import re
+import sys
+
+
+class AsyncWsgiServer:
+    """
+    @class AsyncWsgiServer
+    @brief Minimal HTTP/1.1 front-end on an asyncio loop serving a WSGI application.
+
+    Connections, parsing and keep-alive are handled by coroutines on the loop;
+    the WSGI application (Flask) runs on a bounded executor, and each chunk of
+    a streamed response is pulled on the executor too, so a slow request never
+    blocks the loop. A response body that also provides __aiter__ is consumed
+    on the loop instead, so long-lived streams cost no worker thread.
+    """
+    MAX_HEADER_BYTES = 64 * 1024
+    MAX_BODY_BYTES = 16 * 1024 * 1024
+    # Statuses whose responses never carry a body (RFC 9112, section 6.3).
+    BODYLESS_STATUSES = (204, 304)
+    _CHUNK_SIZE = re.compile(rb"[0-9A-Fa-f]{1,8}")
+
+    def __init__(self, app: Callable, host: str, port: int, executor, logger, keep_alive_timeout: float = 15.0,
+                 request_timeout: Optional[float] = None) -> None:
+        """
+        @brief Initializes the server.
+        @param app WSGI application.
+        @param host Address to bind.
+        @param port Port to bind.
+        @param executor Object with a `run(func, *args)` coroutine (BoundedExecutor).
+        @param logger Logger instance for writing logs.
+        @param keep_alive_timeout Seconds an idle keep-alive connection stays open.
+        @param request_timeout Seconds allowed for receiving a request body and for the application
+                               to start its response (None: no limit).
+        """
+        self._app = app
+        self._host = host
+        self._port = port
+        self._executor = executor
+        self._log = logger
+        self._keep_alive_timeout = keep_alive_timeout
+        self._request_timeout = request_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+
+    async def start(self) -> None:
+        """
+        @brief Binds the socket and starts accepting connections.
+        """
+        self._server = await asyncio.start_server(self._handle_client, self._host, self._port, limit = self.MAX_HEADER_BYTES)
+        self._log.write_log("Logs/webInterface.log", "INFO", f"Async web server listening on {self._host}:{self._port}")
+
+
+    async def close(self) -> None:
+        """
+        @brief Stops accepting connections and closes the open ones.
+        """
+        if self._server is not None:
+            self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions = True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self._keep_alive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                request = self._parse_head(head)
+                if request is None:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                method, target, version, headers = request
+
+                # A body framed two ways could be read differently by a proxy in front (request smuggling).
+                transfer_encoding = headers.get("transfer-encoding", "").lower()
+                if transfer_encoding and "content-length" in headers:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                if transfer_encoding and transfer_encoding != "chunked":
+                    writer.write(b"HTTP/1.1 501 Not Implemented\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                if length > self.MAX_BODY_BYTES:
+                    writer.write(b"HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                if (length or transfer_encoding) and headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                try:
+                    if transfer_encoding:
+                        body = await asyncio.wait_for(self._read_chunked(reader), self._request_timeout)
+                    else:
+                        body = await asyncio.wait_for(reader.readexactly(length), self._request_timeout) if length else b""
+                except asyncio.TimeoutError:
+                    writer.write(b"HTTP/1.1 408 Request Timeout\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                if body is None:
+                    writer.write(b"HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                environ = self._environ(method, target, version, headers, body, writer)
+                keep_alive = await self._respond(environ, version, keep_alive, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._log.write_log("Logs/webInterface.log", "ERROR", f"Connection failed: {e}")
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        @brief Reads and decodes a chunked request body; trailer fields are discarded.
+        @return The body, or None if it exceeds MAX_BODY_BYTES.
+        @throws ValueError If the chunk framing is malformed.
+        """
+        chunks: List[bytes] = []
+        total = 0
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            size = line[:-2].split(b";", 1)[0].strip()
+            if not self._CHUNK_SIZE.fullmatch(size):
+                raise ValueError("Malformed chunk size")
+            size = int(size, 16)
+            total += size
+            if total > self.MAX_BODY_BYTES:
+                return None
+            if size == 0:
+                break
+            data = await reader.readexactly(size + 2)
+            if data[-2:] != b"\r\n":
+                raise ValueError("Malformed chunk")
+            chunks.append(data[:-2])
+
+        while await reader.readuntil(b"\r\n") != b"\r\n":
+            pass
+        return b"".join(chunks)
+
+
+    @staticmethod
+    def _parse_head(head: bytes) -> Optional[Tuple[str, str, str, Dict[str, str]]]:
+        """
+        @brief Parses the request line and headers.
+        @return (method, target, version, headers with lower-case names), or None if malformed.
+        """
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            return None
+        if not version.startswith("HTTP/1."):
+            return None
+
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, sep, value = line.partition(":")
+            if not sep:
+                return None
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        return method, target, version, headers
+
+
+    def _environ(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes, writer: asyncio.StreamWriter) -> Dict[str, Any]:
+        path, _, query = target.partition("?")
+        peer = writer.get_extra_info("peername") or ("", 0)
+
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote(path, "latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self._host,
+            "SERVER_PORT": str(self._port),
+            "SERVER_PROTOCOL": version,
+            "REMOTE_ADDR": peer[0],
+            "REMOTE_PORT": str(peer[1]),
+            "CONTENT_TYPE": headers.get("content-type", ""),
+            "CONTENT_LENGTH": str(len(body)) if body else "",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        # The body is passed de-chunked with its length, so the application never sees the transfer coding.
+        for name, value in headers.items():
+            if name not in ("content-type", "content-length", "transfer-encoding"):
+                environ["HTTP_" + name.upper().replace("-", "_")] = value
+        return environ
+
+
+    async def _respond(self, environ: Dict[str, Any], version: str, keep_alive: bool, writer: asyncio.StreamWriter) -> bool:
+        """
+        @brief Runs the application and streams its response.
+        @return Whether the connection can be kept alive.
+        """
+        state: Dict[str, Any] = {}
+        written: List[bytes] = []
+
+        def start_response(status: str, response_headers: List[Tuple[str, str]], exc_info = None):
+            if exc_info and state.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            state["status"] = status
+            state["headers"] = response_headers
+            return written.append
+
+        try:
+            result = await asyncio.wait_for(self._executor.run(self._app, environ, start_response), self._request_timeout)
+        except asyncio.TimeoutError:
+            # The worker thread cannot be interrupted; the client is answered and the connection closed.
+            self._log.write_log("Logs/webInterface.log", "WARNING", f"Request timed out: {environ['REQUEST_METHOD']} {environ['PATH_INFO']}")
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            return False
+        except Exception as e:
+            self._log.write_log("Logs/webInterface.log", "ERROR", f"Application error: {e}")
+            writer.write(b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            return False
+
+        end = object()
+        if hasattr(result, "__aiter__"):
+            # Extension: bodies that can wait on the loop (event streams) do not hold a worker thread.
+            iterator = result.__aiter__()
+
+            async def pull():
+                try:
+                    return await iterator.__anext__()
+                except StopAsyncIteration:
+                    return end
+        else:
+            iterator = iter(result)
+
+            async def pull():
+                return await self._executor.run(next, iterator, end)
+
+        try:
+            first = await pull()
+            names = {name.lower() for name, _ in state["headers"]}
+            code = int(state["status"].split(" ", 1)[0])
+            # No body and no framing: Content-Length (if any) describes the representation, not this message.
+            bodyless = code < 200 or code in self.BODYLESS_STATUSES or environ["REQUEST_METHOD"] == "HEAD"
+            chunked = "content-length" not in names and version == "HTTP/1.1" and not bodyless
+            if "content-length" not in names and not chunked and not bodyless:
+                keep_alive = False
+
+            head = [f"{version} {state['status']}"]
+            head += [f"{name}: {value}" for name, value in state["headers"]]
+            if chunked:
+                head.append("Transfer-Encoding: chunked")
+            head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+            state["sent"] = True
+
+            chunk = first
+            while True:
+                # Output passed to the legacy write() callable goes out before the next chunk.
+                data = b"".join(written) + (chunk if chunk is not end else b"")
+                written.clear()
+                if data and not bodyless:
+                    writer.write(b"%x\r\n%s\r\n" % (len(data), data) if chunked else data)
+                    await writer.drain()
+                if chunk is end or bodyless:
+                    break
+                chunk = await pull()
+
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+            close = getattr(result, "close", None)
+            if close is not None:
+                await self._executor.run(close)
+
+        return keep_alive
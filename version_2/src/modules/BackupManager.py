@@ -1,7 +1,7 @@
 from modules.DataBase import DataBase
 from datetime import datetime
 import zipfile
-import shutil
+import time
 import os
 
 
@@ -12,17 +12,19 @@ class BackupManager(DataBase):
         self._log = logger
         self._file = fileManager
 
-        self.__backupDir = "/home/ruimc/Projetos/PythonProjects/echoGabinnet/BackUps"
-        self.__directoryDb = "/home/ruimc/Projetos/PythonProjects/echoGabinnet/Data/database.db"
+        self.__directoryDb = self._db_path
+        self.__backupDir = os.path.join(os.path.dirname(os.path.dirname(self.__directoryDb)), "BackUps")
         
 
 
     
     # Executa o backup da base de dados. Pode incluir a criação de um dump ou a cópia de ficheiros.
     def createBackup(self): 
-        self.__backupDir = os.path.join(self.__backupDir, f"database_{datetime.now().month}_{datetime.now().year}.db")
-        self._file.copyFile(self.__directoryDb, self.__backupDir)
-        self.__compressBackup(self.__backupDir)
+        self._file.create_dir(self.__backupDir)
+        now = datetime.now()
+        backupFile = os.path.join(self.__backupDir, f"database_{now.day}_{now.month}_{now.year}.db")
+        self.backup_to(backupFile)
+        self.__compressBackup(backupFile)
 
 
     def __compressBackup(self, backupFile):
@@ -33,12 +35,12 @@ class BackupManager(DataBase):
         # Comprimindo o arquivo de backup em formato ZIP
         try:
             with zipfile.ZipFile(zipFile, "w", zipfile.ZIP_DEFLATED) as zipf:
-                zipf.write(backupFile, arcname=backupFile)
+                zipf.write(backupFile, arcname=os.path.basename(backupFile))
                 
-            self._file.deleteFile(self.__backupDir)
+            self._file.delete_file(backupFile)
 
         except Exception as e:
-            print(f"Erro ao tentar criar o arquivo ZIP: {e}")
+            self._log.write_log("Logs/databaseOperations.log", "ERROR", f"Erro ao tentar criar o arquivo ZIP: {e}")
             
 
     # Envia o backup para servidores remotos (FTP, S3, Google Drive)
@@ -48,9 +50,27 @@ class BackupManager(DataBase):
     
     # Remove backups antigos com base num período de retenção.
     def deleteOldBackups(self, retentionDays):
-        pass
+        if not self._file.dir_exists(self.__backupDir):
+            return
 
+        limit = time.time() - retentionDays * 86400
+        for name in os.listdir(self.__backupDir):
+            path = os.path.join(self.__backupDir, name)
+            if name.endswith(".zip") and os.path.getmtime(path) < limit:
+                self._file.delete_file(path)
+                self._log.write_log("Logs/databaseOperations.log", "INFO", f"Old backup removed: {name}")
 
-    # Agenda backups automáticos.
-    def automateBackup(self, interval):
-        pass
+
+    def __lastBackupTime(self):
+        if not self._file.dir_exists(self.__backupDir):
+            return 0.0
+        times = [os.path.getmtime(os.path.join(self.__backupDir, name)) for name in os.listdir(self.__backupDir) if name.endswith(".zip")]
+        return max(times, default = 0.0)
+
+
+    # Agenda backups automáticos (intervalo em dias) e a limpeza dos antigos no Scheduler.
+    # Se o último backup já tem mais do que o intervalo (ex.: após um reinício), corre logo.
+    def automateBackup(self, scheduler, interval, retentionDays = 90):
+        overdue = time.time() - self.__lastBackupTime() >= interval * 86400
+        scheduler.add_interval("backup", interval * 86400, self.createBackup, jitter = 600, run_immediately = overdue)
+        scheduler.add_cron("backup-retention", "15 4 * * *", self.deleteOldBackups, args = (retentionDays,))
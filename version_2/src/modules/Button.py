@@ -1,29 +1,73 @@
-#import RPi.GPIO as GPIO
+from modules.Gpio import GPIO
 from modules.Logger import Logger
+from typing import Callable, List
+import threading
+import time
 
 class Button:
     """
     @class Button
     @brief Represents a physical button connected to a GPIO pin.
-    
-    Provides methods for button state checking and resource cleanup.
+
+    Provides edge-triggered press callbacks with software debounce, state
+    checking and resource cleanup.
     """
-    def __init__(self, logger: Logger, pin: int) -> None:
+    def __init__(self, logger: Logger, pin: int, debounce: float = 0.05) -> None:
+        """
+        @brief Configures the pin and starts edge detection.
+        @param logger Logger instance for writing logs.
+        @param pin GPIO pin (BCM numbering), active low with pull-up.
+        @param debounce Seconds during which further edges after a press are ignored.
+        """
         self.__log = logger
         self.__pin = pin
-        #self.__configuratePin()
+        self.__debounce = debounce
+        self.__lastPress = 0.0
+        # perf_counter_ns of the last accepted press, the start of the command's trace.
+        self.lastPressNs = 0
+        self.__lock = threading.Lock()
+        self.__callbacks: List[Callable[[], None]] = []
+        self.__configuratePin()
 
 
-    """
     def __configuratePin(self) -> None:
         try:
             GPIO.setwarnings(False)
             GPIO.setmode(GPIO.BCM)
             GPIO.setup(self.__pin, GPIO.IN, pull_up_down = GPIO.PUD_UP)
-            self.__log.writeLog("Logs/buttonControl.log", "INFO", f"GPIO pin {self.__pin} configured successfully.")
+            GPIO.add_event_detect(self.__pin, GPIO.FALLING, callback = self.__onEdge, bouncetime = max(1, int(self.__debounce * 1000)))
+            self.__log.write_log("Logs/buttonControl.log", "INFO", f"GPIO pin {self.__pin} configured successfully.")
         except Exception as e:
-             self.__log.writeLog("Logs/buttonControl.log",  "ERROR", f"Failed to configure GPIO pin {self.__pin}: {e}")
-    """
+            self.__log.write_log("Logs/buttonControl.log",  "ERROR", f"Failed to configure GPIO pin {self.__pin}: {e}")
+
+
+    def __onEdge(self, channel: int) -> None:
+        """
+        @brief GPIO event-thread callback; filters bounces and notifies the listeners.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            if now - self.__lastPress < self.__debounce or not self.isPressed():
+                return
+            self.__lastPress = now
+            self.lastPressNs = time.perf_counter_ns()
+            callbacks = list(self.__callbacks)
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                self.__log.write_log("Logs/buttonControl.log", "ERROR", f"Button callback failed: {e}")
+
+
+    def onPress(self, callback: Callable[[], None]) -> None:
+        """
+        @brief Registers a function called (on the GPIO event thread) on every debounced press.
+        @param callback Function without arguments; it should return quickly.
+        """
+        with self.__lock:
+            self.__callbacks.append(callback)
+
 
     def isPressed(self) -> bool:
         """
@@ -31,20 +75,19 @@ class Button:
         @return True if pressed, False otherwise.
         """
         try:
-            #return GPIO.input(self.__pin) == GPIO.LOW
-            return True
+            return GPIO.input(self.__pin) == GPIO.LOW
         except Exception as e:
             self.__log.write_log("Logs/buttonControl.log", "ERROR", f"Failed to read GPIO pin {self.__pin}: {e}")
             return False
-        
+
 
     def cleanup(self) -> None:
         """
         @brief Releases the GPIO resources for the button.
         """
         try:
-            #GPIO.cleanup(self.__pin)
+            GPIO.remove_event_detect(self.__pin)
+            GPIO.cleanup(self.__pin)
             self.__log.write_log("Logs/buttonControl.log", "INFO", f"GPIO pin {self.__pin} cleaned up successfully.")
         except Exception as e:
             self.__log.write_log("Logs/buttonControl.log", "ERROR", f"Failed to clean up GPIO pin {self.__pin}: {e}")
-    
@@ -1,24 +1,50 @@
+from modules.Gpio import GPIO
 from modules.Logger import Logger
+from modules.Tracer import traced
 
-#import RPi.GPIO as GPIO
-
+from concurrent.futures import Future
+from typing import Deque, Dict, Optional, Sequence, Tuple, Union
+from collections import deque
+import threading
 import time
 
 
+# A pattern is a sequence of (on, off) durations in seconds.
+Pattern = Sequence[Tuple[float, float]]
+
+
 class Buzzer:
     """
     @class Buzzer
     @brief Represents a GPIO-controlled buzzer for signaling events.
 
-    Provides methods to activate, deactivate and beep the buzzer.
+    Patterns are played asynchronously by a dedicated timer thread, so callers
+    return as soon as the first tone starts. A new pattern preempts the one
+    that is playing.
     """
+    PATTERNS: Dict[str, Pattern] = {
+        "ack": ((0.15, 0.0),),
+        "error": ((0.1, 0.1), (0.1, 0.1), (0.4, 0.0)),
+        "ready": ((0.05, 0.05), (0.05, 0.0)),
+    }
+    CODE_TONE = (0.2, 0.2)
 
     def __init__(self, pin: int, logger: Logger) -> None:
         self._pin = pin
         self._log = logger
-        #self.__configuratePin()
+
+        self._condition = threading.Condition()
+        # Pending (time, level) transitions of the pattern being played.
+        self._timeline: Deque[Tuple[float, int]] = deque()
+        self._current: Optional[Future] = None
+        self._running = True
+
+        self.__configuratePin()
         self._off()
 
+        self._thread = threading.Thread(target = self._run, name = "buzzer", daemon = True)
+        self._thread.start()
+
 
     # ------- Private Methods -------
     def __configuratePin(self) -> None:
@@ -27,9 +53,9 @@ class Buzzer:
         """
 
         try:
-            #GPIO.setwarnings(False)
-            #GPIO.setmode(GPIO.BCM)
-            #GPIO.setup(self.__pin, GPIO.OUT)
+            GPIO.setwarnings(False)
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self._pin, GPIO.OUT)
             self._log.write_log("Logs/buzzerControl.log", "INFO", "Pin configured successfully.")
         except Exception as e:
             self._log.write_log("Logs/buzzerControl.log", "ERROR", f"Error configuring pin: {str(e)}")
@@ -40,8 +66,7 @@ class Buzzer:
         @brief Turns the buzzer on.
         """
         try:
-            #GPIO.output(self.__pin, GPIO.HIGH)
-            self._log.write_log("Logs/buzzerControl.log", "INFO", "Buzzer turned on.")
+            GPIO.output(self._pin, GPIO.HIGH)
         except Exception as e:
             self._log.write_log("Logs/buzzerControl.log", "ERROR", f"Error turning buzzer on: {str(e)}")
 
@@ -51,27 +76,126 @@ class Buzzer:
         @brief Turns the buzzer off.
         """
         try:
-            #GPIO.output(self.__pin, GPIO.LOW)
-            self._log.write_log("Logs/buzzerControl.log", "INFO", "Buzzer turned off.")
+            GPIO.output(self._pin, GPIO.LOW)
         except Exception as e:
             self._log.write_log("Logs/buzzerControl.log", "ERROR", f"Error turning buzzer off: {str(e)}")
-        
+
+
+    def _preempt(self) -> None:
+        """
+        @brief Drops the pattern being played; its future resolves to False. Caller holds the lock.
+        """
+        self._timeline.clear()
+        if self._current is not None and not self._current.done():
+            self._current.set_result(False)
+        self._current = None
+
+
+    def _run(self) -> None:
+        """
+        @brief Timer thread: applies each transition of the current pattern at its due time.
+        """
+        with self._condition:
+            while self._running:
+                if not self._timeline:
+                    self._condition.wait()
+                    continue
+
+                due, level = self._timeline[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                self._timeline.popleft()
+                if level:
+                    self._on()
+                else:
+                    self._off()
+
+                if not self._timeline and self._current is not None:
+                    self._current.set_result(True)
+                    self._current = None
+
 
     # ------- Public Methods -------
-    def beep(self, duration:float = 0.5) -> None:
+    @traced("buzzer.play")
+    def play(self, pattern: Union[str, Pattern]) -> Future:
+        """
+        @brief Starts a pattern and returns immediately, preempting any pattern in progress.
+        @param pattern Name in PATTERNS or a sequence of (on, off) durations in seconds.
+        @return Future resolved with True when the pattern finishes, False if it was preempted.
+        """
+        future: Future = Future()
+        try:
+            steps = self.PATTERNS[pattern] if isinstance(pattern, str) else tuple(pattern)
+        except KeyError:
+            self._log.write_log("Logs/buzzerControl.log", "ERROR", f"Unknown buzzer pattern: {pattern}")
+            future.set_result(False)
+            return future
+
+        with self._condition:
+            self._preempt()
+            at = time.monotonic()
+            for on, off in steps:
+                self._timeline.append((at, GPIO.HIGH))
+                at += on
+                self._timeline.append((at, GPIO.LOW))
+                at += off
+            self._current = future
+            if not self._timeline:
+                self._off()
+                future.set_result(True)
+                self._current = None
+            self._condition.notify()
+        return future
+
+
+    def beep(self, duration: float = 0.5) -> Future:
         """
-        @brief Activates the buzzer for a short period.
+        @brief Sounds the buzzer once without blocking the caller.
         @param duration Duration of the beep in seconds (default: 0.5s).
         """
-        self._on()
-        time.sleep(duration)
-        self._off()
+        return self.play(((duration, 0.0),))
+
+
+    def error_beep(self) -> Future:
+        """
+        @brief Plays the error pattern (two short beeps and a long one).
+        """
+        return self.play("error")
+
+
+    def code(self, count: int) -> Future:
+        """
+        @brief Plays `count` evenly spaced beeps, e.g. to signal an error code.
+        """
+        return self.play((self.CODE_TONE,) * max(0, count))
+
+
+    def turn_off(self) -> None:
+        """
+        @brief Stops any pattern in progress and silences the buzzer.
+        """
+        with self._condition:
+            self._preempt()
+            self._off()
+            self._condition.notify()
+
 
-    """
     def cleanup(self) -> None:
+        """
+        @brief Stops the timer thread and releases the GPIO pin.
+        """
+        with self._condition:
+            self._preempt()
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
         try:
-            GPIO.cleanup(self.__pin)
-            self.__log.writeLog("Logs/buzzerControl.log", "INFO", f"GPIO pin {self.__pin} cleaned up successfully.")
+            self._off()
+            GPIO.cleanup(self._pin)
+            self._log.write_log("Logs/buzzerControl.log", "INFO", f"GPIO pin {self._pin} cleaned up successfully.")
         except Exception as e:
-            self.__log.writeLog("Logs/buzzerControl.log", "ERROR", f"Failed to clean up GPIO pin {self.__pin}: {e}")
-    """    
+            self._log.write_log("Logs/buzzerControl.log", "ERROR", f"Failed to clean up GPIO pin {self._pin}: {e}")
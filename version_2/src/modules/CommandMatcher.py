@@ -0,0 +1,37 @@
+from typing import List, Optional, Tuple
+
+
+class CommandMatcher:
+    """
+    @class CommandMatcher
+    @brief Fuzzy matching of a recognized command against the component catalog.
+    """
+
+    def __init__(self, threshold: float = 0.6) -> None:
+        """
+        @brief Initializes the matcher.
+        @param threshold Minimum similarity ratio (0..1) accepted as a match.
+        """
+        self.threshold = threshold
+
+
+    def best_match(self, command: str, candidates: List[str]) -> Optional[Tuple[str, float]]:
+        """
+        @brief Finds the candidate most similar to the command.
+        @param command Recognized command text.
+        @param candidates Component names to compare against.
+        @return Tuple (candidate, score) of the best match above the threshold, or None.
+        """
+        import difflib  # loaded with the first command, not at start-up
+
+        command = command.lower()
+        similarities = [
+            (cmd, difflib.SequenceMatcher(None, command, cmd.lower()).ratio())
+            for cmd in candidates
+        ]
+
+        similarities = [(cmd, score) for cmd, score in similarities
+                        if score >= self.threshold]
+        similarities.sort(key = lambda x: x[1], reverse = True)
+
+        return similarities[0] if similarities else None
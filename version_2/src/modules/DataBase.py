@@ -1,14 +1,29 @@
-from typing import List, Optional, Tuple, Any
+from modules.Metrics import registry
+from modules.Tracer import traced
+from typing import Iterable, List, Optional, Tuple, Any
+import threading
 import sqlite3
 import os
 
+
+_QUERY_SECONDS = registry.histogram("echo_db_query_seconds", "Duration of database queries.", ("query",))
+
+
 class DataBase:
     """
     @class DataBase
     @brief Manages SQLite database operations for storing component information.
     
     Handles database initialization, insertion, querying, and deletion of component records.
+
+    Every committed change bumps a process-wide catalog generation, shared by all
+    instances, so readers (HTTP validators, caches) can tell whether the catalog
+    changed without querying it. BOOT_ID tells generations of different runs apart.
     """
+    BOOT_ID = os.urandom(4).hex()
+    _generation = 0
+    _generation_lock = threading.Lock()
+
     def __init__(self, logger, filemanager): 
         """
         @brief Constructs the database manager.
@@ -39,6 +54,20 @@ class DataBase:
             raise
 
 
+    @classmethod
+    def generation(cls) -> int:
+        """
+        @brief Current catalog generation; increases after every committed change.
+        """
+        return cls._generation
+
+
+    @classmethod
+    def _bump_generation(cls) -> None:
+        with cls._generation_lock:
+            cls._generation += 1
+
+
     def __initialize(self) -> None:
         """
         @brief Ensures the database directory, file, and schema are properly initialized.
@@ -80,12 +109,14 @@ class DataBase:
 
 
 
-    def insert_component(self, name: str, position: int, description: str) -> None:
+    @_QUERY_SECONDS.timed("insert_component")
+    def insert_component(self, name: str, position: int, description: str) -> bool:
         """
         @brief Inserts a new component into the database.
         @param name Name of the component.
         @param position Position value.
         @param description Description of the component.
+        @return True if the component was stored.
         """
 
         query = f"INSERT INTO {self._table} (componentName, position, description) VALUES (?, ?, ?)"
@@ -94,27 +125,37 @@ class DataBase:
                 #cursor = conn.cursor()
                 conn.execute(query, (name, position, description))
                 conn.commit()
+            self._bump_generation()
+            return True
         except Exception as e:
             self._log.write_log("Logs/databaseOperations.log", "ERROR", f"Failed to insert component: {e}")
+            return False
 
 
 
-    def delete_component(self, name: str) -> None:
+    @_QUERY_SECONDS.timed("delete_component")
+    def delete_component(self, name: str) -> int:
         """
         @brief Deletes a component by name.
         @param name Name of the component to delete.
+        @return Number of rows deleted.
         """
         query = f"DELETE FROM {self._table} WHERE componentName = ?"
         try:
             with self.__connect() as conn:
-                conn.execute(query, (name,))
+                deleted = conn.execute(query, (name,)).rowcount
                 conn.commit()
+            if deleted:
+                self._bump_generation()
+            return deleted
 
         except Exception as e:
             self._log.write_log("Logs/databaseOperations.log", "ERROR", f"Failed to delete component: {e}")
+            return 0
     
 
 
+    @_QUERY_SECONDS.timed("search_component")
     def search_component(self, name: str) -> List[Tuple[Any]]:
         """
         @brief Searches for a component by name.
@@ -123,7 +164,7 @@ class DataBase:
         """
         query = f"SELECT * FROM {self._table} WHERE componentName = ?"
         try:
-            with self._connect() as conn:
+            with self.__connect() as conn:
                 cursor = conn.execute(query, (name,))
                 return cursor.fetchall()
         except Exception as e:
@@ -131,6 +172,8 @@ class DataBase:
             return []
         
 
+    @_QUERY_SECONDS.timed("get_position")
+    @traced("db.get_position")
     def get_position(self, name: str) -> Optional[int]:
         """
         @brief Gets the position of a component by name.
@@ -141,7 +184,7 @@ class DataBase:
         query = f"SELECT position FROM {self._table} WHERE componentName = ?;"
 
         try:
-            with self._connect() as conn:
+            with self.__connect() as conn:
                 cursor = conn.execute(query, (name,))
                 result = cursor.fetchone()
                 return result[0] if result else None
@@ -150,6 +193,8 @@ class DataBase:
             return None
 
 
+    @_QUERY_SECONDS.timed("get_all_components")
+    @traced("db.get_all_components")
     def get_all_components(self) -> List[Tuple[str, int, str]]:
         """
         @brief Retrieves all components from the database.
@@ -157,11 +202,100 @@ class DataBase:
         """
         query = f"SELECT * FROM {self._table}"
         try:
-            with self._connect() as conn:
+            with self.__connect() as conn:
                 cursor = conn.execute(query)
                 result = cursor.fetchall()
                 return [(row[1], row[2], row[3]) for row in result]
         except Exception as e:
             self._log.write_log("Logs/databaseOperations.log", "ERROR", f"Fetch all components failed: {e}")
             return []
-    
+
+
+    @_QUERY_SECONDS.timed("list_components")
+    def list_components(self, after_id: int = 0, limit: int = 50, text: Optional[str] = None,
+                        position: Optional[int] = None) -> List[Tuple[int, str, int, str]]:
+        """
+        @brief Returns one page of components ordered by id (keyset pagination).
+        @param after_id Only rows with a larger id are returned (the cursor of the previous page).
+        @param limit Maximum number of rows.
+        @param text Case-insensitive substring of the name or description.
+        @param position Exact position.
+        @return List of (id, componentName, position, description).
+        """
+        conditions = ["id > ?"]
+        params: List[Any] = [after_id]
+        if text:
+            conditions.append("(componentName LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params += [pattern, pattern]
+        if position is not None:
+            conditions.append("position = ?")
+            params.append(position)
+        params.append(limit)
+
+        query = f"SELECT id, componentName, position, description FROM {self._table} WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?"
+        try:
+            with self.__connect() as conn:
+                return conn.execute(query, params).fetchall()
+        except Exception as e:
+            self._log.write_log("Logs/databaseOperations.log", "ERROR", f"List components failed: {e}")
+            return []
+
+
+    @_QUERY_SECONDS.timed("apply_batch")
+    def apply_batch(self, add: Iterable[Tuple[str, int, str]] = (), delete: Iterable[str] = ()) -> Tuple[int, int]:
+        """
+        @brief Inserts and deletes components in a single transaction: either every change is applied or none.
+        @param add (name, position, description) rows to insert.
+        @param delete Names of the components to delete (deletions run first).
+        @return (rows inserted, rows deleted).
+        @throws sqlite3.Error if the transaction fails; nothing is changed in that case.
+        """
+        rows = list(add)
+        conn = self.__connect()
+        try:
+            with conn:
+                deleted = sum(conn.execute(f"DELETE FROM {self._table} WHERE componentName = ?", (name,)).rowcount for name in delete)
+                conn.executemany(f"INSERT INTO {self._table} (componentName, position, description) VALUES (?, ?, ?)", rows)
+                inserted = len(rows)
+        except sqlite3.Error as e:
+            self._log.write_log("Logs/databaseOperations.log", "ERROR", f"Batch update failed and was rolled back: {e}")
+            raise
+        finally:
+            conn.close()
+
+        if inserted or deleted:
+            self._bump_generation()
+        self._log.write_log("Logs/databaseOperations.log", "INFO", f"Batch update: {inserted} inserted, {deleted} deleted.")
+        return inserted, deleted
+
+
+    def backup_to(self, path: str) -> None:
+        """
+        @brief Writes a consistent copy of the database, safe while other connections are writing.
+        @param path Destination file.
+        """
+        source = self.__connect()
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self._log.write_log("Logs/databaseOperations.log", "INFO", f"Database backed up to {path}.")
+
+
+    def optimize(self) -> None:
+        """
+        @brief Refreshes the query planner statistics (ANALYZE) and compacts the file (VACUUM).
+        """
+        try:
+            conn = self.__connect()
+            try:
+                conn.execute("ANALYZE")
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+            self._log.write_log("Logs/databaseOperations.log", "INFO", "Database analyzed and vacuumed.")
+        except Exception as e:
+            self._log.write_log("Logs/databaseOperations.log", "ERROR", f"Database maintenance failed: {e}")
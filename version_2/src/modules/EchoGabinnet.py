@@ -2,15 +2,27 @@ from modules.SystemConfigurator import SystemConfigurator
 from modules.DataBase import DataBase
 from modules.LedController import LedController
 from modules.Microphone import MicroPhone
-#from modules.Button import Button
-#from modules.Buzzer import Buzzer
-
-from typing import Optional, Union, List, Dict, Any, Tuple
-#import RPi.GPIO as GPIO
-import difflib
+from modules.CommandMatcher import CommandMatcher
+from modules.Button import Button
+from modules.Buzzer import Buzzer
+from modules.Tracer import trace_future, traced, tracer
+from modules.Metrics import registry
+from modules.EventBroadcaster import events
+from modules.SuggestIndex import suggestions
 
+from concurrent.futures import Future
+from typing import Optional, Union, List, Dict, Any, Tuple, Callable
+import threading
+import queue
+import time
+import os
 
 
+_COMMANDS = registry.counter("echo_commands_total", "Voice commands processed, by result (matched, unmatched, unrecognized, failed).", ("result",))
+_MATCH_SCORE = registry.histogram("echo_match_score", "Similarity score of matched commands.",
+                                  buckets = (0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0))
+for _result in ("matched", "unmatched", "unrecognized", "failed"):
+    _COMMANDS.labels(_result)
 
 
 class EchoGabinet:
@@ -19,6 +31,8 @@ class EchoGabinet:
     
     Handles voice commands processing, LED control, and system operations.
     """
+    SIMILARITY_THRESHOLD = 0.6
+
     def __init__(self, logger, file_manager) -> None:
         """
         Initialize the EchoGabinet system with all components.
@@ -31,6 +45,11 @@ class EchoGabinet:
         self._file_manager = file_manager
         self._system_config = SystemConfigurator(logger, file_manager)
 
+        # Button presses and wake-word detections; consumed by run().
+        self._events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self._listener = None
+        # Set once the inputs are started and a command can be accepted.
+        self.ready = threading.Event()
 
         self._initialize_components()
 
@@ -49,12 +68,15 @@ class EchoGabinet:
                 rs_485_pin = int(settings[0]["rs_485_pin"]),
                 data_size = int(settings[0]["data_size"]),
                 led_quantity = int(settings[0]["led_quantity"]),
-                box_quantity = int(settings[0]["box_quantity"])
+                box_quantity = int(settings[0]["box_quantity"]),
+                protocol = int(settings[0].get("rs485_protocol", 0)),
+                ack = str(settings[0].get("rs485_ack", "false")).lower() == "true",
+                window = int(settings[0].get("rs485_window", 4))
             )
             
             # Initialize input/output devices
-            # self._button = Button(self._log, settings[0]["button_pin"])
-            # self._buzzer = Buzzer(self._log, settings[0]["buzzer_pin"])
+            self._button = Button(self._log, int(settings[0]["button_pin"]))
+            self._buzzer = Buzzer(int(settings[0]["buzzer_pin"]), self._log)
 
 
             self._microphone = MicroPhone(
@@ -66,10 +88,37 @@ class EchoGabinet:
                 rate = int(settings[0]["rate"]),
                 chunk = int(settings[0]["chunk"]),
                 record_time = float(settings[0]["record_time"]),
-                language = settings[0]["language"]
+                language = settings[0]["language"],
+                recognizer = settings[0].get("recognizer", "google")
             )
+
+            threshold = float(settings[0].get("similarity_threshold", self.SIMILARITY_THRESHOLD))
+            self._matcher = CommandMatcher(threshold)
+
+            # Optional worker processes for recognition and matching, outside this interpreter's GIL.
+            workers = int(settings[0].get("recognition_workers", 0))
+            self._recognition = None
+            # DataBase generation of the catalog last published to the workers.
+            self._catalog_generation: Optional[int] = None
+            if workers > 0:
+                # multiprocessing and the pool are only loaded when worker processes are configured.
+                from modules.RecognitionPool import RecognitionPool
+
+                self._recognition = RecognitionPool(
+                    self._log,
+                    workers = workers,
+                    recognizer = settings[0].get("recognizer", "google"),
+                    language = settings[0]["language"],
+                    rate = self._microphone.rate,
+                    channels = self._microphone.channels,
+                    silence_level = self._microphone.silence_level,
+                    threshold = threshold
+                )
             
             self._log.set_lan(settings[0]["language"])
+
+            self._listen_mode = settings[0].get("listen_mode", "button")
+            self._led_auto_off = float(settings[0].get("led_auto_off", 0))
         
 
             # Initialize database
@@ -80,61 +129,280 @@ class EchoGabinet:
             raise
 
 
-    def _find_best_command_match(self, command: str, all_commands: List[str]) -> Optional[Tuple[str, float]]:
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """System settings loaded from Config/settings.json."""
+        return self._system_config.settings[0]
 
-        similarities = [
-            (cmd, difflib.SequenceMatcher(None, command.lower(), cmd.lower()).ratio())
-            for cmd in all_commands
-        ]
 
-        similarities = [(cmd, score) for cmd, score in similarities
-                        if score >= self.SIMILARITY_THRESHOLD]
-        similarities.sort(Key = lambda x: x[1], reverse = True)
+    @property
+    def has_recognition_workers(self) -> bool:
+        """Whether recognition runs in worker processes (the only case warm_up() has work to do)."""
+        return self._recognition is not None
 
-        return similarities[0] if similarities else None
+
+    def _find_best_command_match(self, command: str, all_commands: List[str]) -> Optional[Tuple[str, float]]:
+        return self._matcher.best_match(command, all_commands)
     
 
+    def _report_result(self, command: Optional[str], matched: Optional[str], score: float, position: Optional[int]) -> None:
+        """Update the command metrics and suggestion ranking, and publish the outcome of one recognition to live clients."""
+        if matched is not None:
+            result = "matched"
+            _MATCH_SCORE.observe(score)
+            # Parts asked for by voice rank first in the web search suggestions.
+            suggestions.record_hit(matched)
+        else:
+            result = "unmatched" if command else "unrecognized"
+        _COMMANDS.labels(result).inc()
+        events.publish("command", {
+            "command": command,
+            "result": result,
+            "match": matched,
+            "score": round(score, 3) if matched is not None else None,
+            "position": position,
+        })
+
+
+    @traced("command.match")
     def _processe_command(self, command: str) -> Optional[int]:
         try:
-            all_commands = self._database.get_all_components()
+            all_commands = [name for name, _, _ in self._database.get_all_components()]
             best_match = self._find_best_command_match(command, all_commands)
 
             if best_match:
                 matched_command, score = best_match
                 self._log.write_log("./Logs/command.log", "INFO", f"Command matched: '{command}' -> '{matched_command}' (score: {score:.2f})")
-                return self._database.get_position(matched_command)
+                position = self._database.get_position(matched_command)
+                self._report_result(command, matched_command, score, position)
+                return position
             
             self._log.write_log("./Logs/command.log", "WARNING", f"No match found for command: '{command}'")
+            self._report_result(command, None, 0.0, None)
             return None
 
         except Exception as e:
+            _COMMANDS.labels("failed").inc()
             self._log.write_log("./Logs/errorEvents.log", "ERROR", f"Command processing failed: {str(e)}")
             return None
         
 
+    def acknowledge(self) -> None:
+        """Play the acknowledgement tone; returns immediately."""
+        self._buzzer.play("ack")
+
+
+    def record(self, source: str, payload: Any) -> List[bytes]:
+        """Return the audio of a command: recorded now for a button press, already captured for a wake word."""
+        if source == "wake_word":
+            return payload
+        return self._microphone.recordAudio()
+
+
+    def recognize(self, source: str, frames: List[bytes]) -> Optional[str]:
+        """Transcribe recorded frames, stripping the wake word from wake-word commands."""
+        if not frames:
+            return None
+
+        command = self._microphone.transcribe(self._microphone.preprocess(frames))
+        if source == "wake_word":
+            wake_word = self._system_config.settings[0].get("wake_word", "").lower()
+            if command and wake_word and command.startswith(wake_word):
+                command = command[len(wake_word):].strip()
+        return command
+
+
+    def resolve(self, command: Optional[str]) -> Optional[int]:
+        """Return the LED position of the component that best matches a command."""
+        if not command:
+            self._report_result(command, None, 0.0, None)
+            return None
+        return self._processe_command(command)
+
+
+    def analyze(self, source: str, frames: List[bytes]) -> Future:
+        """
+        Recognize and match a recording.
+
+        With recognition workers configured the work runs in a worker process and
+        this returns at once; otherwise it runs here and the future is already done.
+        Returns a future of (command, position).
+        """
+        if self._recognition is None:
+            future: Future = Future()
+            try:
+                command = self.recognize(source, frames)
+                future.set_result((command, self.resolve(command)))
+            except Exception as e:
+                _COMMANDS.labels("failed").inc()
+                future.set_exception(e)
+            return future
+
+        self._refresh_catalog()
+        wake_word = self._system_config.settings[0].get("wake_word", "").lower() if source == "wake_word" else ""
+        remote = self._recognition.submit(frames, wake_word = wake_word)
+        trace_future(remote, "recognition.worker")
+
+        future = Future()
+        def done(remote: Future) -> None:
+            try:
+                command, name, score, position = remote.result()
+            except Exception as e:
+                _COMMANDS.labels("failed").inc()
+                self._log.write_log("./Logs/errorEvents.log", "ERROR", f"Recognition worker failed: {str(e)}")
+                future.set_exception(e)
+                return
+            self._report_result(command, name, score, position)
+            if name is not None:
+                self._log.write_log("./Logs/command.log", "INFO", f"Command matched: '{command}' -> '{name}' (score: {score:.2f})")
+            elif command:
+                self._log.write_log("./Logs/command.log", "WARNING", f"No match found for command: '{command}'")
+            future.set_result((command, position))
+        remote.add_done_callback(done)
+        return future
+
+
+    def _refresh_catalog(self) -> None:
+        """Publish the catalog to the recognition workers, only if it changed since the last publish."""
+        # Read before the components: a write landing in between is picked up by the next command.
+        generation = DataBase.generation()
+        if generation == self._catalog_generation:
+            return
+        self._recognition.publish_catalog([(name, position) for name, position, _ in self._database.get_all_components()])
+        self._catalog_generation = generation
+
+
+    def warm_up(self) -> None:
+        """Push a changed catalog to the recognition workers ahead of the next command (scheduled job)."""
+        if self._recognition is not None:
+            self._refresh_catalog()
+
+
+    def show(self, position: Optional[int]) -> Optional[Future]:
+        """Light a position (error tone if None) and return the LED transmission future."""
+        if position is None:
+            self._buzzer.error_beep()
+            return None
+
+        future = self._led_controller._sendByte(position)
+        if self._led_auto_off > 0:
+            self._led_controller.auto_off(position, self._led_auto_off)
+        return future
+
+
+    def _handle_command(self, command: Optional[str]) -> Optional[Future]:
+        """Match a recognized command and light the corresponding position."""
+        return self.show(self.resolve(command))
+
+
+    def _post_event(self, source: str, payload: Any) -> None:
+        """Called on the GPIO or listener thread for every button press or wake-word command."""
+        self._events.put((source, payload))
+
+
+    def start_inputs(self, post: Callable[[str, Any], None]) -> None:
+        """
+        Start the configured input and deliver its events to `post(source, payload)`.
+
+        `post` is called from the GPIO event thread or the listener thread.
+        """
+        if self._listen_mode == "wake_word":
+            self._start_wake_word_listener(lambda frames: post("wake_word", frames))
+        else:
+            self._button.onPress(lambda: post("button", self._button.lastPressNs))
+        self.ready.set()
+
+
+    def _start_wake_word_listener(self, on_command: Callable[[List[bytes]], None]) -> None:
+        """Start the always-on listener thread that posts wake-word events."""
+        from modules.KeywordSpotter import KeywordSpotter
+        from modules.WakeWordListener import WakeWordListener
+
+        settings = self._system_config.settings[0]
+        templates_dir = settings.get("wake_word_templates", "Config/wake_word")
+        templates = [
+            self._file_manager._resolve_path(f"{templates_dir}/{name}")
+            for name in sorted(os.listdir(self._file_manager._resolve_path(templates_dir)))
+            if name.endswith(".wav")
+        ]
+
+        spotter = KeywordSpotter(
+            self._log,
+            rate = self._microphone.rate,
+            channels = self._microphone.channels,
+            templates = templates,
+            threshold = float(settings.get("wake_word_threshold", 1.5))
+        )
+        self._listener = WakeWordListener(
+            self._log,
+            self._microphone,
+            spotter,
+            on_command = on_command,
+            cpu_budget = float(settings.get("wake_word_cpu_budget", 0.15))
+        )
+        threading.Thread(target = self._listener.run, name = "wake-word", daemon = True).start()
+
+
+    def _run_cycle(self, source: str, payload: Any) -> None:
+        """Run one command cycle for a button press or a wake-word detection."""
+        pressed = payload if source == "button" else None
+        with tracer.trace("voice-command", start_ns = pressed, source = source) as trace:
+            if pressed:
+                trace.add_span("button.wait", pressed, time.perf_counter_ns())
+            # Non-blocking: recording starts while the acknowledgement tone plays.
+            self.acknowledge()
+            frames = self.record(source, payload)
+            with tracer.span("recognition"):
+                _, position = self.analyze(source, frames).result()
+            self.show(position)
+
+
+    def _drop_stale_presses(self) -> None:
+        """Discard button presses that arrived while a cycle was running."""
+        pending = []
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] != "button":
+                pending.append(event)
+        for event in pending:
+            self._events.put(event)
+
+
+    def stop(self) -> None:
+        """Ask run() to return after the current cycle."""
+        self._events.put(("stop", None))
+
+
+    def close(self) -> None:
+        """Stop the inputs and release the hardware."""
+        if self._listener is not None:
+            self._listener.stop()
+        self._button.cleanup()
+        self._buzzer.cleanup()
+        self._led_controller.close()
+        if self._recognition is not None:
+            self._recognition.close()
+
+
     def run(self) -> None:
-        """Main system loop to process voice commands and control LEDs."""
+        """Main system loop: block on input events, then process the voice command and control LEDs."""
         try:
+            self.start_inputs(self._post_event)
+
             while True:
-                if self._button.is_pressed():
-                    try:
-                        self._buzzer.beep()
-                        
-                        # Record and process command
-                        command = self._microphone.record_audio()
-                        position = self._process_command(command)
-                        
-                        if position is not None:
-                            self._led_controller.send_byte(position)
-                        else:
-                            self._buzzer.error_beep()  # Add this method to Buzzer class
-                            
-                    except Exception as e:
-                        self._log.write_log("./Logs/errorEvents.log", "ERROR", f"Command cycle failed: {str(e)}")
-                        self._buzzer.error_beep()
-                else:
-                    self._buzzer.turn_off()
-                    
+                source, payload = self._events.get()
+                if source == "stop":
+                    break
+                try:
+                    self._run_cycle(source, payload)
+                except Exception as e:
+                    self._log.write_log("./Logs/errorEvents.log", "ERROR", f"Command cycle failed: {str(e)}")
+                    self._buzzer.error_beep()
+                self._drop_stale_presses()
+
         except KeyboardInterrupt:
             self._log.write_log("./Logs/system.log", "INFO", "System shutdown by user")
         except Exception as e:
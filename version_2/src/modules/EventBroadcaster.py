@@ -0,0 +1,195 @@
+"""
+@file EventBroadcaster.py
+@brief Fan-out of live events (commands, matches, LED state) to Server-Sent Events clients.
+
+publish() serializes an event once into its SSE wire form and appends the
+same bytes to every subscriber's bounded buffer. A buffer that is full drops
+its oldest event, so a slow or stalled client never blocks the voice loop or
+the RS485 transmitter. The last few events are kept so a client that
+reconnects with Last-Event-ID resumes where it stopped.
+
+Subscribers can be drained from a thread (blocking) or from an asyncio loop;
+EventStream exposes both, so the async web server streams events without
+holding a worker thread per client.
+"""
+from modules.Metrics import registry
+
+from collections import deque
+from typing import Any, Deque, List, Optional, Set, Tuple
+import asyncio
+import json
+import threading
+
+
+_PUBLISHED = registry.counter("echo_events_published_total", "Events published to the live event stream.", ("type",))
+_DROPPED = registry.counter("echo_events_dropped_total", "Events dropped from slow clients' buffers.")
+
+
+class Subscription:
+    """
+    @class Subscription
+    @brief One client's bounded, drop-oldest buffer of serialized events.
+    """
+
+    def __init__(self, broadcaster: "Broadcaster", buffer_size: int) -> None:
+        self._broadcaster = broadcaster
+        self._buffer: Deque[bytes] = deque(maxlen = buffer_size)
+        self._event = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_event: Optional[asyncio.Event] = None
+        self.dropped = 0
+
+
+    def _push(self, data: bytes) -> None:
+        """
+        @brief Called by the broadcaster, under its lock, for every event.
+        """
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+            _DROPPED.inc()
+        self._buffer.append(data)
+        self._event.set()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._async_event.set)
+            except RuntimeError:
+                pass  # the loop is closed; close() follows
+
+
+    def _drain(self) -> List[bytes]:
+        items = []
+        while True:
+            try:
+                items.append(self._buffer.popleft())
+            except IndexError:
+                return items
+
+
+    def get(self, timeout: Optional[float] = None) -> List[bytes]:
+        """
+        @brief Waits for events; returns them all, or an empty list on timeout.
+        """
+        self._event.clear()
+        items = self._drain()
+        if items or not self._event.wait(timeout):
+            return items
+        return self._drain()
+
+
+    async def get_async(self, timeout: Optional[float] = None) -> List[bytes]:
+        """
+        @brief get() for a coroutine running on an asyncio loop.
+        """
+        if self._loop is None:
+            self._async_event = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+
+        self._async_event.clear()
+        items = self._drain()
+        if items:
+            return items
+        try:
+            await asyncio.wait_for(self._async_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self._drain()
+
+
+    def close(self) -> None:
+        self._broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    """
+    @class Broadcaster
+    @brief Publishes events to every subscription.
+    """
+
+    def __init__(self, buffer_size: int = 64, replay: int = 64) -> None:
+        """
+        @param buffer_size Events buffered per client before the oldest are dropped.
+        @param replay Recent events kept for clients reconnecting with Last-Event-ID.
+        """
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscription] = set()
+        self._recent: Deque[Tuple[int, bytes]] = deque(maxlen = replay)
+        self._next_id = 1
+
+        registry.function("echo_event_subscribers", "Connected live event clients.", lambda: len(self._subscribers))
+
+
+    def publish(self, event_type: str, data: Any) -> None:
+        """
+        @brief Sends an event to every subscriber; never blocks on a client.
+        @param event_type SSE event name, e.g. "command" or "leds".
+        @param data JSON-serializable payload.
+        """
+        payload = json.dumps(data, separators = (",", ":"), default = str)
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            message = f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode("utf-8")
+            self._recent.append((event_id, message))
+            for subscription in self._subscribers:
+                subscription._push(message)
+        _PUBLISHED.labels(event_type).inc()
+
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        @brief Registers a client.
+        @param last_event_id Id of the last event the client received; newer recent events are replayed.
+        """
+        subscription = Subscription(self, self._buffer_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event_id, message in self._recent:
+                    if event_id > last_event_id:
+                        subscription._push(message)
+            self._subscribers.add(subscription)
+        return subscription
+
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+class EventStream:
+    """
+    @class EventStream
+    @brief WSGI body of a text/event-stream response.
+
+    Iterating blocks the calling thread (any WSGI server); AsyncWsgiServer uses
+    the async iterator instead and waits on its loop. A comment line is sent
+    after `heartbeat` idle seconds so dead connections are noticed.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, last_event_id: Optional[int] = None, heartbeat: float = 15.0) -> None:
+        self._subscription = broadcaster.subscribe(last_event_id)
+        self._heartbeat = heartbeat
+        self._closed = False
+
+
+    def __iter__(self):
+        yield b"retry: 3000\n\n"
+        while not self._closed:
+            items = self._subscription.get(self._heartbeat)
+            yield b"".join(items) if items else b": keep-alive\n\n"
+
+
+    async def __aiter__(self):
+        yield b"retry: 3000\n\n"
+        while not self._closed:
+            items = await self._subscription.get_async(self._heartbeat)
+            yield b"".join(items) if items else b": keep-alive\n\n"
+
+
+    def close(self) -> None:
+        self._closed = True
+        self._subscription.close()
+
+
+# Process-wide broadcaster fed by EchoGabinet and LedController.
+events = Broadcaster()
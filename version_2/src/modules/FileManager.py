@@ -245,7 +245,7 @@ class FileManager:
         resolved_path = self._resolve_path(filepath)
         
         if not self.file_exists(resolved_path):
-            initial_content = '' if mode == 'a' else content if isinstance(content, str) else ''
+            initial_content = content if isinstance(content, str) else ''
             self.create_file(resolved_path, initial_content)
 
             if isinstance(content, (dict, list)):
@@ -0,0 +1,98 @@
+"""
+@file Gpio.py
+@brief Access to the Raspberry Pi GPIO with a simulated fallback.
+
+On the Pi `GPIO` is RPi.GPIO itself. Anywhere else it is a SimulatedGPIO that
+keeps pin levels in memory, so the hardware classes run unchanged on a dev machine.
+"""
+from typing import Callable, Dict, List
+import threading
+
+
+class SimulatedGPIO:
+    """
+    @class SimulatedGPIO
+    @brief In-memory stand-in implementing the subset of RPi.GPIO used by the project.
+    """
+    BCM = 11
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_UP = 22
+    PUD_DOWN = 21
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self) -> None:
+        self._levels: Dict[int, int] = {}
+        self._modes: Dict[int, int] = {}
+        self._edges: Dict[int, int] = {}
+        self._callbacks: Dict[int, List[Callable[[int], None]]] = {}
+
+    def setmode(self, mode: int) -> None:
+        pass
+
+    def setwarnings(self, flag: bool) -> None:
+        pass
+
+    def setup(self, pin: int, mode: int, pull_up_down: int = PUD_DOWN, initial: int = LOW) -> None:
+        self._modes[pin] = mode
+        if mode == self.IN:
+            self._levels[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+        else:
+            self._levels[pin] = initial
+
+    def output(self, pin: int, level: int) -> None:
+        self._levels[pin] = self.HIGH if level else self.LOW
+
+    def input(self, pin: int) -> int:
+        return self._levels.get(pin, self.LOW)
+
+    def add_event_detect(self, pin: int, edge: int, callback: Callable[[int], None] = None, bouncetime: int = None) -> None:
+        self._edges[pin] = edge
+        self._callbacks[pin] = [callback] if callback else []
+
+    def add_event_callback(self, pin: int, callback: Callable[[int], None]) -> None:
+        self._callbacks.setdefault(pin, []).append(callback)
+
+    def remove_event_detect(self, pin: int) -> None:
+        self._edges.pop(pin, None)
+        self._callbacks.pop(pin, None)
+
+    def cleanup(self, pin: int = None) -> None:
+        if pin is None:
+            self._levels.clear()
+            self._modes.clear()
+            self._edges.clear()
+            self._callbacks.clear()
+        else:
+            self._levels.pop(pin, None)
+            self._modes.pop(pin, None)
+            self.remove_event_detect(pin)
+
+    def set_input(self, pin: int, level: int) -> None:
+        """
+        @brief Drives a simulated input pin, e.g. to emulate a button.
+
+        Edge callbacks run on a separate thread, like RPi.GPIO's event thread.
+        """
+        previous = self._levels.get(pin, self.LOW)
+        current = self.HIGH if level else self.LOW
+        self._levels[pin] = current
+
+        edge = self._edges.get(pin)
+        if edge is None or previous == current:
+            return
+        if edge == self.BOTH or (edge == self.FALLING) == (current == self.LOW):
+            for callback in list(self._callbacks.get(pin, [])):
+                threading.Thread(target = callback, args = (pin,), daemon = True).start()
+
+
+try:
+    import RPi.GPIO as GPIO
+    SIMULATED = False
+except (ImportError, RuntimeError):
+    GPIO = SimulatedGPIO()
+    SIMULATED = True
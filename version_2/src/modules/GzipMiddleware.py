@@ -0,0 +1,80 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import gzip
+
+
+class GzipMiddleware:
+    """
+    @class GzipMiddleware
+    @brief WSGI middleware compressing text responses for clients that accept gzip.
+
+    Only responses with a known Content-Length are compressed, so streamed
+    responses (event streams, downloads written chunk by chunk) pass through
+    untouched and are never buffered. Responses without a body (HEAD, 1xx,
+    204, 304) pass through too: their Content-Length and validators describe
+    a body that is not sent.
+    """
+    COMPRESSIBLE = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+    ETAG_SUFFIX = "-gzip"
+    BODYLESS_STATUSES = (204, 304)
+
+    def __init__(self, app: Callable, min_size: int = 512, level: int = 5) -> None:
+        """
+        @brief Wraps a WSGI application.
+        @param app WSGI application (e.g. Flask's app.wsgi_app).
+        @param min_size Bodies smaller than this many bytes are sent as they are.
+        @param level zlib compression level; 5 keeps the CPU cost low on a Pi.
+        """
+        self._app = app
+        self._min_size = min_size
+        self._level = level
+
+
+    def _compressible(self, status: str, headers: List[Tuple[str, str]]) -> bool:
+        code = int(status.split(" ", 1)[0])
+        if code < 200 or code in self.BODYLESS_STATUSES:
+            return False
+        values: Dict[str, str] = {name.lower(): value for name, value in headers}
+        if "content-encoding" in values or "content-length" not in values:
+            return False
+        if int(values["content-length"] or 0) < self._min_size:
+            return False
+        return values.get("content-type", "").startswith(self.COMPRESSIBLE)
+
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        if environ.get("REQUEST_METHOD") == "HEAD" or "gzip" not in environ.get("HTTP_ACCEPT_ENCODING", "").lower():
+            return self._app(environ, start_response)
+
+        captured: Dict[str, Any] = {}
+
+        def capture(status: str, headers: List[Tuple[str, str]], exc_info: Optional[tuple] = None):
+            if not self._compressible(status, headers):
+                return start_response(status, headers, exc_info) if exc_info else start_response(status, headers)
+            captured["status"] = status
+            captured["headers"] = headers
+            captured["exc_info"] = exc_info
+            return captured.setdefault("written", []).append
+
+        result = self._app(environ, capture)
+        if "status" not in captured:
+            return result
+
+        try:
+            body = b"".join(captured.get("written", [])) + b"".join(result)
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+
+        compressed = gzip.compress(body, self._level, mtime = 0)
+        headers = [(name, value) for name, value in captured["headers"] if name.lower() not in ("content-length", "vary", "etag")]
+        # A strong validator names one exact representation, so the gzip variant gets its own.
+        for name, value in captured["headers"]:
+            if name.lower() == "etag":
+                headers.append((name, value[:-1] + self.ETAG_SUFFIX + '"' if value.endswith('"') else value))
+        vary = [value for name, value in captured["headers"] if name.lower() == "vary"]
+        headers.append(("Vary", ", ".join(vary + ["Accept-Encoding"])))
+        headers.append(("Content-Encoding", "gzip"))
+        headers.append(("Content-Length", str(len(compressed))))
+        start_response(captured["status"], headers, captured["exc_info"])
+        return [compressed]
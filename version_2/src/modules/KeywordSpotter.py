@@ -0,0 +1,184 @@
+from typing import List, Optional, Sequence
+from collections import deque
+import wave
+
+import numpy as np
+
+
+class KeywordSpotter:
+    """
+    @class KeywordSpotter
+    @brief Lightweight template-matching keyword spotter for the wake word.
+
+    Audio is reduced to a few log band energies per frame and the most recent
+    window is compared against recorded wake-word templates using DTW.
+    """
+
+    def __init__(self, logger, rate: int, channels: int, templates: Sequence[str], threshold: float = 1.5,
+                 frame_ms: int = 32, bands: int = 12, energy_gate: float = 300.0) -> None:
+        """
+        @brief Initializes the spotter and loads the wake-word templates.
+        @param logger Logger instance for writing logs.
+        @param rate Sample rate of the incoming audio.
+        @param channels Number of interleaved channels of the incoming audio.
+        @param templates Paths of WAV recordings of the wake word.
+        @param threshold Maximum normalized DTW distance accepted as a detection.
+        @param frame_ms Analysis frame length in milliseconds.
+        @param bands Number of log band energies per frame.
+        @param energy_gate Minimum frame RMS for the window to be evaluated at all.
+        """
+        self._log = logger
+        self._rate = rate
+        self._channels = channels
+        self._threshold = threshold
+        self._bands = bands
+        self._energy_gate = energy_gate
+
+        self._frame_len = int(rate * frame_ms / 1000)
+        self._window = np.hanning(self._frame_len).astype(np.float32)
+        edges = np.linspace(1, self._frame_len // 2 + 1, bands + 1).astype(int)
+        self._band_edges = list(zip(edges[:-1], edges[1:]))
+
+        self._templates = self._load_templates(templates)
+        if not self._templates:
+            raise ValueError("No usable wake-word templates were found.")
+
+        history = int(max(len(t) for t in self._templates) * 1.25)
+        self._features: deque = deque(maxlen = history)
+        self._energies: deque = deque(maxlen = history)
+        self._pending = np.zeros(0, dtype = np.float32)
+
+
+    def _to_mono(self, pcm: bytes) -> np.ndarray:
+        """
+        @brief Converts interleaved 16-bit PCM into a mono float array.
+        @param pcm Raw audio bytes.
+        @return Mono samples.
+        """
+        samples = np.frombuffer(pcm, dtype = np.int16).astype(np.float32)
+        if self._channels > 1:
+            samples = samples[: len(samples) - len(samples) % self._channels]
+            samples = samples.reshape(-1, self._channels).mean(axis = 1)
+        return samples
+
+
+    def _frame_features(self, frame: np.ndarray) -> np.ndarray:
+        """
+        @brief Computes the log band energies of a single frame.
+        @param frame Mono samples of one analysis frame.
+        @return Feature vector with one value per band.
+        """
+        power = np.abs(np.fft.rfft(frame * self._window)) ** 2
+        return np.log(np.array([power[lo:hi].sum() for lo, hi in self._band_edges]) + 1e-6)
+
+
+    def _extract(self, samples: np.ndarray) -> tuple:
+        """
+        @brief Splits samples into frames and computes features and RMS for each.
+        @param samples Mono samples.
+        @return Tuple (features, energies, leftover samples).
+        """
+        count = len(samples) // self._frame_len
+        features, energies = [], []
+        for i in range(count):
+            frame = samples[i * self._frame_len:(i + 1) * self._frame_len]
+            features.append(self._frame_features(frame))
+            energies.append(float(np.sqrt(np.mean(frame * frame))))
+        return features, energies, samples[count * self._frame_len:]
+
+
+    def _normalize(self, features: np.ndarray) -> np.ndarray:
+        """
+        @brief Removes the per-band mean so matching is insensitive to gain.
+        """
+        return features - features.mean(axis = 0)
+
+
+    def _load_templates(self, paths: Sequence[str]) -> List[np.ndarray]:
+        """
+        @brief Loads and featurizes the wake-word template recordings.
+        @param paths WAV file paths.
+        @return List of normalized feature matrices.
+        """
+        templates = []
+        for path in paths:
+            try:
+                with wave.open(path, "rb") as wf:
+                    if wf.getframerate() != self._rate or wf.getsampwidth() != 2:
+                        self._log.write_log("Logs/audioTranscription.log", "WARNING", f"Skipping template {path}: expected 16-bit audio at {self._rate} Hz.")
+                        continue
+                    channels = wf.getnchannels()
+                    pcm = wf.readframes(wf.getnframes())
+
+                samples = np.frombuffer(pcm, dtype = np.int16).astype(np.float32)
+                if channels > 1:
+                    samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis = 1)
+
+                features, _, _ = self._extract(samples)
+                if len(features) >= 4:
+                    templates.append(self._normalize(np.array(features)))
+            except Exception as e:
+                self._log.write_log("Logs/audioTranscription.log", "ERROR", f"Failed to load template {path}: {e}")
+        return templates
+
+
+    def _dtw_distance(self, a: np.ndarray, b: np.ndarray) -> float:
+        """
+        @brief Dynamic time warping distance normalized by the path length bound.
+        @param a Feature matrix (frames x bands).
+        @param b Feature matrix (frames x bands).
+        @return Normalized alignment cost.
+        """
+        cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis = 2))
+        n, m = cost.shape
+        previous = np.full(m + 1, np.inf)
+        previous[0] = 0.0
+        for i in range(n):
+            current = np.full(m + 1, np.inf)
+            diagonal_or_up = np.minimum(previous[1:], previous[:-1])
+            row = cost[i]
+            for j in range(m):
+                current[j + 1] = row[j] + min(diagonal_or_up[j], current[j])
+            previous = current
+        return float(previous[m] / (n + m))
+
+
+    def push(self, pcm: bytes) -> None:
+        """
+        @brief Feeds a chunk of raw audio into the feature history.
+        @param pcm Interleaved 16-bit PCM bytes.
+        """
+        samples = np.concatenate((self._pending, self._to_mono(pcm)))
+        features, energies, self._pending = self._extract(samples)
+        self._features.extend(features)
+        self._energies.extend(energies)
+
+
+    def detect(self) -> Optional[float]:
+        """
+        @brief Evaluates the current window against every template.
+        @return Best distance if the wake word was detected, None otherwise.
+        """
+        if not self._energies or max(self._energies) < self._energy_gate:
+            return None
+
+        history = np.array(self._features)
+        best = None
+        for template in self._templates:
+            if len(history) < len(template):
+                continue
+            window = self._normalize(history[-len(template):])
+            distance = self._dtw_distance(window, template)
+            if best is None or distance < best:
+                best = distance
+
+        return best if best is not None and best <= self._threshold else None
+
+
+    def reset(self) -> None:
+        """
+        @brief Drops the feature history, e.g. after a detection.
+        """
+        self._features.clear()
+        self._energies.clear()
+        self._pending = np.zeros(0, dtype = np.float32)
@@ -1,16 +1,47 @@
-from typing import List, Dict, Any, Optional
-#import RPi.GPIO as GPIO
-import serial
+from modules.Gpio import GPIO
+from modules.RS485Protocol import PROTOCOL_RAW, BROADCAST, FrameParser, encode_frame
+from modules.LedEffects import AutoOff, Blink, FadeOut, LedEffectScheduler
+from modules.EventBroadcaster import events
+from modules.Metrics import registry
+from modules.Queue import Queue
+from modules.Tracer import trace_future, traced
+from concurrent.futures import Future
+from collections import deque
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import threading
 import time
 
 
+_FRAMES = registry.counter("echo_rs485_frames_total", "RS485 frames written, retransmissions included.")
+_RETRIES = registry.counter("echo_rs485_retries_total", "RS485 frames retransmitted after a missing acknowledgement.")
+_BYTES = registry.counter("echo_rs485_bytes_total", "Bytes written to the RS485 bus.")
+_FAILURES = registry.counter("echo_rs485_failed_transmissions_total", "RS485 transactions that failed.")
+
+
 class LedController:
     """
     @class LedController
     @brief Controls LEDs through RS-485 communication using a serial interface.
     """
 
-    def __init__(self, logger, port: str, baud_rate: int, timeout: float, rs_485_pin: int, data_size: int, led_quantity: int, box_quantity: int) -> None:
+    # One (R, G, B) bitmask per LED of a box, shared by every box.
+    LED_PATTERNS: Tuple[Tuple[int, int, int], ...] = tuple(
+        [(0b00000001 << i, 0b00000000, 0b00000000) for i in range(8)] +
+        [(0b00000000, 0b00000001 << i, 0b00000000) for i in range(8)] +
+        [(0b00000000, 0b00000000, 0b00000001 << i) for i in range(8)]
+    )
+
+    OFF_MASK = bytes(3)
+
+    # Bytes the UART hardware FIFO can still hold after flush() returns.
+    UART_FIFO_SIZE = 16
+    # Transactions waiting for the bus; callers block (backpressure) when it is full.
+    TX_QUEUE_SIZE = 64
+    # Start bit + 8 data bits + stop bit.
+    BITS_PER_CHARACTER = 10
+
+    def __init__(self, logger, port: str, baud_rate: int, timeout: float, rs_485_pin: int, data_size: int, led_quantity: int, box_quantity: int,
+                 protocol: int = PROTOCOL_RAW, ack: bool = False, window: int = 4, ack_timeout: Optional[float] = None, max_retries: int = 3) -> None:
 
         """
         @brief Initializes the LED controller with serial communication and configuration data.
@@ -22,132 +53,411 @@ class LedController:
         @param data_size Size of the data array used to turn off LEDs.
         @param leds_per_box Number of LEDs per box.
         @param box_count Number of boxes.
+        @param protocol Bus protocol version (0 raw frames, 1 framed with CRC-16, see RS485Protocol).
+        @param ack Wait for box acknowledgements (framed protocol only).
+        @param window Maximum number of unacknowledged frames in flight.
+        @param ack_timeout Seconds to wait for acknowledgements before retransmitting (default derived from the baud rate).
+        @param max_retries Retransmissions of a frame before the transmission fails.
         """
 
         self._log = logger
         self._log.write_log("Logs/RS485communication.log", "INFO", "Initializing LedController")
         try:
-            """
-            self.__serialConnection = serial.Serial(
+            # Imported here so modules that only reference LedController do not load pyserial.
+            import serial
+
+            self._serial = serial.Serial(
                 port = port,
-                baudrate = baud_rate, 
+                baudrate = baud_rate,
                 timeout = timeout
             )
-            """
             self._log.write_log("Logs/RS485communication.log", "INFO", "Serial connection established.")
         except Exception as e:
             self._log.write_log("Logs/RS485communication.log", "ERROR", f"Failed to establish serial connection: {e}")
             raise ConnectionError(f"Serial connection failed: {e}")
         
         self._pin = rs_485_pin
+        self._character_time = self.BITS_PER_CHARACTER / baud_rate
+
+        self._protocol = protocol
+        self._ack = ack and protocol != PROTOCOL_RAW
+        self._window = max(1, window)
+        self._max_retries = max_retries
+        self._ack_timeout = ack_timeout if ack_timeout is not None else self._default_ack_timeout()
+        self._parser = FrameParser()
+        self._seq = 0
+        if self._ack:
+            self._serial.timeout = self._ack_timeout / 4
         self._data_size = data_size
         self._leds_per_box = led_quantity
         self._box_count = box_quantity
 
-        self._clear_data = [0x00] * self._data_size
-        self._byte_buffer: List[bytes] = []
+        self._clear_data = bytes(self._data_size)
 
-        self._boxes = self._initialize_boxes()
+        self._frames = self._build_frame_table()
         self._log.write_log("Logs/RS485communication.log", "INFO", "Boxes initialized.")
 
+        # Last R/G/B state sent to each lit box; unknown until the first full clear.
+        # _submit_lock keeps transmissions in the order of the shadow updates; the tx worker
+        # never takes it, so a caller blocked on a full queue cannot stall the worker.
+        self._submit_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._shadow: Dict[int, bytes] = {}
+        self._shadow_valid = False
+
+        # Items are (messages, future); None stops the worker.
+        self._tx_queue = Queue(self.TX_QUEUE_SIZE, Queue.BLOCK)
+        self._tx_thread = threading.Thread(target = self._transmit_worker, name = "rs485-tx", daemon = True)
+
+        self._configure_gpio_pin()
+        self._tx_thread.start()
+        self._effects = LedEffectScheduler(self)
+        self._turn_off_leds()
+
 
-        #self._configure_gpio_pin()
-        #self._turn_off_leds()
-        
-        
 
-    """"
     def _configure_gpio_pin(self) -> None:
         try:
             GPIO.setmode(GPIO.BCM)
             GPIO.setwarnings(False)
             GPIO.setup(self._pin, GPIO.OUT)
-            self.__log.write_log("Logs/RS485communication.log", "INFO", f"Pin {self.__pin} configured as OUTPUT.")
+            self._log.write_log("Logs/RS485communication.log", "INFO", f"Pin {self._pin} configured as OUTPUT.")
 
         except Exception as e:
-            self.__log.write_log("Logs/RS485communication.log", "ERROR", f"Failed to configure pin {self.__pin}: {e}")
-    """
+            self._log.write_log("Logs/RS485communication.log", "ERROR", f"Failed to configure pin {self._pin}: {e}")
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        """
+        @brief Computes the box ID and the LED index inside the box for a position.
+        @param position 1-based position across all boxes.
+        @return Tuple (box_id, led_index).
+        """
+        return (position - 1) // self._leds_per_box + 1, (position - 1) % self._leds_per_box
+
+
+    def _build_frame_table(self) -> List[Optional[bytes]]:
+        """
+        @brief Builds the position -> frame lookup table once at start-up.
+        @return List indexed by position holding the [box_id, R, G, B] frame (index 0 unused).
+        @throws ValueError if the configuration cannot be represented by the LED patterns.
+        """
+        if not 0 < self._leds_per_box <= len(self.LED_PATTERNS):
+            raise ValueError(f"led_quantity must be between 1 and {len(self.LED_PATTERNS)}, got {self._leds_per_box}.")
+        if not 0 < self._box_count <= 0xFF:
+            raise ValueError(f"box_quantity must be between 1 and 255, got {self._box_count}.")
+
+        table: List[Optional[bytes]] = [None]
+        for box_id in range(1, self._box_count + 1):
+            for pattern in self.LED_PATTERNS[:self._leds_per_box]:
+                table.append(bytes((box_id,) + pattern))
+
+        for position in range(1, len(table)):
+            box_id, led = self._locate(position)
+            if table[position] != bytes((box_id,) + self.LED_PATTERNS[led]):
+                raise ValueError(f"Frame table mismatch at position {position}.")
+
+        return table
+
 
-    def _initialize_boxes(self) -> List[Dict[str, Any]]:
-        """
-        @brief Initializes data structures representing each LED box.
-        @return List of box dictionaries containing ID, position range and LED patterns.
-        """
-        boxes = []
-        for i in range(self._box_count):
-            box_id = i + 1
-            start_pos = (i * self._leds_per_box) + 1
-            end_pos = start_pos + self._leds_per_box
-            boxes.append({
-                "Id":box_id,
-                "Position": list(range(start_pos, end_pos)),
-                "all_leds": self._generate_led_patterns()
-            })
-        return boxes
-
-
-    def _generate_led_patterns(self) -> List[List[int]]:
-        """
-        @brief Generates bit-shifted RGB LED patterns.
-        @return List of [R, G, B] arrays for each bit position.
-        """
-        return [
-            [0b00000001 << i, 0b00000000, 0b00000000] for i in range(8)
-        ] + [
-            [0b00000000, 0b00000001 << i, 0b00000000] for i in range(8)
-        ] + [
-            [0b00000000, 0b00000000, 0b00000001 << i] for i in range(8)
-        ]
-    
-    
     def _set_transmitter(self, state: bool) -> None:
         """
         @brief Sets the transmitter state (RS-485 direction).
         @param state True for HIGH, False for LOW.
         """
-        try:
-            #GPIO.output(self.__pin, GPIO.HIGH if state else GPIO.LOW)
-            self._log.write_log("Logs/RS485communication.log", "INFO", f"Transmitter set to {'HIGH' if state else 'LOW'}.")
-        except ImportError:
-            self._log.write_log("Logs/RS485communication.log", "ERROR", "GPIO not available! Make sure you are running on a Raspberry Pi")
-            
-            
+        GPIO.output(self._pin, GPIO.HIGH if state else GPIO.LOW)
 
-    def cleanArray(self):
-        self.__byteList.clear()
 
+    def _turnaround_delay(self, frame_length: int) -> float:
+        """
+        @brief Time to keep the driver enabled after flush() so the last characters leave the UART.
+        @param frame_length Number of bytes written in the transaction.
+        @return Delay in seconds: the FIFO residue plus one character of guard time.
+        """
+        return (min(frame_length, self.UART_FIFO_SIZE) + 1) * self._character_time
 
-    def _turn_off_leds(self) -> None:
-        self._log.write_log("Logs/RS485communication.log", "INFO", "Turning off LEDs.")
-        self._set_transmitter(True)
-        self.__serialConnection.write(self.__clearLeds)
-        time.sleep(0.2)
-        self._set_transmitter(False)
-        
 
-    def _sendByte(self, position):
-        byte = self.__positionToBytes(position)
-        
-        self._turn_off_leds()
-        self._log.write_log("Logs/RS485communication.log", "INFO", f"Sending byte: {byte}")
+    def _default_ack_timeout(self) -> float:
+        """
+        @brief Time for a full window of acknowledgements at the configured baud rate plus box processing.
+        """
+        ack_length = len(encode_frame(BROADCAST, 0))
+        return self._window * (ack_length + 1) * self._character_time * 2 + 0.01
+
+
+    def _next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFF
+        return self._seq
+
+
+    def _encode(self, address: int, payload: bytes) -> bytes:
+        """
+        @brief Encodes one message in the configured protocol.
+        @param address Box ID, or BROADCAST for the clear pattern.
+        @param payload R/G/B masks (ignored for the raw clear pattern).
+        """
+        if self._protocol == PROTOCOL_RAW:
+            return self._clear_data if address == BROADCAST else bytes((address,)) + payload
+        return encode_frame(address, self._next_seq(), payload)
+
+
+    def _write_burst(self, data: bytes) -> int:
+        """
+        @brief Writes bytes in one driver-enable period and releases the line afterwards.
+        @return Number of bytes written.
+        """
         self._set_transmitter(True)
-        self.__serialConnection.write(byte)
-        time.sleep(1)
-        self._set_transmitter(False)
-        self._log.write_log("Logs/RS485communication.log", "INFO", "Byte sent successfully.")
-        
+        try:
+            self._serial.write(data)
+            self._serial.flush()
+            time.sleep(self._turnaround_delay(len(data)))
+        finally:
+            self._set_transmitter(False)
+        _BYTES.inc(len(data))
+        return len(data)
 
 
-    def __positionToBytes(self, value):
-        self._log.write_log("Logs/RS485communication.log", "INFO", f"Converting value: {value}")
-        for box in self.__boxes:
-            if value in box["Position"]:
-                if box["Id"] > 1:
-                    value -= (box["Id"]) * self.__ledQuantity
-                arrayBytes = bytes([box["Id"]] + box["all_leds"][value - 1])
-                self._log.write_log("Logs/RS485communication.log", "INFO", f"Conversion successful. Box ID: {box['Id']}")
-                return arrayBytes
+    def _await_acks(self, in_flight: Dict[Tuple[int, int], List]) -> None:
+        """
+        @brief Reads acknowledgements until every in-flight frame is acknowledged or the timeout expires.
+        @param in_flight Unacknowledged frames keyed by (address, seq); acknowledged entries are removed.
+        """
+        deadline = time.monotonic() + self._ack_timeout
+        while in_flight and time.monotonic() < deadline:
+            data = self._serial.read(max(1, self._serial.in_waiting))
+            for address, seq, _ in self._parser.feed(data):
+                in_flight.pop((address, seq), None)
 
-        self._log.write_log("Logs/RS485communication.log", "ERROR", "Conversion failed: value not found.")
-        return None
 
+    def _deliver_acknowledged(self, messages: List[Tuple[int, bytes]]) -> int:
+        """
+        @brief Sends messages with a sliding window, retransmitting only frames whose ACK timed out.
+
+        Up to `window` frames are written back to back; the line is then released
+        so the boxes can answer. Unacknowledged frames are resent with the next
+        burst, together with new frames that fit in the window.
+        @return Number of bytes written, retransmissions included.
+        @throws TimeoutError if a frame is not acknowledged after max_retries retransmissions.
+        """
+        pending = deque(messages)
+        in_flight: Dict[Tuple[int, int], List] = {}
+        written = 0
+
+        while pending or in_flight:
+            burst = []
+            for (address, seq), entry in in_flight.items():
+                entry[1] += 1
+                if entry[1] > self._max_retries:
+                    raise TimeoutError(f"No acknowledgement from box {address} (seq {seq}).")
+                self._log.write_log("Logs/RS485communication.log", "WARNING", f"Retransmitting to box {address} (seq {seq}, attempt {entry[1]}).")
+                burst.append(entry[0])
+                _RETRIES.inc()
+
+            while pending and len(in_flight) < self._window:
+                address, payload = pending.popleft()
+                seq = self._next_seq()
+                frame = encode_frame(address, seq, payload)
+                burst.append(frame)
+                if address != BROADCAST:
+                    in_flight[(address, seq)] = [frame, 0]
+
+            _FRAMES.inc(len(burst))
+            written += self._write_burst(b"".join(burst))
+            self._await_acks(in_flight)
+
+        return written
+
+
+    def _transmit_worker(self) -> None:
+        """
+        @brief Owns the bus: writes queued transactions back to back and resolves their futures.
+        """
+        while True:
+            item = self._tx_queue.get()
+            if item is None:
+                break
+
+            messages, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                if self._ack:
+                    written = self._deliver_acknowledged(messages)
+                else:
+                    _FRAMES.inc(len(messages))
+                    written = self._write_burst(b"".join(self._encode(address, payload) for address, payload in messages))
+                future.set_result(written)
+            except Exception as e:
+                _FAILURES.inc()
+                self._log.write_log("Logs/RS485communication.log", "ERROR", f"Transmission failed: {e}")
+                future.set_exception(e)
+
+
+    def _submit(self, messages: List[Tuple[int, bytes]]) -> Future:
+        """
+        @brief Queues messages to be delivered in a single bus transaction.
+        @param messages (address, payload) pairs; BROADCAST clears every box.
+        @return Future resolved with the number of bytes written.
+        """
+        future: Future = Future()
+        self._tx_queue.put((messages, future))
+        return future
+
+
+    def _on_transmit_done(self, future: Future) -> None:
+        """
+        @brief Forces a full resynchronization after a failed transmission.
+        """
+        if future.cancelled() or future.exception() is not None:
+            with self._state_lock:
+                self._shadow_valid = False
+
+
+    def _apply_state(self, target: Dict[int, bytes]) -> Future:
+        """
+        @brief Transmits only the boxes whose R/G/B state differs from the shadow copy.
+        @param target Desired R/G/B mask of every box that should be lit; other boxes go dark.
+        @return Completion future of the transmission (already resolved if nothing changed).
+        """
+        with self._submit_lock:
+            with self._state_lock:
+                if self._shadow_valid:
+                    changes = {box_id: mask for box_id, mask in target.items() if self._shadow.get(box_id) != mask}
+                    changes.update({box_id: self.OFF_MASK for box_id in self._shadow if box_id not in target})
+                    messages = sorted(changes.items())
+                else:
+                    messages = [(BROADCAST, self.OFF_MASK)] + sorted(target.items())
+                    self._shadow_valid = True
+
+                self._shadow = dict(target)
+
+            if not messages:
+                future: Future = Future()
+                future.set_result(0)
+                return future
+
+            # May block while the queue is full; the worker's _on_transmit_done only needs _state_lock.
+            future = self._submit(messages)
+            # Published in submission order; publish() never blocks on a client.
+            events.publish("leds", {"boxes": {box_id: list(mask) for box_id, mask in sorted(target.items())}})
+
+        future.add_done_callback(self._on_transmit_done)
+        return future
+
+
+    def _turn_off_leds(self) -> Future:
+        """
+        @brief Stops every effect and turns off the lit boxes (or every box, if their state is unknown).
+        @return Completion future of the transmission.
+        """
+        return self._effects.set_steady(())
+
+
+    def _aggregate_masks(self, positions: Iterable[int]) -> Dict[int, bytes]:
+        """
+        @brief Groups positions by box and ORs their R/G/B bitmasks.
+        @param positions 1-based positions across all boxes; invalid ones are skipped.
+        @return R/G/B mask of every box that has at least one lit position.
+        """
+        masks: Dict[int, List[int]] = {}
+        for position in positions:
+            frame = self._position_to_frame(position)
+            if frame is None:
+                continue
+            mask = masks.setdefault(frame[0], [0, 0, 0])
+            mask[0] |= frame[1]
+            mask[1] |= frame[2]
+            mask[2] |= frame[3]
+
+        return {box_id: bytes(mask) for box_id, mask in masks.items()}
+
+
+    def light_positions(self, positions: Iterable[int]) -> Optional[Future]:
+        """
+        @brief Lights exactly the given positions, sending at most one frame per changed box.
+
+        Running effects are cancelled.
+        @param positions 1-based positions across all boxes.
+        @return Completion future of the transmission, or None if no position was valid.
+        """
+        positions = [p for p in positions if self._position_to_frame(p) is not None]
+        if not positions:
+            return None
+
+        return self._effects.set_steady(positions)
+
+
+    def blink(self, position: int, hz: float = 2.0, duration: Optional[float] = None) -> Optional[Future]:
+        """
+        @brief Blinks a position, keeping the other lit positions as they are.
+        @param position 1-based position.
+        @param hz Blinks per second.
+        @param duration Seconds to blink before staying lit, or None to blink until the next command.
+        @return Completion future of the first bus update, or None for an invalid position.
+        """
+        if self._position_to_frame(position) is None:
+            return None
+        return self._effects.add(Blink(position, hz, duration))
+
+
+    def fade_out(self, position: int, duration: float = 1.0) -> Optional[Future]:
+        """
+        @brief Dims a position to off over `duration` seconds.
+        @return Completion future of the first bus update, or None for an invalid position.
+        """
+        if self._position_to_frame(position) is None:
+            return None
+        return self._effects.add(FadeOut(position, duration))
+
+
+    def auto_off(self, position: int, after: float) -> Optional[Future]:
+        """
+        @brief Lights a position and turns it off after `after` seconds.
+        @return Completion future of the first bus update, or None for an invalid position.
+        """
+        if self._position_to_frame(position) is None:
+            return None
+        return self._effects.add(AutoOff(position, after))
+
+
+    def cancel_effects(self, position: Optional[int] = None) -> Future:
+        """
+        @brief Stops the effect on a position (or all effects); affected positions stay lit.
+        """
+        return self._effects.cancel(position)
+
+
+    @traced("led.send")
+    def _sendByte(self, position: int) -> Optional[Future]:
+        """
+        @brief Queues the frames that clear the bus and light a single position.
+        @param position 1-based position across all boxes.
+        @return Completion future of the transmission, or None for an invalid position.
+        """
+        future = self.light_positions((position,))
+        trace_future(future, "led.transmit")
+        return future
+
+
+    def close(self) -> None:
+        """
+        @brief Drains the transmit queue, stops the worker and releases the port and pin.
+        """
+        self._effects.stop()
+        self._tx_queue.put(None)
+        self._tx_thread.join()
+        self._serial.close()
+        GPIO.cleanup(self._pin)
+
+
+    def _position_to_frame(self, position: int) -> Optional[bytes]:
+        """
+        @brief Looks up the frame that lights a single position.
+        @param position 1-based position across all boxes.
+        @return Preallocated [box_id, R, G, B] frame, or None if the position is out of range.
+        """
+        if 0 < position < len(self._frames):
+            return self._frames[position]
+
+        self._log.write_log("Logs/RS485communication.log", "ERROR", f"Conversion failed: position {position} not found.")
+        return None
@@ -0,0 +1,266 @@
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+import itertools
+import threading
+import time
+
+
+class LedEffect:
+    """
+    @class LedEffect
+    @brief Base class of a timed per-position effect.
+
+    step(t) is called with the time the effect was due; it updates `on` and
+    returns the next due time (always later than t), or None once finished.
+    """
+    __slots__ = ("position", "on", "cancelled", "keep_lit")
+
+    def __init__(self, position: int, on: bool = True) -> None:
+        self.position = position
+        self.on = on
+        self.cancelled = False
+        # Whether the position stays lit (steady) after the effect finishes.
+        self.keep_lit = True
+
+    def start(self, now: float) -> Optional[float]:
+        return now
+
+    def step(self, now: float) -> Optional[float]:
+        return None
+
+
+class Blink(LedEffect):
+    """
+    @class Blink
+    @brief Toggles a position at `hz` blinks per second, optionally for a limited time.
+    """
+    __slots__ = ("_half_period", "_ends_at", "_duration", "_next")
+
+    def __init__(self, position: int, hz: float, duration: Optional[float] = None) -> None:
+        super().__init__(position)
+        self._half_period = 0.5 / hz
+        self._duration = duration
+        self._ends_at = None
+        self._next = 0.0
+
+    def start(self, now: float) -> Optional[float]:
+        self._ends_at = now + self._duration if self._duration else None
+        self._next = now + self._half_period
+        return self._next
+
+    def step(self, now: float) -> Optional[float]:
+        if self._ends_at is not None and now >= self._ends_at:
+            return None
+        self.on = not self.on
+        # Stay on the original grid so a late tick does not drift the phase.
+        while self._next <= now:
+            self._next += self._half_period
+        return self._next
+
+
+class AutoOff(LedEffect):
+    """
+    @class AutoOff
+    @brief Keeps a position lit and turns it off after `after` seconds.
+    """
+    __slots__ = ("_after",)
+
+    def __init__(self, position: int, after: float) -> None:
+        super().__init__(position)
+        self._after = after
+        self.keep_lit = False
+
+    def start(self, now: float) -> Optional[float]:
+        return now + self._after
+
+
+class FadeOut(LedEffect):
+    """
+    @class FadeOut
+    @brief Dims a position to off over `duration` seconds with software PWM.
+
+    The LEDs are on/off only, so the duty cycle of a `pwm_hz` square wave is
+    lowered linearly from 100 % to 0 %. Every edge is a bus transaction (and an
+    SSE event), so the rate is kept low: the fade reads as a slowing flicker.
+    """
+    __slots__ = ("_period", "_duration", "_started", "_period_start")
+
+    def __init__(self, position: int, duration: float, pwm_hz: float = 5.0) -> None:
+        super().__init__(position)
+        self._period = 1.0 / pwm_hz
+        self._duration = duration
+        self._started = 0.0
+        self._period_start = 0.0
+        self.keep_lit = False
+
+    def start(self, now: float) -> Optional[float]:
+        self._started = self._period_start = now
+        return now + self._period
+
+    def step(self, now: float) -> Optional[float]:
+        elapsed = now - self._started
+        if elapsed >= self._duration:
+            return None
+
+        if self.on:
+            self.on = False
+            return self._period_start + self._period
+
+        while self._period_start + self._period <= now:
+            self._period_start += self._period
+        self.on = True
+        return self._period_start + self._period * (1.0 - elapsed / self._duration)
+
+
+class LedEffectScheduler:
+    """
+    @class LedEffectScheduler
+    @brief Runs per-position LED effects on one timer thread.
+
+    Timers live in a min-heap. All timers due within one tick are processed
+    together and the resulting LED state is sent as a single differential update,
+    so concurrent effects cost at most one frame per changed box per tick.
+    """
+
+    def __init__(self, controller, tick: float = 0.01) -> None:
+        """
+        @brief Initializes the scheduler and starts its thread.
+        @param controller LedController used to render the state.
+        @param tick Coalescing window in seconds: timers due within it fire together.
+        """
+        self._controller = controller
+        self._tick = tick
+
+        self._condition = threading.Condition()
+        # Held from reading the state to queueing its update, so updates reach the bus in order.
+        self._render_lock = threading.Lock()
+        self._heap: List[Tuple[float, int, LedEffect]] = []
+        self._counter = itertools.count()
+        self._steady: Set[int] = set()
+        self._effects: Dict[int, LedEffect] = {}
+        self._running = True
+
+        self._thread = threading.Thread(target = self._run, name = "led-effects", daemon = True)
+        self._thread.start()
+
+
+    def _visible_positions(self) -> Set[int]:
+        """
+        @brief Steady positions overridden by the current on/off state of their effects.
+        """
+        visible = self._steady - self._effects.keys()
+        visible.update(position for position, effect in self._effects.items() if effect.on)
+        return visible
+
+
+    def _render(self) -> Future:
+        """
+        @brief Sends the current state. Called without the condition: queueing may block on a full bus queue.
+        """
+        with self._render_lock:
+            with self._condition:
+                target = self._controller._aggregate_masks(self._visible_positions())
+            return self._controller._apply_state(target)
+
+
+    def _schedule(self, due: float, effect: LedEffect) -> None:
+        heapq.heappush(self._heap, (due, next(self._counter), effect))
+
+
+    def set_steady(self, positions: Iterable[int]) -> Future:
+        """
+        @brief Replaces the lit positions and cancels every running effect.
+        @param positions Positions to light.
+        @return Completion future of the resulting bus update.
+        """
+        with self._condition:
+            for effect in self._effects.values():
+                effect.cancelled = True
+            self._effects.clear()
+            self._steady = set(positions)
+        return self._render()
+
+
+    def add(self, effect: LedEffect) -> Future:
+        """
+        @brief Starts an effect, replacing any effect already running on its position.
+        @param effect Effect to run.
+        @return Completion future of the resulting bus update.
+        """
+        with self._condition:
+            previous = self._effects.get(effect.position)
+            if previous is not None:
+                previous.cancelled = True
+
+            self._effects[effect.position] = effect
+            self._steady.add(effect.position)
+            due = effect.start(time.monotonic())
+            if due is not None:
+                self._schedule(due, effect)
+            self._condition.notify()
+        return self._render()
+
+
+    def cancel(self, position: Optional[int] = None) -> Future:
+        """
+        @brief Stops the effect on a position (or every effect), leaving the positions lit.
+        """
+        with self._condition:
+            positions = [position] if position is not None else list(self._effects)
+            for p in positions:
+                effect = self._effects.pop(p, None)
+                if effect is not None:
+                    effect.cancelled = True
+        return self._render()
+
+
+    def _finish(self, effect: LedEffect) -> None:
+        del self._effects[effect.position]
+        if not effect.keep_lit:
+            self._steady.discard(effect.position)
+
+
+    def _run(self) -> None:
+        with self._condition:
+            while self._running:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                now = time.monotonic()
+                delay = self._heap[0][0] - now
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                changed = False
+                horizon = now + self._tick
+                while self._heap and self._heap[0][0] <= horizon:
+                    due, _, effect = heapq.heappop(self._heap)
+                    if effect.cancelled:
+                        continue
+                    # Step at the scheduled time so every step moves the timer strictly forward.
+                    due = effect.step(max(due, now - self._tick))
+                    if due is None:
+                        self._finish(effect)
+                    else:
+                        self._schedule(due, effect)
+                    changed = True
+
+                if changed:
+                    self._condition.release()
+                    try:
+                        self._render()
+                    finally:
+                        self._condition.acquire()
+
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
@@ -1,8 +1,13 @@
 import os
+import atexit
+import threading
 from enum import Enum
 from datetime import datetime
 from colorama import init, Fore
-from typing import Union
+from typing import Dict, List, Union
+from queue import Full
+from modules.Queue import Queue
+from modules.Metrics import registry
 
 
 init(autoreset=True)
@@ -23,12 +28,18 @@ class Logger:
     @brief Provides structured logging to categorized log files.
 
     Responsible for writing timestamped messages to log files related to different system components or concerns.
+    write_log() only formats and queues the entry; a writer thread appends the
+    queued entries in batches, so callers never wait on disk I/O.
     """
-    
-    def __init__(self, file_manager):
+    QUEUE_SIZE = 4096
+    BATCH_SIZE = 256
+
+    def __init__(self, file_manager, queue_size: int = QUEUE_SIZE, overflow: str = Queue.DROP_NEWEST):
         """
         @brief Initializes the Logger with a FileManager instance and prepares log files.
         @param file_manager FileManager object for file operations.
+        @param queue_size Maximum number of entries waiting to be written.
+        @param overflow Queue overflow policy when the writer falls behind (see Queue.POLICIES).
         """
         self._file_manager  = file_manager
         self._log_directory = "Logs"
@@ -46,6 +57,20 @@ class Logger:
         self._lan = None
         self._initialize_logs()
 
+        # Held by the writer while appending, and by rotate_logs() while renaming files.
+        self._io_lock = threading.Lock()
+        self._queue = Queue(queue_size, overflow)
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._writer = threading.Thread(target = self._write_entries, name = "log-writer", daemon = True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+        registry.function("echo_log_queue_depth", "Log entries waiting for the writer thread.",
+                          lambda: self._queue.stats()["depth"])
+        registry.function("echo_log_dropped_total", "Log entries dropped because the queue was full.",
+                          lambda: self._queue.stats()["dropped"], kind = "counter")
+
     def set_lan(self, lan):
         """
         @brief Sets the LAN instance for the Logger.
@@ -104,6 +129,80 @@ class Logger:
                 raise ValueError(f"Invalid log level: {level}. Use one of {', '.join([e.value for e in LogLevel])}.")
             
         formatted_message = self._format_log_entry(level, message)
-        self._file_manager.write_file(file_path, formatted_message)
+        with self._idle:
+            self._pending += 1
+        # An entry evicted or refused by the overflow policy will never reach the writer.
+        try:
+            dropped = self._queue.put((file_path, formatted_message))
+        except Full:
+            dropped = 1
+        if dropped:
+            self._entries_done(dropped)
+
+
+    def _entries_done(self, count: int) -> None:
+        with self._idle:
+            self._pending -= count
+            if not self._pending:
+                self._idle.notify_all()
+
+
+    def _write_entries(self) -> None:
+        """
+        @brief Writer thread: appends queued entries, one write per log file per batch.
+        """
+        while True:
+            entries = self._queue.get_many(self.BATCH_SIZE)
+
+            batches: Dict[str, List[str]] = {}
+            for file_path, formatted_message in entries:
+                batches.setdefault(file_path, []).append(formatted_message)
+
+            with self._io_lock:
+                for file_path, messages in batches.items():
+                    try:
+                        self._file_manager.write_file(file_path, "".join(messages))
+                    except Exception as e:
+                        print(Fore.RED + f"Failed to write {file_path}: {e}")
+
+            self._entries_done(len(entries))
+
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        @brief Waits until every queued entry has been written.
+        @param timeout Maximum seconds to wait.
+        @return True if the queue was drained in time.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+
+    def rotate_logs(self, max_bytes: int = 1024 * 1024, keep: int = 5) -> None:
+        """
+        @brief Rotates every log file larger than max_bytes: x.log becomes x.log.1, x.log.1 becomes x.log.2, ...
+        @param max_bytes Size above which a file is rotated.
+        @param keep Number of rotated copies kept per file.
+        """
+        directory = self._file_manager._resolve_path(self._log_directory)
+        with self._io_lock:
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if not name.endswith(".log") or os.path.getsize(path) <= max_bytes:
+                    continue
+
+                for index in range(keep - 1, 0, -1):
+                    older = f"{path}.{index}"
+                    if os.path.exists(older):
+                        os.replace(older, f"{path}.{index + 1}")
+                os.replace(path, f"{path}.1")
+                self._file_manager.create_file(path)
+
+
+    def queue_stats(self) -> Dict[str, int]:
+        """
+        @brief Depth, high-water mark and drop counters of the entry queue.
+        """
+        return self._queue.stats()
     
     
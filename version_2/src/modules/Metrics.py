@@ -0,0 +1,355 @@
+"""
+@file Metrics.py
+@brief Counters and histograms exported in the Prometheus text exposition format.
+
+Hot paths (RS485 transmitter, recognition callbacks, database queries, web
+threads) update metrics without taking a lock: every thread accumulates into
+its own slot, found through a threading.local, and only the scrape walks the
+slots and adds them up. The lock is taken once per thread and metric, when
+the slot is created, and by the scrape. Slots of finished threads are folded
+into a retired total so short-lived request threads do not pile up.
+"""
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+
+# Seconds; covers sub-millisecond queries up to multi-second recognition.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shards:
+    """
+    @class _Shards
+    @brief A vector of values summed over one slot per thread.
+
+    Only the owning thread writes a slot, so increments need no lock; a scrape
+    running at the same time may see a histogram's count and sum one
+    observation apart, which the exposition format tolerates.
+    """
+    __slots__ = ("_size", "_local", "_lock", "_live", "_retired")
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired = [0.0] * size
+
+
+    def slot(self) -> List[float]:
+        """
+        @brief The calling thread's slot, created on first use.
+        """
+        try:
+            return self._local.slot
+        except AttributeError:
+            slot = [0.0] * self._size
+            self._local.slot = slot
+            with self._lock:
+                self._live.append((threading.current_thread(), slot))
+            return slot
+
+
+    def totals(self) -> List[float]:
+        """
+        @brief Sums every slot; slots of finished threads are merged into the retired total.
+        """
+        with self._lock:
+            totals = list(self._retired)
+            live = []
+            for thread, slot in self._live:
+                values = list(slot)
+                for i, value in enumerate(values):
+                    totals[i] += value
+                if thread.is_alive():
+                    live.append((thread, slot))
+                else:
+                    for i, value in enumerate(values):
+                        self._retired[i] += value
+            self._live = live
+        return totals
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self) -> None:
+        self._shards = _Shards(1)
+
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.slot()[0] += amount
+
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_shards")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._bounds = bounds
+        # One slot per bucket (the last is +Inf), then the sum of the observations.
+        self._shards = _Shards(len(bounds) + 2)
+
+
+    def observe(self, value: float) -> None:
+        slot = self._shards.slot()
+        slot[bisect_left(self._bounds, value)] += 1
+        slot[-1] += value
+
+
+    def time(self) -> "_Timer":
+        """
+        @brief Context manager observing the duration of its body in seconds.
+        """
+        return _Timer(self)
+
+
+    def snapshot(self) -> Tuple[List[float], float]:
+        """
+        @return (per-bucket counts, not cumulative, the last one for +Inf; sum).
+        """
+        totals = self._shards.totals()
+        return totals[:-1], totals[-1]
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """
+    @class _Metric
+    @brief Common part of a metric family: name, help text and labelled children.
+    """
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+
+    def _new_child(self):
+        raise NotImplementedError
+
+
+    def labels(self, *values) -> object:
+        """
+        @brief The child for one combination of label values (created on first use).
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+
+    def expose(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(_Metric):
+    """
+    @class Counter
+    @brief Monotonic count; call inc() directly when the counter has no labels.
+    """
+    TYPE = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        for values, child in self._items():
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_format_value(child.value())}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    @class Histogram
+    @brief Distribution of observed values over fixed buckets.
+    """
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        super().__init__(name, documentation, labelnames)
+
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+
+    def timed(self, *values) -> Callable[[Callable], Callable]:
+        """
+        @brief Decorator observing the duration of every call under the given label values.
+        """
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.labels(*values).time():
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        for values, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {_format_value(cumulative)}")
+            label_text = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cumulative)}")
+        return lines
+
+
+class FunctionMetric(_Metric):
+    """
+    @class FunctionMetric
+    @brief Value read from a callback at scrape time (queue depths, counts kept elsewhere).
+    """
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], float], kind: str = "gauge") -> None:
+        self.TYPE = kind
+        self._func = func
+        super().__init__(name, documentation)
+
+
+    def _new_child(self) -> None:
+        return None
+
+
+    def expose(self) -> List[str]:
+        try:
+            value = float(self._func())
+        except Exception:
+            return []
+        return super().expose() + [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    """
+    @class Registry
+    @brief The set of metrics served on /metrics.
+    """
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+
+    def _register(self, metric: _Metric, replace: bool = False) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not replace:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        @brief Returns the counter with this name, creating it if needed.
+        """
+        return self._register(Counter(name, documentation, labelnames))
+
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        @brief Returns the histogram with this name, creating it if needed.
+        """
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+
+    def function(self, name: str, documentation: str, func: Callable[[], float], kind: str = "gauge") -> FunctionMetric:
+        """
+        @brief Registers a value computed at scrape time, replacing an earlier one with the same name.
+        @param kind "gauge", or "counter" for monotonic totals kept by the owner.
+        """
+        return self._register(FunctionMetric(name, documentation, func, kind), replace = True)
+
+
+    def expose(self) -> str:
+        """
+        @brief Every metric in the text exposition format.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key = lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by the instrumented modules.
+registry = Registry()
@@ -1,27 +1,62 @@
 from modules.FileManager import FileManager
-import pyaudio
+from modules.Recognizers import create_recognizer
+from modules.Tracer import traced
+from typing import TYPE_CHECKING, List, Optional
 import wave
-import speech_recognition as sr
+
+# numpy is imported on first use: loading it takes a large share of start-up on a Pi.
+if TYPE_CHECKING:
+    import numpy as np
+
+
+SAMPLE_WIDTH = 2  # bytes per sample, matches pyaudio.paInt16
+
+
+def trim_silence(samples: "np.ndarray", rate: int, channels: int, silence_level: float) -> "np.ndarray":
+    """
+    @brief Cuts leading and trailing silence from 16-bit samples, keeping 200 ms around the speech.
+    @return A view of the voiced part, or `samples` itself if nothing could be trimmed.
+    """
+    import numpy as np
+
+    step = max(1, rate // 100) * channels  # 10 ms blocks
+    blocks = len(samples) // step
+    if blocks == 0:
+        return samples
+
+    levels = np.sqrt(np.mean(samples[: blocks * step].astype(np.float32).reshape(blocks, step) ** 2, axis = 1))
+    voiced = np.nonzero(levels >= silence_level)[0]
+    if len(voiced) == 0:
+        return samples
+
+    margin = 20  # keep 200 ms around the speech
+    start = max(0, voiced[0] - margin) * step
+    end = min(blocks, voiced[-1] + 1 + margin) * step
+    return samples[start:end]
+
 
 class MicroPhone:
 
-    def __init__(self, logger, filemanager, audio_path, audio_file, channels, rate, chunk, record_time, language):
+    def __init__(self, logger, filemanager, audio_path, audio_file, channels, rate, chunk, record_time, language,
+                 recognizer = "google", silence_level = 300.0):
 
         self.__log = logger
         self.__file = filemanager
 
         self.__audioFile = self.__prepareAudioFile(audio_path, audio_file)
-        
+
         self.__channels = channels
         self.__rate = rate
         self.__chunk = chunk
         self.__recordTime = record_time
-        self.__format = pyaudio.paInt16
         self.__language = language
+        self.__silenceLevel = silence_level
+
+        self.__recognizer = create_recognizer(recognizer, language) if isinstance(recognizer, str) else recognizer
+
+
+
 
-        
-        
-    
     def __prepareAudioFile(self, audio_path, audio_file):
         if not self.__file.dir_exists(audio_path):
             self.__file.create_dir(audio_path)
@@ -32,13 +67,15 @@ class MicroPhone:
 
         return audio_file_with_extension
 
-        
-        
+
+
     def __setupAudioInterface(self):
+        import pyaudio
+
         audioInterface = pyaudio.PyAudio()
 
         stream = audioInterface.open(
-            format = self.__format,
+            format = pyaudio.paInt16,
             channels = self.__channels,
             rate = self.__rate,
             input = True,
@@ -47,13 +84,48 @@ class MicroPhone:
         return audioInterface, stream
 
 
-    def recordAudio(self):
+    @property
+    def rate(self) -> int:
+        return self.__rate
+
+
+    @property
+    def chunk(self) -> int:
+        return self.__chunk
+
+
+    @property
+    def channels(self) -> int:
+        return self.__channels
+
+
+    @property
+    def recognizer(self):
+        return self.__recognizer
+
+
+    @property
+    def silence_level(self) -> float:
+        return self.__silenceLevel
+
+
+    def openInputStream(self):
+        """
+        @brief Opens an input stream with the configured format for continuous listening.
+        @return Tuple (audioInterface, stream); the caller must close both.
+        """
+        return self.__setupAudioInterface()
+
+
+    @traced("microphone.record")
+    def recordAudio(self) -> List[bytes]:
         """
         FORMAT = pyaudio.paInt16
         CHANNELS = 1
         RATE = 44100
         CHUNK = 4096
-        
+
+        @return The recorded chunks (also saved to the audio file); empty on failure.
         """
         frames = []
 
@@ -64,51 +136,85 @@ class MicroPhone:
                 data = stream.read(self.__chunk, exception_on_overflow = False)
                 frames.append(data)
 
-            self.__saveAudioFile(frames, audioInterface)
+            self.__saveAudioFile(frames)
 
             stream.stop_stream()
             stream.close()
             audioInterface.terminate()
 
         except Exception as e:
-            self.__log.writeLog("", "ERROR", f"Error during recording: {e}")
+            self.__log.write_log("./Logs/errorEvents.log", "ERROR", f"Error during recording: {e}")
+
+        return frames
 
 
-    def __saveAudioFile(self, frames, audioInterface):
+    def __saveAudioFile(self, frames):
         try:
 
-            with wave.open(self.__audioFile,"wb") as wf:
+            with wave.open(self.__file._resolve_path(self.__audioFile),"wb") as wf:
                 wf.setnchannels(self.__channels)
-                wf.setsampwidth(audioInterface.get_sample_size(self.__format))
+                wf.setsampwidth(SAMPLE_WIDTH)
                 wf.setframerate(self.__rate)
                 wf.writeframes(b"".join(frames))
-        
+
         except Exception as e:
-            self.__log.writeLog("", "", "")
+            self.__log.write_log("./Logs/errorEvents.log", "ERROR", f"Error saving audio file: {e}")
 
 
-    def recognizeAudio(self):
-        if not self.__file.fileExists(self.__audioFile):
-            self.__log.writeLog("./Logs/errorEvents.log", "ERROR", "Audio file not found.")
-            return None
+    @traced("microphone.preprocess")
+    def preprocess(self, frames: List[bytes]) -> bytes:
+        """
+        @brief Joins recorded chunks and trims leading and trailing silence.
+        @param frames Raw 16-bit PCM chunks as read from the stream.
+        @return PCM bytes handed to the recognizer.
+        """
+        import numpy as np
+
+        pcm = b"".join(frames)
+        samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % SAMPLE_WIDTH], dtype = np.int16)
+        trimmed = trim_silence(samples, self.__rate, self.__channels, self.__silenceLevel)
+        return pcm if trimmed is samples else trimmed.tobytes()
 
 
+    @traced("microphone.transcribe")
+    def transcribe(self, pcm: bytes, source: Optional[str] = None) -> Optional[str]:
+        """
+        @brief Runs the configured recognition backend on preprocessed audio.
+        @param pcm PCM bytes in the configured rate and channel layout.
+        @param source Optional name of the recording, used by offline backends.
+        @return Recognized command in lower case, or None.
+        """
         try:
-            recognizer = sr.Reconizer()
-            with sr.AudioFile(self.audioFile) as source:
-                audio = recognizer.record(source)
-
-                if audio.frame_data:
-                    command = recognizer.recognize_google(audio, self.__language).lower()
-                    return command
-                
-                return None
-            
-        except sr.UnknownValueError:
-            self.logger.writeLog("./Logs/errorEvents.log", "ERROR", "Could not understand the audio.")
+            command = self.__recognizer.recognize(pcm, self.__rate, SAMPLE_WIDTH, self.__channels, source)
+            if command is None:
+                self.__log.write_log("./Logs/errorEvents.log", "ERROR", "Could not understand the audio.")
+            return command
+        except Exception as e:
+            self.__log.write_log("./Logs/errorEvents.log", "ERROR", f"Error recognizing the audio: {e}")
+            return None
+
+
+    @traced("microphone.recognize")
+    def recognizeAudio(self):
+        if not self.__file.file_exists(self.__audioFile):
+            self.__log.write_log("./Logs/errorEvents.log", "ERROR", "Audio file not found.")
             return None
+
+        try:
+            with wave.open(self.__file._resolve_path(self.__audioFile), "rb") as wf:
+                pcm = wf.readframes(wf.getnframes())
         except Exception as e:
-            self.logger.writeLog("./Logs/errorEvents.log", "ERROR", f"Error recognizing the audio: {e}")
+            self.__log.write_log("./Logs/errorEvents.log", "ERROR", f"Error reading the audio: {e}")
             return None
 
-            
+        return self.transcribe(self.preprocess([pcm]))
+
+
+    def recognizeFrames(self, frames):
+        """
+        @brief Saves already captured chunk frames and runs recognition on them.
+        @param frames List of raw audio chunks, e.g. from the wake-word listener.
+        @return Recognized command in lower case, or None.
+        """
+        self.__saveAudioFile(frames)
+        return self.transcribe(self.preprocess(frames))
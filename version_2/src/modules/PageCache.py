@@ -0,0 +1,108 @@
+from modules.Metrics import registry
+
+from collections import OrderedDict
+from typing import Hashable, Optional
+import gzip
+import threading
+
+
+_LOOKUPS = registry.counter("echo_page_cache_lookups_total", "Rendered page cache lookups.", ("result",))
+_HITS = _LOOKUPS.labels("hit")
+_MISSES = _LOOKUPS.labels("miss")
+
+
+class CachedPage:
+    """
+    @class CachedPage
+    @brief Rendered bytes of one page, plus their gzip encoding when worth sending.
+    """
+    __slots__ = ("body", "gzipped", "size")
+
+    def __init__(self, body: bytes, gzipped: Optional[bytes]) -> None:
+        self.body = body
+        self.gzipped = gzipped
+        self.size = len(body) + (len(gzipped) if gzipped is not None else 0)
+
+
+class PageCache:
+    """
+    @class PageCache
+    @brief LRU cache of rendered pages bounded by a byte budget.
+
+    Entries belong to one catalog generation: a lookup with a newer generation
+    (or an explicit invalidate() after a write) empties the cache, so a page is
+    never served from data older than the catalog.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024 * 1024, compress: bool = True, min_size: int = 512, level: int = 9) -> None:
+        """
+        @brief Initializes the cache.
+        @param max_bytes Budget for the stored bytes (plain and gzip); least recently used pages are evicted.
+        @param compress Also store a gzip encoding of each page.
+        @param min_size Pages smaller than this many bytes are not compressed.
+        @param level zlib level; pages are compressed once per catalog change, so the best ratio is affordable.
+        """
+        self._max_bytes = max_bytes
+        self._compress = compress
+        self._min_size = min_size
+        self._level = level
+        self._lock = threading.Lock()
+        self._pages: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        self._bytes = 0
+        self._generation: Optional[int] = None
+
+        registry.function("echo_page_cache_bytes", "Bytes held by the rendered page cache.", lambda: self._bytes)
+
+
+    def get(self, generation: int, key: Hashable) -> Optional[CachedPage]:
+        """
+        @brief Looks up a page rendered for this catalog generation.
+        @return The cached page, or None.
+        """
+        with self._lock:
+            if generation != self._generation:
+                self._clear(generation)
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+        (_HITS if page is not None else _MISSES).inc()
+        return page
+
+
+    def put(self, generation: int, key: Hashable, body: bytes) -> CachedPage:
+        """
+        @brief Stores a page rendered from this catalog generation.
+        @return The cached page (returned but not stored when it exceeds the budget or the generation is stale).
+        """
+        gzipped = gzip.compress(body, self._level, mtime = 0) if self._compress and len(body) >= self._min_size else None
+        page = CachedPage(body, gzipped)
+        if page.size > self._max_bytes:
+            return page
+
+        with self._lock:
+            if generation != self._generation:
+                # Rendered before a write that has since emptied the cache.
+                return page
+            previous = self._pages.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._pages[key] = page
+            self._bytes += page.size
+            while self._bytes > self._max_bytes:
+                _, evicted = self._pages.popitem(last = False)
+                self._bytes -= evicted.size
+        return page
+
+
+    def invalidate(self) -> None:
+        """
+        @brief Drops every page; called after the catalog is written.
+        """
+        with self._lock:
+            self._clear(None)
+
+
+    def _clear(self, generation: Optional[int]) -> None:
+        self._pages.clear()
+        self._bytes = 0
+        self._generation = generation
@@ -0,0 +1,220 @@
+"""
+@file Profiler.py
+@brief On-demand profiling of the running service, across all threads.
+
+A sampler thread reads every thread's stack with sys._current_frames() at a
+fixed interval for a number of seconds. The samples are returned as
+collapsed stacks (flamegraph.pl, speedscope) or as a pstats file built from
+them; cProfile itself only hooks the thread that enables it, so it would miss
+the voice loop, the RS485 transmitter and the web threads. Optionally,
+tracemalloc records the allocations made during the same window.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import io
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+class ProfileResult:
+    """
+    @class ProfileResult
+    @brief Stack samples of one profiling run and the optional allocation snapshot.
+    """
+
+    def __init__(self, samples: Counter, weights: Dict[Tuple, float], duration: float, interval: float,
+                 allocations: Optional[List[Dict[str, Any]]]) -> None:
+        """
+        @param samples Sample count per (thread name, root-first tuple of code objects).
+        @param weights Seconds attributed to each of those stacks.
+        @param duration Wall time the sampler ran.
+        @param interval Requested sampling interval.
+        @param allocations Top allocation sites, or None if not requested.
+        """
+        self.samples = samples
+        self.weights = weights
+        self.duration = duration
+        self.interval = interval
+        self.allocations = allocations
+
+
+    @staticmethod
+    def _label(code) -> str:
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+    def collapsed(self) -> str:
+        """
+        @brief One line per distinct stack: "thread;outer;...;inner count".
+        """
+        lines = []
+        for (thread, stack), count in self.samples.most_common():
+            frames = [thread.replace(";", "_").replace(" ", "_")] + [self._label(code).replace(";", "_") for code in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+    def pstats(self) -> bytes:
+        """
+        @brief The samples in the marshal format read by pstats.Stats (and snakeviz).
+
+        Call counts are sample counts; self and cumulative times are the sampled wall time.
+        """
+        stats: Dict[Tuple[str, int, str], list] = {}
+        callers: Dict[Tuple, Dict[Tuple, list]] = {}
+
+        def key(code) -> Tuple[str, int, str]:
+            return (code.co_filename, code.co_firstlineno, code.co_name)
+
+        for sample, count in self.samples.items():
+            stack = sample[1]
+            if not stack:
+                continue
+            weight = self.weights[sample]
+            keys = [key(code) for code in stack]
+            for k in set(keys):
+                entry = stats.setdefault(k, [0, 0, 0.0, 0.0])
+                entry[0] += count
+                entry[1] += count
+                entry[3] += weight
+            stats[keys[-1]][2] += weight
+
+            for caller, callee in set(zip(keys, keys[1:])):
+                edge = callers.setdefault(callee, {}).setdefault(caller, [0, 0, 0.0, 0.0])
+                edge[0] += count
+                edge[1] += count
+                edge[3] += weight
+            # The leaf's self time is also the self time on the edge from its caller.
+            if len(keys) > 1:
+                callers[keys[-1]][keys[-2]][2] += weight
+
+        data = {
+            k: (cc, nc, tt, ct, {caller: tuple(edge) for caller, edge in callers.get(k, {}).items()})
+            for k, (cc, nc, tt, ct) in stats.items()
+        }
+        buffer = io.BytesIO()
+        marshal.dump(data, buffer)
+        return buffer.getvalue()
+
+
+    def summary(self, limit: int = 25) -> Dict[str, Any]:
+        """
+        @brief The busiest functions by self and total samples, plus the allocation snapshot.
+        """
+        own: Counter = Counter()
+        total: Counter = Counter()
+        threads: Counter = Counter()
+        for (thread, stack), count in self.samples.items():
+            threads[thread] += count
+            if stack:
+                own[self._label(stack[-1])] += count
+                for label in {self._label(code) for code in stack}:
+                    total[label] += count
+
+        return {
+            "duration_s": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(self.samples.values()),
+            "threads": dict(threads.most_common()),
+            "self": own.most_common(limit),
+            "total": total.most_common(limit),
+            "allocations": self.allocations,
+        }
+
+
+class SamplingProfiler:
+    """
+    @class SamplingProfiler
+    @brief Samples the stacks of every thread for a fixed time. One run at a time.
+    """
+    MAX_DEPTH = 128
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """
+        @param interval Seconds between samples.
+        """
+        self._interval = interval
+        self._running = threading.Lock()
+
+
+    def _sample(self, duration: float, exclude: set, samples: Counter, weights: Dict[Tuple, float]) -> float:
+        names: Dict[int, str] = {}
+        started = last = time.perf_counter()
+        deadline = started + duration
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return now - started
+            elapsed, last = now - last, now
+
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident in exclude:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.MAX_DEPTH:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                sample = (names.get(ident, f"thread-{ident}"), tuple(stack))
+                samples[sample] += 1
+                weights[sample] = weights.get(sample, 0.0) + (elapsed or self._interval)
+            frames = frame = None
+
+            time.sleep(max(0.0, min(self._interval, deadline - time.perf_counter())))
+
+
+    def profile(self, duration: float, allocations: bool = False, allocation_limit: int = 20) -> ProfileResult:
+        """
+        @brief Samples for `duration` seconds and returns the result; blocks the caller meanwhile.
+        @param duration Seconds to sample.
+        @param allocations Also record allocations with tracemalloc during the run.
+        @param allocation_limit Allocation sites reported.
+        @throws RuntimeError If another run is in progress.
+        """
+        if not self._running.acquire(blocking = False):
+            raise RuntimeError("A profiling run is already in progress")
+
+        started_tracing = allocations and not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start()
+
+            samples: Counter = Counter()
+            weights: Dict[Tuple, float] = {}
+            result: Dict[str, float] = {}
+            caller = threading.get_ident()
+
+            def sampler() -> None:
+                result["duration"] = self._sample(duration, {caller, threading.get_ident()}, samples, weights)
+
+            thread = threading.Thread(target = sampler, name = "profiler", daemon = True)
+            thread.start()
+            thread.join()
+
+            top = None
+            if allocations:
+                snapshot = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    # The sampler's own bookkeeping (stack counters) is not the service's.
+                    tracemalloc.Filter(False, __file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                ))
+                top = [{
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_kib": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                } for stat in snapshot.statistics("lineno")[:allocation_limit]]
+
+            return ProfileResult(samples, weights, result.get("duration", 0.0), self._interval, top)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self._running.release()
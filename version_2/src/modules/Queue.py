@@ -1,37 +1,211 @@
-from collections import deque
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
+from queue import Empty, Full
+import threading
+
 
 class Queue:
-    def __init__(self, maxSize: int) -> None:
-        self.__queue = self.createQueue(maxSize)
+    """
+    @class Queue
+    @brief Thread-safe bounded FIFO backed by a preallocated ring buffer.
+
+    put()/get() block with optional timeouts. What happens when the queue is
+    full is chosen by the overflow policy:
+      - BLOCK:       put() waits for room (raises queue.Full on timeout).
+      - DROP_OLDEST: the oldest item is overwritten.
+      - DROP_NEWEST: the new item is discarded.
+      - RAISE:       put() raises queue.Full.
+    Depth, high-water mark and drop counters are kept for monitoring.
+    """
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    RAISE = "raise"
+    POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST, RAISE)
+
+    def __init__(self, maxSize: int, policy: str = BLOCK) -> None:
+        """
+        @brief Allocates the buffer.
+        @param maxSize Capacity in items.
+        @param policy Overflow policy, one of POLICIES.
+        @throws ValueError If the capacity or the policy is invalid.
+        """
+        if maxSize < 1:
+            raise ValueError("Queue capacity must be at least 1")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Invalid overflow policy: {policy}. Use one of {', '.join(self.POLICIES)}.")
+
+        self.maxSize = maxSize
+        self.policy = policy
+
+        self.__buffer: List[Any] = [None] * maxSize
+        self.__head = 0
+        self.__count = 0
+
+        self.__lock = threading.Lock()
+        self.__notEmpty = threading.Condition(self.__lock)
+        self.__notFull = threading.Condition(self.__lock)
+
+        self.__highWater = 0
+        self.__dropped = 0
+        self.__enqueued = 0
+        self.__dequeued = 0
+
+
+    # ------- Private Methods -------
+    def __append(self, value: Any) -> None:
+        """
+        @brief Stores an item at the tail. Caller holds the lock and ensured there is room.
+        """
+        self.__buffer[(self.__head + self.__count) % self.maxSize] = value
+        self.__count += 1
+        self.__enqueued += 1
+        if self.__count > self.__highWater:
+            self.__highWater = self.__count
+        self.__notEmpty.notify()
+
+
+    def __popleft(self) -> Any:
+        """
+        @brief Removes the head item. Caller holds the lock and ensured the queue is not empty.
+        """
+        value = self.__buffer[self.__head]
+        self.__buffer[self.__head] = None
+        self.__head = (self.__head + 1) % self.maxSize
+        self.__count -= 1
+        self.__dequeued += 1
+        self.__notFull.notify()
+        return value
+
+
+    def __waitNotEmpty(self, block: bool, timeout: Optional[float]) -> None:
+        """
+        @brief Waits until an item is available. Caller holds the lock.
+        @throws queue.Empty If nothing arrives in time.
+        """
+        if not block:
+            if not self.__count:
+                raise Empty
+            return
+        if not self.__notEmpty.wait_for(lambda: self.__count, timeout):
+            raise Empty
+
+
+    # ------- Public Methods -------
+    def put(self, value: Any, block: bool = True, timeout: Optional[float] = None) -> int:
+        """
+        @brief Adds an item, applying the overflow policy when the queue is full.
+        @param value Item to add.
+        @param block With the BLOCK policy, wait for room (False fails immediately).
+        @param timeout Maximum seconds to wait for room (None waits forever).
+        @return Number of items lost to the overflow policy: 1 when DROP_OLDEST evicted the oldest item
+                or DROP_NEWEST discarded this one, 0 when the item was stored without loss.
+        @throws queue.Full With the RAISE policy, or when BLOCK times out.
+        """
+        with self.__lock:
+            if self.__count < self.maxSize:
+                self.__append(value)
+                return 0
+
+            if self.policy == self.DROP_OLDEST:
+                self.__popleft()
+                self.__dequeued -= 1
+                self.__dropped += 1
+                self.__append(value)
+                return 1
+            if self.policy == self.DROP_NEWEST:
+                self.__dropped += 1
+                return 1
+            if self.policy == self.RAISE or not block:
+                raise Full
 
+            if not self.__notFull.wait_for(lambda: self.__count < self.maxSize, timeout):
+                raise Full
+            self.__append(value)
+            return 0
+
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """
+        @brief Removes and returns the oldest item.
+        @param block Wait for an item (False fails immediately).
+        @param timeout Maximum seconds to wait (None waits forever).
+        @throws queue.Empty If no item is available in time.
+        """
+        with self.__lock:
+            self.__waitNotEmpty(block, timeout)
+            return self.__popleft()
+
+
+    def get_many(self, maxItems: int, block: bool = True, timeout: Optional[float] = None) -> List[Any]:
+        """
+        @brief Waits for at least one item, then removes up to maxItems without waiting further.
+        @param maxItems Maximum number of items returned.
+        @param block Wait for the first item (False fails immediately).
+        @param timeout Maximum seconds to wait for the first item.
+        @return Items in FIFO order.
+        @throws queue.Empty If no item is available in time.
+        """
+        with self.__lock:
+            self.__waitNotEmpty(block, timeout)
+            return [self.__popleft() for _ in range(min(maxItems, self.__count))]
+
+
+    def stats(self) -> Dict[str, int]:
+        """
+        @brief Snapshot of the counters.
+        @return Dict with capacity, depth, high_water, dropped, enqueued and dequeued.
+        """
+        with self.__lock:
+            return {
+                "capacity": self.maxSize,
+                "depth": self.__count,
+                "high_water": self.__highWater,
+                "dropped": self.__dropped,
+                "enqueued": self.__enqueued,
+                "dequeued": self.__dequeued,
+            }
 
-    def createQueue(self, maxSize: int):
-        return deque(maxlen = maxSize)
-    
 
     def enqueue(self, value: Any) -> None:
-        if self.size() < self.__queue.maxlen:
-            self.__queue.append(value)
+        """
+        @brief Adds an item according to the overflow policy (same as put()).
+        """
+        self.put(value)
+
 
-    
     def dequeue(self) -> Any:
-        if self.isEmpty():
-            raise IndexError("Queue Is Empty")
-        return self.__queue.popleft()
-    
+        """
+        @brief Removes and returns the oldest item without waiting.
+        @throws IndexError If the queue is empty.
+        """
+        with self.__lock:
+            if not self.__count:
+                raise IndexError("Queue Is Empty")
+            return self.__popleft()
+
+
     def isEmpty(self) -> bool:
-        return not self.__queue
-    
+        return self.__count == 0
+
+
     def isFull(self) -> bool:
-        return self.size() == self.__queue.maxlen
-    
+        return self.__count == self.maxSize
+
 
     def peek(self) -> Any:
-        if self.isEmpty():
-            return IndexError("Queue is Empty")
-        return self.__queue[0]
-    
+        """
+        @brief Returns the oldest item without removing it.
+        @throws IndexError If the queue is empty.
+        """
+        with self.__lock:
+            if not self.__count:
+                raise IndexError("Queue is Empty")
+            return self.__buffer[self.__head]
+
 
     def size(self) -> int:
-        return len(self.__queue)
+        return self.__count
+
+
+    def __len__(self) -> int:
+        return self.__count
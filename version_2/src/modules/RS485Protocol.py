@@ -0,0 +1,123 @@
+"""
+@file RS485Protocol.py
+@brief Framed RS485 protocol spoken between LedController and the shield boxes.
+
+Version 1 frame layout (all fields one byte unless noted):
+
+    START(0x7E) | VERSION | LENGTH | ADDRESS | SEQ | PAYLOAD... | CRC16 (2 bytes, big endian)
+
+LENGTH counts ADDRESS + SEQ + PAYLOAD. The CRC is CRC-16/CCITT-FALSE over
+VERSION..PAYLOAD. Address 0 is the broadcast address and is never acknowledged.
+A box acknowledges a frame by answering with its own address, the same SEQ and
+an empty payload.
+
+Version 0 is the original unframed format: the clear pattern followed by raw
+[box_id, R, G, B] frames.
+"""
+from typing import List, Tuple
+
+
+PROTOCOL_RAW = 0
+PROTOCOL_FRAMED = 1
+
+START_BYTE = 0x7E
+BROADCAST = 0x00
+HEADER_LENGTH = 3  # START, VERSION, LENGTH
+CRC_LENGTH = 2
+MAX_PAYLOAD = 0xFF - 2
+
+
+def _crc16_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_CRC16_TABLE = _crc16_table()
+
+
+def crc16_ccitt(data: bytes, crc: int = 0xFFFF) -> int:
+    """
+    @brief CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF).
+    @param data Bytes to checksum.
+    @param crc Initial value.
+    @return 16-bit CRC.
+    """
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+def encode_frame(address: int, seq: int, payload: bytes = b"") -> bytes:
+    """
+    @brief Builds a version 1 frame.
+    @param address Destination box (0 for broadcast).
+    @param seq Sequence number (0..255) echoed by the acknowledgement.
+    @param payload Frame payload, e.g. the R/G/B masks.
+    @return Encoded frame bytes.
+    @throws ValueError if the payload is too long.
+    """
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Payload too long: {len(payload)} bytes (max {MAX_PAYLOAD}).")
+    body = bytes((PROTOCOL_FRAMED, len(payload) + 2, address, seq & 0xFF)) + payload
+    crc = crc16_ccitt(body)
+    return bytes((START_BYTE,)) + body + bytes((crc >> 8, crc & 0xFF))
+
+
+class FrameParser:
+    """
+    @class FrameParser
+    @brief Incremental decoder of version 1 frames from a byte stream.
+
+    Resynchronizes on the next START byte after a CRC or version error.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self.crc_errors = 0
+
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, bytes]]:
+        """
+        @brief Adds received bytes and returns every complete, valid frame.
+        @param data Received bytes.
+        @return List of (address, seq, payload) tuples.
+        """
+        buffer = self._buffer
+        buffer.extend(data)
+        frames = []
+
+        while True:
+            start = buffer.find(START_BYTE)
+            if start < 0:
+                buffer.clear()
+                break
+            if start:
+                del buffer[:start]
+            if len(buffer) < HEADER_LENGTH:
+                break
+
+            length = buffer[2]
+            total = HEADER_LENGTH + length + CRC_LENGTH
+            if buffer[1] != PROTOCOL_FRAMED or length < 2:
+                self.crc_errors += 1
+                del buffer[:1]
+                continue
+            if len(buffer) < total:
+                break
+
+            body = bytes(buffer[1:HEADER_LENGTH + length])
+            received = (buffer[total - 2] << 8) | buffer[total - 1]
+            if crc16_ccitt(body) != received:
+                self.crc_errors += 1
+                del buffer[:1]
+                continue
+
+            frames.append((body[2], body[3], body[4:]))
+            del buffer[:total]
+
+        return frames
@@ -0,0 +1,233 @@
+"""
+@file RecognitionPool.py
+@brief Speech recognition and command matching in long-lived worker processes.
+
+Recognition, silence trimming and fuzzy matching are CPU-bound and would
+compete with Flask and the device threads for the GIL. The pool runs them in
+separate processes that load the recognizer once at start-up. Audio is passed
+through multiprocessing.shared_memory blocks instead of being pickled, and the
+component catalog is published in a versioned shared-memory snapshot that
+each worker reloads only when the version changes.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import struct
+import threading
+
+
+# Catalog snapshot layout: version (u64) | payload length (u32) | JSON [[name, position], ...]
+_CATALOG_HEADER = struct.Struct("<QI")
+
+# Per-process state of a worker, filled by _init_worker().
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(recognizer: str, language: str, options: Dict[str, Any], rate: int, channels: int,
+                 silence_level: float, threshold: float) -> None:
+    """
+    @brief Process initializer: loads the recognizer model and the matcher once.
+    """
+    from modules.Recognizers import create_recognizer
+    from modules.CommandMatcher import CommandMatcher
+
+    _worker["recognizer"] = create_recognizer(recognizer, language, **options)
+    _worker["matcher"] = CommandMatcher(threshold)
+    _worker["rate"] = rate
+    _worker["channels"] = channels
+    _worker["silence_level"] = silence_level
+    _worker["catalog_version"] = -1
+    _worker["catalog"] = {}
+
+
+def _load_catalog(name: str, version: int) -> Dict[str, int]:
+    """
+    @brief Returns the worker's catalog, reloading it from shared memory if the version changed.
+    """
+    if _worker["catalog_version"] != version:
+        block = shared_memory.SharedMemory(name = name)
+        try:
+            stored_version, length = _CATALOG_HEADER.unpack_from(block.buf)
+            payload = bytes(block.buf[_CATALOG_HEADER.size:_CATALOG_HEADER.size + length])
+        finally:
+            block.close()
+        _worker["catalog"] = {name: position for name, position in json.loads(payload)}
+        _worker["catalog_version"] = stored_version
+    return _worker["catalog"]
+
+
+def _process(audio_name: str, length: int, source: Optional[str], wake_word: str,
+             catalog_name: Optional[str], catalog_version: int) -> Tuple[Optional[str], Optional[str], float, Optional[int]]:
+    """
+    @brief Worker task: trims, recognizes and matches one recording.
+    @return (command, matched name, score, position); the last three are None/0 without a match.
+    """
+    import numpy as np
+    from modules.Microphone import SAMPLE_WIDTH, trim_silence
+
+    block = shared_memory.SharedMemory(name = audio_name)
+    try:
+        samples = np.frombuffer(block.buf, dtype = np.int16, count = length // SAMPLE_WIDTH)
+        pcm = trim_silence(samples, _worker["rate"], _worker["channels"], _worker["silence_level"]).tobytes()
+        del samples
+    finally:
+        block.close()
+
+    command = _worker["recognizer"].recognize(pcm, _worker["rate"], SAMPLE_WIDTH, _worker["channels"], source)
+    if command and wake_word and command.startswith(wake_word):
+        command = command[len(wake_word):].strip()
+    if not command or catalog_name is None:
+        return command, None, 0.0, None
+
+    catalog = _load_catalog(catalog_name, catalog_version)
+    match = _worker["matcher"].best_match(command, list(catalog))
+    if match is None:
+        return command, None, 0.0, None
+    name, score = match
+    return command, name, score, catalog[name]
+
+
+class _Snapshot:
+    """
+    @class _Snapshot
+    @brief A published catalog block and the number of queued or running tasks that captured it.
+    """
+    __slots__ = ("block", "tasks")
+
+    def __init__(self, block: shared_memory.SharedMemory) -> None:
+        self.block = block
+        self.tasks = 0
+
+
+def _warm_up() -> bool:
+    return "recognizer" in _worker
+
+
+class RecognitionPool:
+    """
+    @class RecognitionPool
+    @brief Future-based front end of the recognition worker processes.
+    """
+
+    def __init__(self, logger, workers: int, recognizer: str, language: str, rate: int, channels: int,
+                 silence_level: float = 300.0, threshold: float = 0.6, recognizer_options: Optional[Dict[str, Any]] = None) -> None:
+        """
+        @brief Starts the worker processes and waits until each has loaded its recognizer.
+        @param logger Logger instance for writing logs.
+        @param workers Number of worker processes.
+        @param recognizer Recognition backend name (see Recognizers.RECOGNIZERS).
+        @param language Recognition language.
+        @param rate Sample rate of the recordings.
+        @param channels Channel count of the recordings.
+        @param silence_level RMS level below which audio is trimmed as silence.
+        @param threshold Minimum similarity accepted as a match.
+        @param recognizer_options Extra keyword arguments for the backend.
+        """
+        self._log = logger
+        self._workers = workers
+
+        # spawn: the parent already runs threads, which fork would copy in an unknown state.
+        self._executor = ProcessPoolExecutor(
+            max_workers = workers,
+            mp_context = get_context("spawn"),
+            initializer = _init_worker,
+            initargs = (recognizer, language, recognizer_options or {}, rate, channels, silence_level, threshold)
+        )
+        for future in [self._executor.submit(_warm_up) for _ in range(workers)]:
+            future.result()
+
+        self._lock = threading.Lock()
+        # Snapshots by version: the current one, plus older ones until the tasks that captured them finish.
+        self._snapshots: Dict[int, _Snapshot] = {}
+        self._catalog_version = 0
+        self._catalog_key: Optional[Tuple[Tuple[str, int], ...]] = None
+
+        self._log.write_log("Logs/audioTranscription.log", "INFO", f"Recognition pool started with {workers} workers ({recognizer}).")
+
+
+    def publish_catalog(self, components: Sequence[Tuple[str, int]]) -> int:
+        """
+        @brief Publishes a new catalog snapshot if it differs from the current one.
+        @param components (name, position) pairs.
+        @return Version of the current snapshot.
+        """
+        key = tuple((name, int(position)) for name, position in components)
+        with self._lock:
+            if key == self._catalog_key:
+                return self._catalog_version
+
+            payload = json.dumps(key).encode("utf-8")
+            version = self._catalog_version + 1
+            block = shared_memory.SharedMemory(create = True, size = _CATALOG_HEADER.size + len(payload))
+            _CATALOG_HEADER.pack_into(block.buf, 0, version, len(payload))
+            block.buf[_CATALOG_HEADER.size:_CATALOG_HEADER.size + len(payload)] = payload
+
+            previous = self._catalog_version
+            self._snapshots[version] = _Snapshot(block)
+            self._catalog_version = version
+            self._catalog_key = key
+            self._retire(previous)
+            return version
+
+
+    def _retire(self, version: int) -> None:
+        """
+        @brief Frees a snapshot once it is no longer current and no task refers to it (lock held).
+        """
+        snapshot = self._snapshots.get(version)
+        if snapshot is not None and snapshot.tasks == 0 and version != self._catalog_version:
+            del self._snapshots[version]
+            snapshot.block.close()
+            snapshot.block.unlink()
+
+
+    def submit(self, frames: List[bytes], source: Optional[str] = None, wake_word: str = "") -> Future:
+        """
+        @brief Recognizes and matches a recording in a worker process.
+        @param frames Raw 16-bit PCM chunks.
+        @param source Optional recording name, used by offline backends.
+        @param wake_word Lower-case prefix stripped from the transcript.
+        @return Future of (command, matched name, score, position).
+        """
+        length = sum(len(frame) for frame in frames)
+        audio = shared_memory.SharedMemory(create = True, size = max(1, length))
+        offset = 0
+        for frame in frames:
+            audio.buf[offset:offset + len(frame)] = frame
+            offset += len(frame)
+
+        with self._lock:
+            catalog_version = self._catalog_version
+            snapshot = self._snapshots.get(catalog_version)
+            catalog_name = snapshot.block.name if snapshot is not None else None
+            if snapshot is not None:
+                snapshot.tasks += 1
+
+        def release(_: Future) -> None:
+            audio.close()
+            audio.unlink()
+            if snapshot is not None:
+                with self._lock:
+                    snapshot.tasks -= 1
+                    self._retire(catalog_version)
+
+        try:
+            future = self._executor.submit(_process, audio.name, length, source, wake_word, catalog_name, catalog_version)
+        except Exception:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return future
+
+
+    def close(self) -> None:
+        """
+        @brief Stops the workers and frees the catalog snapshots.
+        """
+        self._executor.shutdown(wait = True, cancel_futures = True)
+        with self._lock:
+            for snapshot in self._snapshots.values():
+                snapshot.block.close()
+                snapshot.block.unlink()
+            self._snapshots.clear()
@@ -0,0 +1,141 @@
+"""
+@file Recognizers.py
+@brief Pluggable speech recognition backends used by MicroPhone.
+
+Every backend exposes recognize(pcm, rate, sample_width, channels, source) and
+returns the transcript in lower case, or None when nothing was understood.
+"""
+from typing import Callable, Dict, Optional
+import random
+import time
+
+# numpy dtype of one sample by sample width; 8-bit PCM is unsigned.
+_SAMPLE_TYPES = {1: "u1", 2: "<i2", 4: "<i4"}
+
+
+def downmix(pcm: bytes, sample_width: int, channels: int) -> bytes:
+    """
+    @brief Averages interleaved channels into mono PCM of the same sample width.
+    @param pcm Raw interleaved audio; a trailing partial frame is dropped.
+    @param sample_width Bytes per sample (1, 2 or 4).
+    @param channels Number of interleaved channels.
+    @return Mono PCM (the input itself when it already is mono).
+    @throws ValueError If the sample width is not supported.
+    """
+    if channels <= 1:
+        return pcm
+    if sample_width not in _SAMPLE_TYPES:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+    # Loaded on first use, like in Microphone: only multi-channel setups need it.
+    import numpy as np
+
+    dtype = np.dtype(_SAMPLE_TYPES[sample_width])
+    samples = np.frombuffer(pcm, dtype = dtype, count = len(pcm) // (sample_width * channels) * channels)
+    return np.round(samples.reshape(-1, channels).mean(axis = 1)).astype(dtype).tobytes()
+
+
+class GoogleRecognizer:
+    """
+    @class GoogleRecognizer
+    @brief Online recognition through the SpeechRecognition Google Web Speech API.
+    """
+
+    def __init__(self, language: str) -> None:
+        import speech_recognition as sr
+
+        self._sr = sr
+        self._language = language
+        self._recognizer = sr.Recognizer()
+
+
+    def _recognize(self, audio):
+        return self._recognizer.recognize_google(audio, language = self._language)
+
+
+    def recognize(self, pcm: bytes, rate: int, sample_width: int, channels: int = 1, source: Optional[str] = None) -> Optional[str]:
+        if not pcm:
+            return None
+        # AudioData has no channel count: interleaved stereo would be heard as mono at twice the rate.
+        pcm = downmix(pcm, sample_width, channels)
+        try:
+            text = self._recognize(self._sr.AudioData(pcm, rate, sample_width))
+            return text.lower() if text else None
+        except self._sr.UnknownValueError:
+            return None
+
+
+class SphinxRecognizer(GoogleRecognizer):
+    """
+    @class SphinxRecognizer
+    @brief Offline recognition through CMU PocketSphinx (requires the pocketsphinx package).
+    """
+
+    def _recognize(self, audio):
+        return self._recognizer.recognize_sphinx(audio, language = self._language)
+
+
+class StubRecognizer:
+    """
+    @class StubRecognizer
+    @brief Offline stand-in that returns known transcripts, for benchmarking the pipeline.
+
+    Transcripts are looked up by the name of the source recording. Word errors and
+    a recognition time proportional to the audio duration can be simulated.
+    """
+
+    def __init__(self, language: str = "", transcripts: Optional[Dict[str, str]] = None,
+                 word_error_rate: float = 0.0, real_time_factor: float = 0.0, seed: int = 0) -> None:
+        """
+        @param language Unused, kept for a uniform constructor.
+        @param transcripts Mapping from recording file name to transcript.
+        @param word_error_rate Probability of dropping or corrupting each word.
+        @param real_time_factor Simulated recognition time as a fraction of the audio duration.
+        @param seed Seed of the error generator, for reproducible runs.
+        """
+        self._transcripts = transcripts or {}
+        self._word_error_rate = word_error_rate
+        self._real_time_factor = real_time_factor
+        self._random = random.Random(seed)
+
+
+    def _corrupt(self, word: str) -> Optional[str]:
+        if self._random.random() >= self._word_error_rate:
+            return word
+        if len(word) < 2 or self._random.random() < 0.5:
+            return None
+        i = self._random.randrange(len(word))
+        return word[:i] + word[i + 1:]
+
+
+    def recognize(self, pcm: bytes, rate: int, sample_width: int, channels: int = 1, source: Optional[str] = None) -> Optional[str]:
+        if self._real_time_factor > 0:
+            time.sleep(len(pcm) / (rate * sample_width * channels) * self._real_time_factor)
+
+        text = self._transcripts.get(source or "")
+        if not text:
+            return None
+
+        words = [w for w in (self._corrupt(w) for w in text.lower().split()) if w]
+        return " ".join(words) or None
+
+
+RECOGNIZERS: Dict[str, Callable[..., object]] = {
+    "google": GoogleRecognizer,
+    "sphinx": SphinxRecognizer,
+    "stub": StubRecognizer,
+}
+
+
+def create_recognizer(name: str, language: str, **options):
+    """
+    @brief Instantiates a recognition backend by name.
+    @param name One of the keys of RECOGNIZERS.
+    @param language Language code passed to the backend.
+    @param options Extra backend-specific keyword arguments.
+    @throws ValueError if the backend is unknown.
+    """
+    try:
+        backend = RECOGNIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown recognizer: {name}. Use one of {', '.join(RECOGNIZERS)}.")
+    return backend(language, **options)
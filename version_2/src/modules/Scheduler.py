@@ -0,0 +1,410 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import heapq
+import itertools
+import random
+import threading
+import time
+
+
+class IntervalSchedule:
+    """
+    @class IntervalSchedule
+    @brief Runs every `seconds` seconds.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+
+    def next_after(self, after: float) -> float:
+        return after + self.seconds
+
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+class CronSchedule:
+    """
+    @class CronSchedule
+    @brief Five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields accept `*`, numbers, ranges `a-b`, lists `a,b` and steps `*/n` or `a-b/n`.
+    Day-of-week runs from 0 (Sunday) to 6; 7 is also accepted for Sunday. As in cron,
+    when both day fields are restricted a day matching either one is selected.
+    """
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+    def __init__(self, expression: str) -> None:
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+
+        self.expression = expression
+        self._minutes, self._hours, self._days, self._months, weekdays = (
+            self._parse(part, low, high) for part, (_, low, high) in zip(parts, self.FIELDS)
+        )
+        self._weekdays = {d % 7 for d in weekdays}
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for item in field.split(","):
+            spec, _, step = item.partition("/")
+            step = int(step) if step else 1
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = int(spec)
+                end = high if step > 1 else start
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f"Invalid cron field: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self._days
+        # datetime.weekday(): Monday is 0; cron: Sunday is 0.
+        weekday = (moment.weekday() + 1) % 7 in self._weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+
+    def next_after(self, after: float) -> float:
+        moment = datetime.fromtimestamp(after).replace(second = 0, microsecond = 0) + timedelta(minutes = 1)
+        limit = moment + timedelta(days = 366 * 5)
+
+        while moment < limit:
+            if moment.month not in self._months:
+                moment = (moment.replace(day = 1, hour = 0, minute = 0) + timedelta(days = 32)).replace(day = 1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour = 0, minute = 0) + timedelta(days = 1)
+            elif moment.hour not in self._hours:
+                moment = moment.replace(minute = 0) + timedelta(hours = 1)
+            elif moment.minute not in self._minutes:
+                moment += timedelta(minutes = 1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+    def __str__(self) -> str:
+        return f"cron '{self.expression}'"
+
+
+class Job:
+    """
+    @class Job
+    @brief A scheduled call and its run statistics.
+    """
+
+    def __init__(self, name: str, schedule, func: Callable, args: tuple, kwargs: dict,
+                 jitter: float, missed: str, max_concurrency: int) -> None:
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.jitter = jitter
+        self.missed = missed
+        self.max_concurrency = max_concurrency
+
+        self.next_run: Optional[float] = None
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.running = 0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        # Missed occurrences still to run under MISSED_CATCH_UP.
+        self.owed = 0
+        self.removed = False
+
+
+class Scheduler:
+    """
+    @class Scheduler
+    @brief One thread driving every periodic job from a min-heap of next-run times.
+
+    The thread only sleeps until the earliest job is due and dispatches it; the
+    call itself runs on the ThreadManager pool when one is given, so a slow
+    backup does not delay the other jobs. Missed runs (the process was
+    suspended or the clock jumped) follow the job's policy:
+      - MISSED_SKIP:     drop them and wait for the next future run.
+      - MISSED_RUN_ONCE: run once now, then continue from the present.
+      - MISSED_CATCH_UP: run each missed occurrence, one after the other; each
+                         owed run starts when the previous run has finished, so
+                         they are neither skipped by max_concurrency nor overlap.
+    """
+    MISSED_SKIP = "skip"
+    MISSED_RUN_ONCE = "run_once"
+    MISSED_CATCH_UP = "catch_up"
+    MISSED_POLICIES = (MISSED_SKIP, MISSED_RUN_ONCE, MISSED_CATCH_UP)
+
+    def __init__(self, logger, pool = None, misfire_grace: float = 5.0) -> None:
+        """
+        @brief Initializes the scheduler; call start() to run it.
+        @param logger Logger instance for writing logs.
+        @param pool Optional ThreadManager that runs the jobs (default: the scheduler thread).
+        @param misfire_grace Seconds a run may be late before it counts as missed.
+        """
+        self._log = logger
+        self._pool = pool
+        self._misfire_grace = misfire_grace
+
+        self._condition = threading.Condition()
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._counter = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        # Jobs with owed catch-up runs, in the order they fell behind.
+        self._owing: List[Job] = []
+        self._random = random.Random()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+
+    # ------- Private Methods -------
+    def _schedule(self, job: Job, due: float) -> None:
+        """
+        @brief Pushes the next run of a job. Caller holds the lock.
+        """
+        if job.jitter > 0:
+            due += self._random.uniform(0, job.jitter)
+        job.next_run = due
+        heapq.heappush(self._heap, (due, next(self._counter), job))
+
+
+    def _execute(self, job: Job) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            error = str(e)
+            self._log.write_log("Logs/systemActivity.log", "ERROR", f"Scheduled job {job.name} failed: {e}")
+
+        with self._condition:
+            job.running -= 1
+            job.runs += 1
+            job.last_duration = time.perf_counter() - started
+            job.last_error = error
+            if error is not None:
+                job.failures += 1
+            if job.owed:
+                self._condition.notify()
+
+
+    def _dispatch(self, job: Job, now: float) -> None:
+        """
+        @brief Starts a run unless the job is at its concurrency limit. Caller holds the lock.
+        """
+        if job.running >= job.max_concurrency:
+            job.skipped += 1
+            self._log.write_log("Logs/systemActivity.log", "WARNING", f"Skipped job {job.name}: {job.running} run(s) still in progress.")
+            return
+        self._start(job, now)
+
+
+    def _start(self, job: Job, now: float) -> None:
+        """
+        @brief Runs a job on the pool, or inline with the lock released. Caller holds the lock.
+        """
+        job.running += 1
+        job.last_run = now
+        if self._pool is None:
+            self._condition.release()
+            try:
+                self._execute(job)
+            finally:
+                self._condition.acquire()
+            return
+
+        try:
+            self._pool.submit(self._execute, job, admission_timeout = 0)
+        except RuntimeError as e:
+            job.running -= 1
+            job.skipped += 1
+            self._log.write_log("Logs/systemActivity.log", "WARNING", f"Skipped job {job.name}: {e}")
+
+
+    def _owe(self, job: Job, due: float, now: float) -> None:
+        """
+        @brief Queues the occurrences of a catch-up job due by now and schedules the next one. Caller holds the lock.
+        """
+        while due <= now:
+            job.owed += 1
+            due = job.schedule.next_after(due)
+        if job not in self._owing:
+            self._owing.append(job)
+        self._schedule(job, due)
+
+
+    def _catch_up(self) -> bool:
+        """
+        @brief Starts the next owed run of a job whose previous run has finished. Caller holds the lock.
+        @return True if a run was started.
+        """
+        self._owing = [job for job in self._owing if not job.removed]
+        for job in self._owing:
+            if job.running == 0:
+                job.owed -= 1
+                if not job.owed:
+                    self._owing.remove(job)
+                self._start(job, time.time())
+                return True
+        return False
+
+
+    def _run(self) -> None:
+        with self._condition:
+            while self._running:
+                while self._heap and self._heap[0][2].removed:
+                    heapq.heappop(self._heap)
+
+                if self._catch_up():
+                    continue
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                due, _, job = self._heap[0]
+                now = time.time()
+                if due > now:
+                    self._condition.wait(due - now)
+                    continue
+                heapq.heappop(self._heap)
+
+                late = now - due > self._misfire_grace
+                if late and job.missed == self.MISSED_SKIP:
+                    job.skipped += 1
+                    self._schedule(job, job.schedule.next_after(now))
+                    continue
+                # Behind schedule, or still working off earlier misses: queue instead of skipping.
+                if job.missed == self.MISSED_CATCH_UP and (late or job.owed):
+                    self._owe(job, due, now)
+                    continue
+
+                self._dispatch(job, now)
+                if self._running and not job.removed:
+                    base = due if job.missed == self.MISSED_CATCH_UP else max(due, now)
+                    self._schedule(job, job.schedule.next_after(base))
+
+
+    def _add(self, name: str, schedule, func: Callable, args: tuple, kwargs: Optional[dict], jitter: float,
+             missed: str, max_concurrency: int, run_immediately: bool) -> Job:
+        if missed not in self.MISSED_POLICIES:
+            raise ValueError(f"Invalid missed-run policy: {missed}. Use one of {', '.join(self.MISSED_POLICIES)}.")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        job = Job(name, schedule, func, args, kwargs or {}, jitter, missed, max_concurrency)
+        with self._condition:
+            if name in self._jobs:
+                raise ValueError(f"Job {name} already exists")
+            self._jobs[name] = job
+            now = time.time()
+            self._schedule(job, now if run_immediately else schedule.next_after(now))
+            self._condition.notify()
+
+        self._log.write_log("Logs/systemActivity.log", "INFO", f"Scheduled job {name} ({schedule}).")
+        return job
+
+
+    # ------- Public Methods -------
+    def add_interval(self, name: str, seconds: float, func: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+                     jitter: float = 0.0, missed: str = MISSED_RUN_ONCE, max_concurrency: int = 1,
+                     run_immediately: bool = False) -> Job:
+        """
+        @brief Runs func every `seconds` seconds.
+        @param name Unique job name.
+        @param seconds Interval between runs.
+        @param func Callable to run.
+        @param args Positional arguments for func.
+        @param kwargs Keyword arguments for func.
+        @param jitter Up to this many seconds are added at random to each run time.
+        @param missed Missed-run policy, one of MISSED_POLICIES.
+        @param max_concurrency Runs of this job allowed at the same time; extra runs are skipped.
+        @param run_immediately Run once now instead of after the first interval.
+        @throws ValueError If the name is taken or a parameter is invalid.
+        """
+        return self._add(name, IntervalSchedule(seconds), func, args, kwargs, jitter, missed, max_concurrency, run_immediately)
+
+
+    def add_cron(self, name: str, expression: str, func: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+                 jitter: float = 0.0, missed: str = MISSED_RUN_ONCE, max_concurrency: int = 1) -> Job:
+        """
+        @brief Runs func on a cron-like schedule (local time), e.g. "0 3 * * *" for 03:00 daily.
+        @see add_interval for the other parameters.
+        """
+        return self._add(name, CronSchedule(expression), func, args, kwargs, jitter, missed, max_concurrency, False)
+
+
+    def remove(self, name: str) -> bool:
+        """
+        @brief Cancels future runs of a job; a run in progress finishes.
+        @return True if the job existed.
+        """
+        with self._condition:
+            job = self._jobs.pop(name, None)
+            if job is None:
+                return False
+            job.removed = True
+            self._condition.notify()
+            return True
+
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """
+        @brief Lists the jobs ordered by next run.
+        @return One dict per job with name, schedule, next_run, last_run (epoch seconds),
+                last_duration (seconds), last_error, running, runs, failures, skipped and owed.
+        """
+        with self._condition:
+            jobs = sorted(self._jobs.values(), key = lambda j: j.next_run or 0.0)
+            return [{
+                "name": job.name,
+                "schedule": str(job.schedule),
+                "next_run": job.next_run,
+                "last_run": job.last_run,
+                "last_duration": job.last_duration,
+                "last_error": job.last_error,
+                "running": job.running,
+                "runs": job.runs,
+                "failures": job.failures,
+                "skipped": job.skipped,
+                "owed": job.owed,
+            } for job in jobs]
+
+
+    def start(self) -> None:
+        """
+        @brief Starts the scheduler thread.
+        """
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target = self._run, name = "scheduler", daemon = True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        """
+        @brief Stops dispatching; runs already started on the pool are not interrupted.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
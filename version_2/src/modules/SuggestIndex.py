@@ -0,0 +1,193 @@
+"""
+@file SuggestIndex.py
+@brief In-memory prefix index of component names and description words for search-as-you-type.
+
+Every normalized word (accents removed, case folded) of a component's name
+and description is kept in a sorted array next to a parallel array of owner
+names; the words of a prefix are one contiguous slice found with two
+bisects. Name words are stored a second time behind a marker, so matches on
+the name can be told apart from matches on the description with the same
+lookup. Additions and removals insert or delete only the words of that
+component, so the index never needs a rebuild after the initial load.
+
+Results are ranked by popularity: the number of times a component was asked
+for by voice or found by /search since start-up. A list of all components in
+ranking order is kept current, so a query matching much of the catalog walks
+it and stops after `limit` results instead of sorting every match.
+"""
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+import re
+import threading
+import unicodedata
+
+
+_WORD = re.compile(r"\w+")
+# Prefix of the name words; sorts before any word.
+_NAME = "\x00"
+_END = "\U0010ffff"
+
+
+def _normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(_normalize(text))
+
+
+class _Component:
+    __slots__ = ("name", "position", "description", "words", "rank")
+
+    def __init__(self, name: str, position: int, description: str) -> None:
+        self.name = name
+        self.position = position
+        self.description = description
+        name_words = set(_words(name))
+        self.words = sorted(name_words | set(_words(description))) + sorted(_NAME + word for word in name_words)
+        key = _normalize(name)
+        # Sort key: most hits first, then shorter and alphabetical names.
+        self.rank = (0, len(key), key, name)
+
+
+class SuggestIndex:
+    """
+    @class SuggestIndex
+    @brief Prefix index over the component catalog, ranked by popularity.
+
+    Components whose name matches the query come before those matching only
+    by description. As with DataBase.get_position, a name stored more than
+    once resolves to its first row.
+    """
+    # A match set at least this fraction of the catalog is ranked by walking the ranking.
+    DENSE_FRACTION = 1 / 16
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._components: Dict[str, _Component] = {}
+        self._words: List[str] = []
+        self._owners: List[str] = []
+        self._ranked: List[Tuple[int, int, str, str]] = []
+
+
+    def load(self, rows: Iterable[Tuple[str, int, str]]) -> None:
+        """
+        @brief Replaces the indexed catalog; popularity of the names still present is kept.
+        @param rows (componentName, position, description) rows, e.g. DataBase.get_all_components().
+        """
+        components: Dict[str, _Component] = {}
+        for name, position, description in rows:
+            if name not in components:
+                components[name] = _Component(name, position, description)
+
+        with self._lock:
+            for name, component in components.items():
+                previous = self._components.get(name)
+                if previous is not None:
+                    component.rank = (previous.rank[0],) + component.rank[1:]
+            entries = sorted((word, name) for name, component in components.items() for word in component.words)
+            self._components = components
+            self._words = [word for word, _ in entries]
+            self._owners = [name for _, name in entries]
+            self._ranked = sorted(component.rank for component in components.values())
+
+
+    def add(self, name: str, position: int, description: str) -> None:
+        """
+        @brief Indexes a newly inserted component.
+        """
+        component = _Component(name, position, description)
+        with self._lock:
+            if name in self._components:
+                return
+            self._components[name] = component
+            for word in component.words:
+                index = bisect_left(self._words, word)
+                self._words.insert(index, word)
+                self._owners.insert(index, name)
+            insort(self._ranked, component.rank)
+
+
+    def remove(self, name: str) -> None:
+        """
+        @brief Drops a deleted component (every row with this name).
+        """
+        with self._lock:
+            component = self._components.pop(name, None)
+            if component is None:
+                return
+            for word in component.words:
+                start = bisect_left(self._words, word)
+                index = self._owners.index(name, start)
+                del self._words[index]
+                del self._owners[index]
+            del self._ranked[bisect_left(self._ranked, component.rank)]
+
+
+    def record_hit(self, name: str) -> None:
+        """
+        @brief Counts one lookup of a component towards its ranking.
+        """
+        with self._lock:
+            component = self._components.get(name)
+            if component is None:
+                return
+            del self._ranked[bisect_left(self._ranked, component.rank)]
+            component.rank = (component.rank[0] - 1,) + component.rank[1:]
+            insort(self._ranked, component.rank)
+
+
+    def _matching(self, words: List[str], marker: str) -> Set[str]:
+        """
+        @brief Names with a word starting with each of `words` (name words only when marker is _NAME).
+        """
+        names: Optional[Set[str]] = None
+        for word in words:
+            prefix = marker + word
+            found = set(self._owners[bisect_left(self._words, prefix):bisect_left(self._words, prefix + _END)])
+            names = found if names is None else names & found
+            if not names:
+                break
+        return names or set()
+
+
+    def _top(self, names: Set[str], limit: int) -> List[Tuple[int, int, str, str]]:
+        if len(names) >= len(self._ranked) * self.DENSE_FRACTION:
+            top = []
+            for rank in self._ranked:
+                if rank[3] in names:
+                    top.append(rank)
+                    if len(top) == limit:
+                        break
+            return top
+        return heapq.nsmallest(limit, (self._components[name].rank for name in names))
+
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[str, int, str, int]]:
+        """
+        @brief Components with a word starting with every word of the query.
+        @param query Typed text; an empty query returns the most popular components.
+        @param limit Maximum number of results.
+        @return (name, position, description, hits) tuples: name matches first, each group most popular first.
+        """
+        # Longest words first: they match the fewest entries and empty the set soonest.
+        words = sorted(set(_words(query)), key = len, reverse = True)
+
+        with self._lock:
+            if not words:
+                ranks = self._ranked[:limit]
+            else:
+                by_name = self._matching(words, _NAME)
+                ranks = self._top(by_name, limit)
+                if len(ranks) < limit:
+                    by_description = self._matching(words, "") - by_name
+                    ranks += self._top(by_description, limit - len(ranks))
+
+            components = [self._components[rank[3]] for rank in ranks]
+            return [(c.name, c.position, c.description, -c.rank[0]) for c in components]
+
+
+# Process-wide index: loaded and kept current by WebServer, popularity fed by EchoGabinet.
+suggestions = SuggestIndex()
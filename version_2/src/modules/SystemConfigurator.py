@@ -8,15 +8,21 @@ salvando tudo em um arquivo JSON para uso futuro.
 from modules.FileManager import FileManager
 from modules.Logger import Logger
 from modules.WifiManager import WifiManager
-from questionary import text, password, select
-from pyfiglet import Figlet
-from termcolor import colored
-from prompt_toolkit.styles import Style 
 import sys
 import os
 import time
 
 
+# As bibliotecas do assistente (questionary, prompt_toolkit, pyfiglet, termcolor) só são
+# importadas quando o assistente corre, ou seja, quando Config/settings.json não existe.
+def colored(text, *args, **kwargs):
+    """
+    @brief termcolor.colored, importado no primeiro uso.
+    """
+    from termcolor import colored as termcolor_colored
+    return termcolor_colored(text, *args, **kwargs)
+
+
 class SystemConfigurator:
     """
     @class SystemConfigurator
@@ -108,6 +114,8 @@ class SystemConfigurator:
         """
         @brief Exibe o cabeçalho ASCII art na tela.
         """
+        from pyfiglet import Figlet
+
         os.system('clear')
         
         try:
@@ -133,6 +141,8 @@ class SystemConfigurator:
         @brief Define o estilo visual dos prompts do Questionary.
         @return Estilo personalizado para entrada de dados.
         """
+        from prompt_toolkit.styles import Style
+
         return Style([
             ('question', 'fg:#00bfa6 bold'),   # Verde água
             ('selected', 'fg:#5F819D'),
@@ -143,6 +153,8 @@ class SystemConfigurator:
         @brief Solicita os dados de conexão Wi-Fi ao usuário.
         @return Dicionário contendo SSID e senha.
         """
+        from questionary import text, password
+
         style = self.get_style()
         ssid = text("📶 Nome da Rede Wi-Fi (SSID):", style=style).ask()
         wifi_pass = password("🔑 Senha da Rede:", style=style).ask()
@@ -152,6 +164,8 @@ class SystemConfigurator:
         """
         Solicita os parâmetros adicionais do sistema.
         """
+        from questionary import text, select
+
         style = self.get_style()
         config = {}
 
@@ -171,6 +185,10 @@ class SystemConfigurator:
         config["language"] = select("🌍 Escolha o idioma:", choices=["en-US", "pt-PT", "es-ES", "fr-FR", "de-DE"], style=style).ask()
         config["button_pin"] = text("🔘 Pino do Botão:", style=style).ask()
         config["buzzer_pin"] = text("📢 Pino do Buzzer:", style=style).ask()
+        config["listen_mode"] = select("👂 Modo de escuta:", choices=["button", "wake_word"], style=style).ask()
+        if config["listen_mode"] == "wake_word":
+            config["wake_word"] = text("🗣️ Palavra de ativação:", style=style).ask()
+            config["wake_word_templates"] = text("📁 Pasta com gravações da palavra de ativação:", default="Config/wake_word", style=style).ask()
 
         return config
 
@@ -1,70 +1,337 @@
-from modules.Queue import Queue
-from typing import Any, Optional
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
+import functools
+import heapq
+import itertools
 import threading
+import time
+
+
+class _Task:
+    """
+    @class _Task
+    @brief A queued call together with its future and optional deadline.
+    """
+    __slots__ = ("func", "args", "kwargs", "future", "deadline")
+
+    def __init__(self, func: Callable, args: tuple, kwargs: dict, future: Future, deadline: Optional[float]) -> None:
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.deadline = deadline
+
+
+class _Service:
+    """
+    @class _Service
+    @brief A long-running task on its own supervised thread.
+    """
+    __slots__ = ("name", "func", "args", "kwargs", "stop", "restart", "future", "thread", "stopping")
+
+    def __init__(self, name: str, func: Callable, args: tuple, kwargs: dict, stop: Optional[Callable[[], None]], restart: bool) -> None:
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.stop = stop
+        self.restart = restart
+        self.future: Future = Future()
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = False
+
 
 class ThreadManager:
-    def __init__(self, size: int, timeout: int) -> None:
+    """
+    @class ThreadManager
+    @brief Bounded worker pool for short jobs plus supervised long-running services.
+
+    A fixed number of workers block on a condition variable until a job is
+    queued. submit() returns a Future; admission is bounded by `max_pending`
+    and callers block (backpressure) while the queue is full. Jobs may carry a
+    timeout: if it expires the future fails with TimeoutError (a running job
+    cannot be interrupted, so its result is discarded when it finishes).
+
+    Services (voice loop, web server) do not take a worker. Each runs on its
+    own thread and is restarted with exponential backoff if it raises.
+    """
+    RESTART_BACKOFF = 1.0
+    MAX_RESTART_BACKOFF = 30.0
+
+    def __init__(self, size: int, timeout: Optional[float] = None, max_pending: Optional[int] = None, logger = None) -> None:
+        """
+        @brief Starts the workers.
+        @param size Number of worker threads.
+        @param timeout Default per-job timeout in seconds (None for no limit).
+        @param max_pending Maximum queued jobs before submit() blocks (default: 4 * size).
+        @param logger Optional Logger for job and service failures.
+        """
+        if size < 1:
+            raise ValueError("ThreadManager needs at least one worker")
+
         self.maxThreads = size
         self.timeout = timeout
-        self.__taskQueue = Queue(size)
-        self.__completeTaskQueue = Queue(size)
-        self.threads = []
-        self._lock = threading.Lock()
-
-    def createNewTask(self, task, *args, **kwargs):
-        if self.__taskQueue.isFull():
-            raise RuntimeError("QUEUE is FULL")
-        
-        self.__taskQueue.enqueue((task, args, kwargs))
-        self.__startThreadForTask(task)
-
-    
-    def __startThreadForTask(self, task) -> None:
-        if threading.active_count() - 1 < self.maxThreads:        
-            thread = threading.Thread(
-                target=self.__executeTask, 
-                args = (task,),
-                daemon=True
-            )
+        self.maxPending = max_pending if max_pending is not None else 4 * size
+        self._log = logger
+
+        self._condition = threading.Condition()
+        self._notFull = threading.Condition(self._condition)
+        self._tasks: Deque[_Task] = deque()
+        self._running = True
+        self._stopped = threading.Event()
+
+        # Deadlines of timed jobs, watched by one thread.
+        self._deadlines: List[Tuple[float, int, Future]] = []
+        self._counter = itertools.count()
+        self._watchdogCondition = threading.Condition()
+
+        self._services: Dict[str, _Service] = {}
+        self._servicesLock = threading.Lock()
 
+        self.threads = [
+            threading.Thread(target = self.__worker, name = f"pool-worker-{i}", daemon = True)
+            for i in range(size)
+        ]
+        for thread in self.threads:
             thread.start()
-            self.threads.append(thread)
+
+        self._watchdog = threading.Thread(target = self.__watchDeadlines, name = "pool-watchdog", daemon = True)
+        self._watchdog.start()
+
+
+    # ------- Private Methods -------
+    def __writeLog(self, level: str, message: str) -> None:
+        if self._log is not None:
+            self._log.write_log("Logs/threadManager.log", level, message)
 
 
-    def __executeTask(self, task):
+    @staticmethod
+    def __resolve(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """
+        @brief Completes a future unless the watchdog or a cancel got there first.
+        """
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+
+    def __dequeue(self, task: _Task, future: Future) -> None:
+        """
+        @brief Done-callback of queued futures: a job cancelled before it started gives its queue slot back.
+        """
+        if not future.cancelled():
+            return
+        with self._condition:
+            try:
+                self._tasks.remove(task)
+            except ValueError:
+                return  # already taken by a worker or by shutdown()
+            self._notFull.notify()
+
+
+    def __worker(self) -> None:
         while True:
-            if self.__taskQueue.isEmpty():
-                break
-            func, args, kwargs = self.__taskQueue.dequeue()
+            with self._condition:
+                while not self._tasks and self._running:
+                    self._condition.wait()
+                if not self._tasks:
+                    return
+                task = self._tasks.popleft()
+                self._notFull.notify()
+
+            if task.deadline is not None and time.monotonic() >= task.deadline:
+                self.__resolve(task.future, error = TimeoutError("Task expired before it started"))
+                continue
+            if not task.future.set_running_or_notify_cancel():
+                continue
+
             try:
-                result = task(*args, **kwargs)
-                with self._lock:
-                    self.__completeTaskQueue.enqueue(("SUCCESS", result))
-            except Exception as e:
-                with self._lock:
-                    self.__completeTaskQueue.enqueue(("ERROR", e))
-        
-    def __getCompletedTask(self):
-        if not self.__completeTaskQueue.isEmpty():
-            return self.__completeTaskQueue.dequeue()
-        return None
-    
-    def __wait(self)-> None:
-        for thread in self.threads:
-            thread.join(timeout = self.timeout)
+                result = task.func(*task.args, **task.kwargs)
+            except BaseException as e:
+                self.__writeLog("ERROR", f"Task {getattr(task.func, '__name__', task.func)} failed: {e}")
+                self.__resolve(task.future, error = e)
+            else:
+                self.__resolve(task.future, result)
+
+
+    def __watchDeadlines(self) -> None:
+        with self._watchdogCondition:
+            while self._running or self._deadlines:
+                if not self._deadlines:
+                    self._watchdogCondition.wait()
+                    continue
+
+                deadline, _, future = self._deadlines[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._watchdogCondition.wait(delay)
+                    continue
+
+                heapq.heappop(self._deadlines)
+                if not future.done():
+                    self.__resolve(future, error = TimeoutError("Task timed out"))
+
+
+    def __superviseService(self, service: _Service) -> None:
+        backoff = self.RESTART_BACKOFF
+        while True:
+            try:
+                result = service.func(*service.args, **service.kwargs)
+            except BaseException as e:
+                if service.stopping or not service.restart:
+                    self.__writeLog("ERROR", f"Service {service.name} stopped with error: {e}")
+                    self.__resolve(service.future, error = e)
+                    return
+                self.__writeLog("ERROR", f"Service {service.name} crashed, restarting in {backoff:.1f}s: {e}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_RESTART_BACKOFF)
+                if service.stopping:
+                    self.__resolve(service.future, error = e)
+                    return
+            else:
+                self.__writeLog("INFO", f"Service {service.name} finished.")
+                self.__resolve(service.future, result)
+                return
+
+
+    # ------- Public Methods -------
+    def submit(self, func: Callable, *args, task_timeout: Optional[float] = None, admission_timeout: Optional[float] = None, **kwargs) -> Future:
+        """
+        @brief Queues a job for the workers.
+        @param func Callable to run.
+        @param task_timeout Seconds from submission before the future fails with TimeoutError
+               (default: the pool timeout).
+        @param admission_timeout Seconds to wait for room in the queue; None waits forever, 0 never waits.
+        @return Future of the call; cancel() removes a job that has not started.
+        @throws RuntimeError If the pool is shut down or the queue stays full.
+        """
+        timeout = task_timeout if task_timeout is not None else self.timeout
+        future: Future = Future()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("ThreadManager is shut down")
+            if not self._notFull.wait_for(lambda: len(self._tasks) < self.maxPending or not self._running, admission_timeout):
+                raise RuntimeError("QUEUE is FULL")
+            if not self._running:
+                raise RuntimeError("ThreadManager is shut down")
+
+            task = _Task(func, args, kwargs, future, deadline)
+            self._tasks.append(task)
+            self._condition.notify()
+            # The condition's lock is re-entrant, so cancel() may also be called with it held.
+            future.add_done_callback(functools.partial(self.__dequeue, task))
+
+        if deadline is not None:
+            with self._watchdogCondition:
+                heapq.heappush(self._deadlines, (deadline, next(self._counter), future))
+                self._watchdogCondition.notify()
+        return future
+
+
+    def map(self, func: Callable, *iterables, task_timeout: Optional[float] = None) -> List[Any]:
+        """
+        @brief Runs func over the iterables on the pool and returns the results in order.
+        """
+        futures = [self.submit(func, *args, task_timeout = task_timeout) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+
+    def startService(self, name: str, func: Callable, *args, stop: Optional[Callable[[], None]] = None, restart: bool = True, **kwargs) -> Future:
+        """
+        @brief Runs a long-running function on its own supervised thread.
+        @param name Unique service name (also the thread name).
+        @param func Function that runs until the service ends.
+        @param stop Optional callable that asks func to return; used by shutdown().
+        @param restart Restart func with backoff if it raises.
+        @return Future resolved when the service ends for good.
+        """
+        with self._servicesLock:
+            if not self._running:
+                raise RuntimeError("ThreadManager is shut down")
+            if name in self._services and not self._services[name].future.done():
+                raise ValueError(f"Service {name} is already running")
+
+            service = _Service(name, func, args, kwargs, stop, restart)
+            service.thread = threading.Thread(target = self.__superviseService, args = (service,), name = name, daemon = True)
+            self._services[name] = service
+
+        service.thread.start()
+        self.__writeLog("INFO", f"Service {name} started.")
+        return service.future
+
+
+    def services(self) -> Dict[str, bool]:
+        """
+        @brief Returns each service name with whether it is still running.
+        """
+        with self._servicesLock:
+            return {name: not service.future.done() for name, service in self._services.items()}
+
+
+    def pending(self) -> int:
+        """
+        @brief Number of jobs waiting for a worker.
+        """
+        with self._condition:
+            return len(self._tasks)
+
+
+    def waitServices(self, timeout: Optional[float] = None) -> bool:
+        """
+        @brief Blocks until every service has ended.
+        @return True if all services ended, False on timeout.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._servicesLock:
+            services = list(self._services.values())
+
+        for service in services:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            service.thread.join(remaining)
+            if service.thread.is_alive():
+                return False
+        return True
+
 
-    
-    def runThreads(self):
-        self.__wait()
-        x = []
-        for status, result in iter(self.__getCompletedTask, None):
-            if status == "SUCCESS":
-                x.append(result)
-        
-        return x
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False, timeout: Optional[float] = None) -> None:
+        """
+        @brief Stops accepting work, asks services to stop and lets the workers finish.
+        @param wait Join the workers and services.
+        @param cancel_pending Cancel jobs that have not started instead of running them.
+        @param timeout Maximum seconds to wait for each thread.
+        """
+        with self._condition:
+            self._running = False
+            self._stopped.set()
+            if cancel_pending:
+                while self._tasks:
+                    self._tasks.popleft().future.cancel()
+            self._condition.notify_all()
+            # Callers blocked on admission wait on their own condition; they wake up and raise.
+            self._notFull.notify_all()
 
-    
-    
+        with self._servicesLock:
+            services = list(self._services.values())
+        for service in services:
+            service.stopping = True
+            if service.stop is not None and not service.future.done():
+                try:
+                    service.stop()
+                except Exception as e:
+                    self.__writeLog("ERROR", f"Failed to stop service {service.name}: {e}")
 
+        with self._watchdogCondition:
+            self._watchdogCondition.notify()
 
-    
+        if wait:
+            for thread in self.threads:
+                thread.join(timeout)
+            for service in services:
+                service.thread.join(timeout)
@@ -0,0 +1,266 @@
+"""
+@file Tracer.py
+@brief Lightweight latency tracing of the voice-command cycle.
+
+Each command gets a trace (with its own id) that collects spans timed with
+time.perf_counter_ns. The active trace travels in a context variable, so
+spans opened anywhere below the cycle (microphone, matcher, database, LEDs)
+attach to it, and code running outside a trace pays only for one lookup.
+Finished traces are kept in a fixed-size ring and can be exported as Chrome
+trace-event JSON (chrome://tracing, Perfetto).
+"""
+from modules.Metrics import registry
+
+from contextvars import ContextVar
+from collections import deque
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, List, Optional
+import itertools
+import os
+import threading
+import time
+
+
+_STAGE_SECONDS = registry.histogram("echo_stage_seconds", "Duration of the traced stages of a command.", ("stage",))
+_TRACE_SECONDS = registry.histogram("echo_command_seconds", "End-to-end duration of a command, from the input event.", ("source",))
+
+
+class Span:
+    """
+    @class Span
+    @brief One timed operation inside a trace.
+    """
+    __slots__ = ("name", "start_ns", "end_ns", "thread_id", "thread_name")
+
+    def __init__(self, name: str, start_ns: int, end_ns: int) -> None:
+        thread = threading.current_thread()
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """
+    @class Trace
+    @brief The spans of one command, from the input event to the LED update.
+    """
+    __slots__ = ("trace_id", "name", "attributes", "start_ns", "end_ns", "spans")
+
+    def __init__(self, trace_id: int, name: str, start_ns: int, attributes: Dict[str, Any]) -> None:
+        self.trace_id = trace_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.spans: List[Span] = []
+
+
+    def add_span(self, name: str, start_ns: int, end_ns: int) -> None:
+        """
+        @brief Records a span; may be called from any thread, also after the trace ended
+               (e.g. when an LED transmission completes later).
+        """
+        self.spans.append(Span(name, start_ns, end_ns))
+        _STAGE_SECONDS.labels(name).observe((end_ns - start_ns) / 1e9)
+
+
+    @property
+    def duration_ms(self) -> float:
+        end = max([self.end_ns or self.start_ns] + [span.end_ns for span in self.spans])
+        return (end - self.start_ns) / 1e6
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attributes": self.attributes,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "offset_ms": round((span.start_ns - self.start_ns) / 1e6, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                    "thread": span.thread_name,
+                }
+                for span in sorted(self.spans, key = lambda s: s.start_ns)
+            ],
+        }
+
+
+class _SpanContext:
+    __slots__ = ("_trace", "_name", "_start")
+
+    def __init__(self, trace: Optional[Trace], name: str) -> None:
+        self._trace = trace
+        self._name = name
+
+    def __enter__(self) -> "_SpanContext":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._trace.add_span(self._name, self._start, time.perf_counter_ns())
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullContext":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL = _NullContext()
+
+
+class Tracer:
+    """
+    @class Tracer
+    @brief Creates traces, hands out spans and keeps the most recent traces in a ring.
+    """
+
+    def __init__(self, capacity: int = 200) -> None:
+        """
+        @param capacity Number of finished traces kept.
+        """
+        self._current: ContextVar[Optional[Trace]] = ContextVar("trace", default = None)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._traces: Deque[Trace] = deque(maxlen = capacity)
+
+
+    def current(self) -> Optional[Trace]:
+        """
+        @brief The trace active in this context, or None.
+        """
+        return self._current.get()
+
+
+    def trace(self, name: str, start_ns: Optional[int] = None, **attributes) -> "_TraceContext":
+        """
+        @brief Context manager that runs its body inside a new trace.
+        @param name Trace name, e.g. "voice-command".
+        @param start_ns Earlier perf_counter_ns start (e.g. the button edge); defaults to now.
+        @param attributes Extra values shown with the trace.
+        """
+        return _TraceContext(self, name, start_ns, attributes)
+
+
+    def span(self, name: str):
+        """
+        @brief Context manager timing its body as a span of the current trace (no-op outside a trace).
+        """
+        trace = self._current.get()
+        return _SpanContext(trace, name) if trace is not None else _NULL
+
+
+    def _begin(self, name: str, start_ns: Optional[int], attributes: Dict[str, Any]) -> Trace:
+        return Trace(next(self._ids), name, start_ns if start_ns is not None else time.perf_counter_ns(), attributes)
+
+
+    def _finish(self, trace: Trace) -> None:
+        trace.end_ns = time.perf_counter_ns()
+        _TRACE_SECONDS.labels(trace.attributes.get("source", trace.name)).observe((trace.end_ns - trace.start_ns) / 1e9)
+        with self._lock:
+            self._traces.append(trace)
+
+
+    def recent(self, limit: Optional[int] = None) -> List[Trace]:
+        """
+        @brief Finished traces, newest first.
+        """
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        return traces[:limit] if limit else traces
+
+
+    def chrome_trace(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        @brief Recent traces in Chrome trace-event format (complete "X" events, microseconds).
+        """
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        threads: Dict[int, str] = {}
+
+        for trace in self.recent(limit):
+            events.append({
+                "name": trace.name, "cat": "trace", "ph": "X", "pid": pid, "tid": 0,
+                "ts": trace.start_ns / 1000, "dur": trace.duration_ms * 1000,
+                "args": dict(trace.attributes, trace_id = trace.trace_id),
+            })
+            for span in trace.spans:
+                threads[span.thread_id] = span.thread_name
+                events.append({
+                    "name": span.name, "cat": "span", "ph": "X", "pid": pid, "tid": span.thread_id,
+                    "ts": span.start_ns / 1000, "dur": (span.end_ns - span.start_ns) / 1000,
+                    "args": {"trace_id": trace.trace_id},
+                })
+
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "commands"}})
+        for thread_id, thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class _TraceContext:
+    __slots__ = ("_tracer", "_name", "_start_ns", "_attributes", "_trace", "_token")
+
+    def __init__(self, tracer: Tracer, name: str, start_ns: Optional[int], attributes: Dict[str, Any]) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._start_ns = start_ns
+        self._attributes = attributes
+
+    def __enter__(self) -> Trace:
+        self._trace = self._tracer._begin(self._name, self._start_ns, self._attributes)
+        self._token = self._tracer._current.set(self._trace)
+        return self._trace
+
+    def __exit__(self, *exc) -> None:
+        self._tracer._current.reset(self._token)
+        self._tracer._finish(self._trace)
+
+
+# Process-wide tracer shared by the instrumented modules.
+tracer = Tracer()
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """
+    @brief Decorator recording every call of a function as a span of the current trace.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = tracer._current.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                trace.add_span(name, start, time.perf_counter_ns())
+        return wrapper
+    return decorator
+
+
+def trace_future(future, name: str) -> None:
+    """
+    @brief Records a span from now until a concurrent future completes (e.g. an RS485 transmission).
+    """
+    trace = tracer._current.get()
+    if trace is None or future is None:
+        return
+    start = time.perf_counter_ns()
+    future.add_done_callback(lambda _: trace.add_span(name, start, time.perf_counter_ns()))
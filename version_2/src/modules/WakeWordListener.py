@@ -0,0 +1,196 @@
+from modules.Metrics import registry
+from modules.Queue import Queue
+from typing import Callable, List, Optional
+from collections import deque
+from queue import Empty
+import threading
+import time
+
+import numpy as np
+
+
+class WakeWordListener:
+    """
+    @class WakeWordListener
+    @brief Always-on listener that hands speech following the wake word to a callback.
+
+    Keeps a rolling ring buffer of audio chunks and runs the keyword spotter on a
+    sliding window. Spotter evaluations are rate-limited by a CPU budget so the
+    listener only ever takes a fixed slice of one core.
+
+    A reader thread only moves chunks from the input stream into a bounded
+    drop-oldest queue, so a slow evaluation never stalls the device; chunks
+    lost that way are counted as overruns.
+    """
+    BACKLOG_TIME = 2.0
+
+    def __init__(self, logger, microphone, spotter, on_command: Callable[[List[bytes]], None],
+                 preroll: float = 1.0, eval_interval: float = 0.1, cpu_budget: float = 0.15,
+                 silence_level: float = 500.0, silence_time: float = 0.8, max_command_time: float = 5.0) -> None:
+        """
+        @brief Initializes the listener.
+        @param logger Logger instance for writing logs.
+        @param microphone MicroPhone instance providing the input stream.
+        @param spotter KeywordSpotter instance.
+        @param on_command Callback receiving the pre-roll plus the following speech as chunk frames.
+        @param preroll Seconds of audio kept in the ring buffer before the detection.
+        @param eval_interval Seconds of audio between spotter evaluations.
+        @param cpu_budget Fraction of one core the spotter may use on average.
+        @param silence_level RMS below which a chunk is considered silence.
+        @param silence_time Seconds of silence that end the command.
+        @param max_command_time Maximum seconds recorded after the detection.
+        """
+        self._log = logger
+        self._microphone = microphone
+        self._spotter = spotter
+        self._on_command = on_command
+
+        chunk_time = microphone.chunk / microphone.rate
+        self._ring: deque = deque(maxlen = max(1, int(preroll / chunk_time)))
+        self._eval_chunks = max(1, int(eval_interval / chunk_time))
+        self._silence_chunks = max(1, int(silence_time / chunk_time))
+        self._max_chunks = max(1, int(max_command_time / chunk_time))
+        self._silence_level = silence_level
+
+        self._cpu_budget = cpu_budget
+        self._cpu_credit = cpu_budget
+        self._last_refill = time.monotonic()
+
+        self._chunks = Queue(max(1, int(self.BACKLOG_TIME / chunk_time)), Queue.DROP_OLDEST)
+        self._stop_event = threading.Event()
+
+        registry.function("echo_audio_overruns_total", "Audio chunks dropped because wake-word analysis fell behind.",
+                          lambda: self.overruns, kind = "counter")
+
+
+    @property
+    def overruns(self) -> int:
+        """
+        @brief Number of audio chunks dropped because the analysis fell behind.
+        """
+        return self._chunks.stats()["dropped"]
+
+
+    def _rms(self, pcm: bytes) -> float:
+        """
+        @brief Root mean square level of a chunk of 16-bit PCM.
+        """
+        samples = np.frombuffer(pcm, dtype = np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+
+    def _refill_credit(self) -> None:
+        """
+        @brief Adds CPU credit proportional to elapsed wall time, capped at one second's budget.
+        """
+        now = time.monotonic()
+        self._cpu_credit = min(self._cpu_budget, self._cpu_credit + (now - self._last_refill) * self._cpu_budget)
+        self._last_refill = now
+
+
+    def _spend(self, started: float) -> None:
+        """
+        @brief Charges the thread CPU time used since `started` against the budget.
+        """
+        self._cpu_credit -= time.thread_time() - started
+
+
+    def _read_stream(self, stream) -> None:
+        """
+        @brief Reader thread: queues every chunk read from the input stream.
+        """
+        try:
+            while not self._stop_event.is_set():
+                self._chunks.put(stream.read(self._microphone.chunk, exception_on_overflow = False))
+        except Exception as e:
+            self._log.write_log("Logs/errorEvents.log", "ERROR", f"Audio input failed: {e}")
+            self._stop_event.set()
+
+
+    def _next_chunks(self, max_chunks: int) -> List[bytes]:
+        """
+        @brief Waits for queued audio; returns an empty list if none arrives within a second.
+        """
+        try:
+            return self._chunks.get_many(max_chunks, timeout = 1.0)
+        except Empty:
+            return []
+
+
+    def _capture_command(self) -> List[bytes]:
+        """
+        @brief Records the speech following the wake word until silence or the time limit.
+        @return Pre-roll frames followed by the captured frames.
+        """
+        frames = list(self._ring)
+        silent = 0
+        for _ in range(self._max_chunks):
+            chunk = self._next_chunks(1)
+            if not chunk:
+                break
+            data = chunk[0]
+            frames.append(data)
+            silent = silent + 1 if self._rms(data) < self._silence_level else 0
+            if silent >= self._silence_chunks:
+                break
+        return frames
+
+
+    def run(self) -> None:
+        """
+        @brief Listens until stop() is called, dispatching each command to the callback.
+        """
+        audioInterface, stream = self._microphone.openInputStream()
+        reader = threading.Thread(target = self._read_stream, args = (stream,), name = "wake-word-reader", daemon = True)
+        reader.start()
+        self._log.write_log("Logs/audioTranscription.log", "INFO", "Wake-word listener started.")
+        pending = 0
+
+        try:
+            while not self._stop_event.is_set():
+                chunks = self._next_chunks(self._eval_chunks - pending)
+                started = time.thread_time()
+                for data in chunks:
+                    self._ring.append(data)
+                    self._spotter.push(data)
+                self._spend(started)
+
+                pending += len(chunks)
+                if pending < self._eval_chunks:
+                    continue
+                pending = 0
+
+                self._refill_credit()
+                if self._cpu_credit <= 0:
+                    continue
+
+                started = time.thread_time()
+                distance = self._spotter.detect()
+                self._spend(started)
+
+                if distance is None:
+                    continue
+
+                self._log.write_log("Logs/audioTranscription.log", "INFO", f"Wake word detected (distance: {distance:.2f}).")
+                frames = self._capture_command()
+                self._ring.clear()
+                self._spotter.reset()
+
+                try:
+                    self._on_command(frames)
+                except Exception as e:
+                    self._log.write_log("Logs/errorEvents.log", "ERROR", f"Wake-word command handling failed: {e}")
+        finally:
+            self._stop_event.set()
+            reader.join()
+            stream.stop_stream()
+            stream.close()
+            audioInterface.terminate()
+            self._log.write_log("Logs/audioTranscription.log", "INFO", "Wake-word listener stopped.")
+
+
+    def stop(self) -> None:
+        """
+        @brief Requests the listening loop to finish after the current chunk.
+        """
+        self._stop_event.set()
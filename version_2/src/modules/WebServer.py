@@ -1,34 +1,112 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, Response, abort, jsonify, render_template, request, redirect, url_for
+from jinja2 import ChoiceLoader, DictLoader
 from modules.FileManager import FileManager
 from modules.DataBase import DataBase
+from modules.AsyncRuntime import BoundedExecutor
+from modules.AsyncWsgiServer import AsyncWsgiServer
+from modules.EventBroadcaster import EventStream, events
+from modules.GzipMiddleware import GzipMiddleware
+from modules.Metrics import registry
+from modules.PageCache import PageCache
+from modules.Profiler import SamplingProfiler
+from modules.SuggestIndex import suggestions
+from modules.Tracer import tracer
+from urllib.parse import urlencode
+import asyncio
+import base64
+import hmac
+import sqlite3
+import zlib
+
+
+TRACES_PAGE = """<!doctype html>
+<title>Traces</title>
+<h1>Recent command traces</h1>
+<p><a href="{{ url_for('tracesJson') }}">Chrome trace JSON</a> (open in chrome://tracing or Perfetto)</p>
+{% for trace in traces %}
+<h3>#{{ trace.trace_id }} {{ trace.name }} {{ trace.attributes }} &mdash; {{ trace.duration_ms }} ms</h3>
+<table border="1" cellpadding="3">
+<tr><th>span</th><th>offset (ms)</th><th>duration (ms)</th><th>thread</th></tr>
+{% for span in trace.spans %}<tr><td>{{ span.name }}</td><td>{{ span.offset_ms }}</td><td>{{ span.duration_ms }}</td><td>{{ span.thread }}</td></tr>
+{% endfor %}</table>
+{% else %}<p>No traces yet.</p>{% endfor %}
+"""
 
 class WebServer:
-    def __init__(self, host, port, logger, filemanager):
+    # Longest profiling run accepted by /admin/profile, in seconds.
+    MAX_PROFILE_SECONDS = 120
+    # Time left under request_timeout for building the profile response after sampling.
+    PROFILE_RESPONSE_MARGIN = 5.0
+    # Fields of a component in /api/components, in row order.
+    API_FIELDS = ('id', 'name', 'position', 'description')
+    API_PAGE_SIZE = 50
+    API_MAX_PAGE_SIZE = 500
+    SUGGEST_LIMIT = 10
+    SUGGEST_MAX_LIMIT = 50
+
+    def __init__(self, host, port, logger, filemanager, admin_token=None, threads=8, keep_alive=15.0,
+                 request_timeout=30.0, gzip=True, page_cache_bytes=2 * 1024 * 1024, debug=False):
+        """
+        @param admin_token Token required by the /admin routes (None: local requests only).
+        @param threads Worker threads running requests in production mode.
+        @param keep_alive Seconds an idle keep-alive connection stays open.
+        @param request_timeout Seconds a request may take to arrive and to start its response.
+        @param gzip Compress text responses for clients that accept gzip.
+        @param page_cache_bytes Memory budget of the rendered catalog pages (0 disables the cache).
+        @param debug Run Flask's development server with the debugger instead (never in the field).
+        """
         self.app = Flask(__name__)
+        if gzip:
+            self.app.wsgi_app = GzipMiddleware(self.app.wsgi_app)
+        # Built-in pages are compiled by Jinja on first use and cached like the files in templates/.
+        self.app.jinja_loader = ChoiceLoader([self.app.jinja_loader, DictLoader({'traces.html': TRACES_PAGE})])
         self.__host = host
         self.__port = port
 
         self.__log = logger
+        self.__threads = threads
+        self.__keep_alive = keep_alive
+        self.__request_timeout = request_timeout
+        self.__debug = debug
+        self.__loop = None
+        self.__stopping = None
+        # Admin routes need this token; without one they only answer local requests.
+        self.__admin_token = admin_token
+        self.__profiler = SamplingProfiler()
+        # Rendered catalog pages, reused until the catalog changes.
+        self.__gzip = gzip
+        self.__pages = PageCache(page_cache_bytes, compress=gzip) if page_cache_bytes > 0 else None
 
         self.__db = DataBase(logger, filemanager)
+        # Search-as-you-type index, loaded once and then updated by every write below.
+        suggestions.load(self.__db.get_all_components())
 
         self.app.route('/')(self.index)
         self.app.route('/add', methods=['POST'])(self.addCommand)
         self.app.route('/delete/<int:index>', methods=['POST'])(self.removeCommand)
         self.app.route('/search', methods=['GET'])(self.searchCommand)
+        self.app.route('/traces', methods=['GET'])(self.traces)
+        self.app.route('/traces.json', methods=['GET'])(self.tracesJson)
+        self.app.route('/metrics', methods=['GET'])(self.metrics)
+        self.app.route('/admin/profile', methods=['GET'])(self.profile)
+        self.app.route('/api/components', methods=['GET'])(self.apiComponents)
+        self.app.route('/api/components/batch', methods=['POST'])(self.apiComponentsBatch)
+        self.app.route('/api/suggest', methods=['GET'])(self.apiSuggest)
+        self.app.route('/events', methods=['GET'])(self.events)
 
 
     def index(self):
-        componentes = self.__db._getAllCommand()
-        return render_template('index.html', components=componentes) 
+        return self.__cachedPage(lambda: render_template('index.html', components=self.__db.get_all_components()))
 
 
     def addCommand(self):
         componentName = request.form['name']
         value = request.form['position']
         description = request.form['description']
-        self.__db._insertCommand(componentName, value, description)
-        self.__log.writeLog("Logs/webInterface.log","INFO", f"Command added: {componentName} with position {value}. Description: {description}")
+        if self.__db.insert_component(componentName, value, description):
+            suggestions.add(componentName, self.__db.get_position(componentName), description)
+        self.__invalidatePages()
+        self.__log.write_log("Logs/webInterface.log","INFO", f"Command added: {componentName} with position {value}. Description: {description}")
         return redirect(url_for('index'))
 
 
@@ -36,19 +114,294 @@ class WebServer:
         componentName = request.form['name']
 
 
-        self.__db._deleteCommand(componentName)
-        self.__log.writeLog("Logs/webInterface.log", "INFO", f"Command removed: {componentName}")
+        if self.__db.delete_component(componentName):
+            suggestions.remove(componentName)
+        self.__invalidatePages()
+        self.__log.write_log("Logs/webInterface.log", "INFO", f"Command removed: {componentName}")
         return redirect(url_for('index'))
 
 
     def searchCommand(self):
         command = request.args.get('search')
         
-        self.__log.writeLog("Logs/webInterface.log", "INFO", f"Search command executed: '{command}'")
+        self.__log.write_log("Logs/webInterface.log", "INFO", f"Search command executed: '{command}'")
+        suggestions.record_hit(command)
 
-        components = self.__db._searchCommand(command)  # Faz a pesquisa no banco de dados
-        return render_template('index.html', components=components) 
+        # Faz a pesquisa no banco de dados (só quando a página não está em cache)
+        return self.__cachedPage(lambda: render_template(
+            'index.html', components=[(row[1], row[2], row[3]) for row in self.__db.search_component(command)]))
     
     
+    def traces(self):
+        limit = request.args.get('limit', 50, type=int)
+        return render_template('traces.html', traces=[trace.to_dict() for trace in tracer.recent(limit)])
+
+
+    def tracesJson(self):
+        limit = request.args.get('limit', type=int)
+        response = jsonify(tracer.chrome_trace(limit))
+        response.headers['Content-Disposition'] = 'attachment; filename=traces.json'
+        return response
+
+
+    def __catalogEtag(self, generation):
+        """
+        Strong validator of a catalog response: the boot id and catalog generation identify the
+        data, the normalized query string identifies the page, fields and filters.
+        """
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return f"{DataBase.BOOT_ID}-{generation}-{zlib.crc32(query.encode('utf-8')):08x}"
+
+
+    def __cachedPage(self, render):
+        """
+        Serves a catalog page from the page cache, rendering it only after the catalog changed.
+        The cache key is the path and the normalized query string; clients revalidate with the ETag.
+        """
+        generation = DataBase.generation()
+        etag = self.__catalogEtag(generation)
+        matched = self.__matchingEtag(etag)
+        if matched is not None:
+            return self.__notModified(matched)
+
+        if self.__pages is None:
+            response = Response(render(), mimetype='text/html')
+        else:
+            key = (request.path, urlencode(sorted(request.args.items(multi=True))))
+            page = self.__pages.get(generation, key)
+            if page is None:
+                page = self.__pages.put(generation, key, render().encode('utf-8'))
+
+            if page.gzipped is not None and 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+                # Already compressed: GzipMiddleware passes responses with a Content-Encoding through.
+                response = Response(page.gzipped, mimetype='text/html')
+                response.headers['Content-Encoding'] = 'gzip'
+                etag += GzipMiddleware.ETAG_SUFFIX
+            else:
+                response = Response(page.body, mimetype='text/html')
+            if self.__gzip:
+                response.vary.add('Accept-Encoding')
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+
+    def __invalidatePages(self):
+        if self.__pages is not None:
+            self.__pages.invalidate()
+
+
+    def __matchingEtag(self, etag):
+        """
+        The validator from If-None-Match naming a current representation: the plain one or its gzip variant.
+        """
+        tags = request.if_none_match
+        for candidate in (etag, etag + GzipMiddleware.ETAG_SUFFIX):
+            if tags.contains_weak(candidate):
+                return candidate
+        return None
+
+
+    def __notModified(self, etag):
+        # The 304 carries the validator the client holds, so it keeps the representation it cached.
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+    @staticmethod
+    def __encodeCursor(last_id):
+        return base64.urlsafe_b64encode(str(last_id).encode('ascii')).decode('ascii').rstrip('=')
+
+
+    @staticmethod
+    def __decodeCursor(cursor):
+        if not cursor:
+            return 0
+        try:
+            return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii'))
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+
+
+    def apiComponents(self):
+        """
+        Pages through the catalog as JSON.
+        ?limit= page size, ?cursor= next_cursor of the previous page, ?fields= comma-separated subset of
+        API_FIELDS, ?q= text in the name or description, ?position= exact position.
+        Answers 304 without touching the database when If-None-Match holds the current ETag.
+        """
+        generation = DataBase.generation()
+        etag = self.__catalogEtag(generation)
+        matched = self.__matchingEtag(etag)
+        if matched is not None:
+            return self.__notModified(matched)
+
+        try:
+            after = self.__decodeCursor(request.args.get('cursor'))
+            limit = min(max(request.args.get('limit', self.API_PAGE_SIZE, type=int), 1), self.API_MAX_PAGE_SIZE)
+            fields = [f for f in request.args.get('fields', '').split(',') if f] or list(self.API_FIELDS)
+            unknown = set(fields) - set(self.API_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            position = request.args.get('position')
+            position = int(position) if position is not None else None
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+
+        rows = self.__db.list_components(after, limit + 1, request.args.get('q'), position)
+        items = [{name: value for name, value in zip(self.API_FIELDS, row) if name in fields} for row in rows[:limit]]
+        next_cursor = self.__encodeCursor(rows[limit - 1][0]) if len(rows) > limit else None
+
+        response = jsonify(items=items, next_cursor=next_cursor, generation=generation)
+        response.set_etag(etag)
+        # Clients may keep the response but must revalidate it, which costs a 304.
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+
+    def apiComponentsBatch(self):
+        """
+        Adds and deletes components in one transaction.
+        Body: {"add": [{"name", "position", "description"}, ...], "delete": ["name", ...]}.
+        """
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify(error='Expected a JSON object'), 400
+        try:
+            add = [(str(item['name']).strip(), int(item['position']), str(item.get('description', '')))
+                   for item in payload.get('add', [])]
+            delete = [str(name) for name in payload.get('delete', [])]
+            if any(not name for name, _, _ in add):
+                raise ValueError('Component names cannot be empty')
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return jsonify(error=f'Invalid batch: {e}'), 400
+
+        try:
+            inserted, deleted = self.__db.apply_batch(add, delete)
+        except sqlite3.Error as e:
+            return jsonify(error=f'Batch rolled back: {e}'), 500
+        for name in delete:
+            suggestions.remove(name)
+        for name, position, description in add:
+            suggestions.add(name, position, description)
+        self.__invalidatePages()
+
+        self.__log.write_log("Logs/webInterface.log", "INFO", f"Batch update: {inserted} added, {deleted} deleted.")
+        return jsonify(inserted=inserted, deleted=deleted, generation=DataBase.generation())
+
+
+    def apiSuggest(self):
+        """
+        Search-as-you-type: components with a name or description word starting with each word of ?q=,
+        most asked-for first. ?limit= caps the results. Served from memory, never from the database.
+        """
+        limit = min(max(request.args.get('limit', self.SUGGEST_LIMIT, type=int), 1), self.SUGGEST_MAX_LIMIT)
+        query = request.args.get('q', '')
+        items = [{'name': name, 'position': position, 'description': description, 'hits': hits}
+                 for name, position, description, hits in suggestions.suggest(query, limit)]
+        return jsonify(query=query, items=items)
+
+
+    def events(self):
+        """
+        Server-Sent Events stream of recognized commands ("command") and LED state changes ("leds").
+        """
+        last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            last_id = int(last_id) if last_id else None
+        except ValueError:
+            last_id = None
+
+        response = Response(EventStream(events, last_id), mimetype='text/event-stream', direct_passthrough=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+
+    def metrics(self):
+        return Response(registry.expose(), mimetype=None, content_type=registry.CONTENT_TYPE)
+
+
+    def __checkAdmin(self):
+        if self.__admin_token:
+            supplied = request.headers.get('X-Admin-Token') or request.args.get('token', '')
+            if not hmac.compare_digest(supplied, self.__admin_token):
+                abort(403)
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            abort(403)
+
+
+    def __maxProfileSeconds(self):
+        """
+        Longest run that still answers before the server gives up on the request with a 503
+        (the sampler would go on regardless, and hold off the next run with a 409).
+        """
+        if self.__debug or self.__request_timeout is None:
+            return self.MAX_PROFILE_SECONDS
+        return min(self.MAX_PROFILE_SECONDS, max(self.__request_timeout - self.PROFILE_RESPONSE_MARGIN, 0.1))
+
+
+    def profile(self):
+        """
+        Samples every thread for ?seconds=N (default 10) and returns, by ?format=:
+        collapsed (flame graph input, default), pstats (for pstats/snakeviz) or json (summary).
+        ?allocations=1 adds a tracemalloc snapshot of the same window to the json summary.
+        In production mode the run is shortened to finish within request_timeout.
+        """
+        self.__checkAdmin()
+        seconds = min(max(request.args.get('seconds', 10.0, type=float), 0.1), self.__maxProfileSeconds())
+        output = request.args.get('format', 'collapsed')
+        if output not in ('collapsed', 'pstats', 'json'):
+            abort(400)
+
+        self.__log.write_log("Logs/webInterface.log", "INFO", f"Profiling for {seconds:g}s ({output}).")
+        try:
+            result = self.__profiler.profile(seconds, allocations=request.args.get('allocations', type=int) == 1)
+        except RuntimeError as e:
+            return jsonify(error=str(e)), 409
+
+        if output == 'json':
+            return jsonify(result.summary())
+        if output == 'pstats':
+            response = Response(result.pstats(), mimetype='application/octet-stream')
+            response.headers['Content-Disposition'] = 'attachment; filename=profile.pstats'
+            return response
+        response = Response(result.collapsed(), mimetype='text/plain')
+        response.headers['Content-Disposition'] = 'attachment; filename=profile.collapsed'
+        return response
+
+
     def run(self):
-        self.app.run(host=self.__host, port=self.__port, debug=True)
+        if self.__debug:
+            # The reloader would start a second process; the server runs as a service thread.
+            self.app.run(host=self.__host, port=self.__port, debug=True, use_reloader=False, threaded=True)
+            return
+        asyncio.run(self.__serve())
+
+
+    async def __serve(self):
+        """
+        Production mode: connections and keep-alive on an asyncio loop, Flask on a pool of worker threads.
+        """
+        self.__loop = asyncio.get_running_loop()
+        self.__stopping = asyncio.Event()
+        executor = BoundedExecutor("web", self.__threads, 2 * self.__threads)
+        server = AsyncWsgiServer(self.app, self.__host, self.__port, executor, self.__log,
+                                 keep_alive_timeout=self.__keep_alive, request_timeout=self.__request_timeout)
+        await server.start()
+        try:
+            await self.__stopping.wait()
+        finally:
+            await server.close()
+            executor.shutdown(wait=False)
+            self.__loop = None
+
+
+    def stop(self):
+        loop = self.__loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self.__stopping.set)
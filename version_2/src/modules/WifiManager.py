@@ -1,5 +1,4 @@
 import socket
-import wifi
 import time
 import subprocess
 import platform
@@ -0,0 +1,150 @@
+"""
+@file support.py
+@brief Helpers shared by the tests: a live AsyncWsgiServer on a background loop and a raw HTTP/1.1 reader.
+"""
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import os
+import socket
+import sys
+import threading
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from modules.AsyncRuntime import BoundedExecutor
+from modules.AsyncWsgiServer import AsyncWsgiServer
+
+
+class RecordingLogger:
+    """
+    @brief Logger stand-in keeping the entries in memory.
+    """
+
+    def __init__(self) -> None:
+        self.entries: List[Tuple[str, str, str]] = []
+
+
+    def write_log(self, file_path: str, level: str, message: str) -> None:
+        self.entries.append((file_path, level, message))
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class LiveServer:
+    """
+    @brief Runs an AsyncWsgiServer with a BoundedExecutor on its own loop thread.
+    """
+
+    def __init__(self, app, workers: int = 2, request_timeout: Optional[float] = None) -> None:
+        self.port = free_port()
+        self.logger = RecordingLogger()
+        self._app = app
+        self._workers = workers
+        self._request_timeout = request_timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target = self._loop.run_forever, daemon = True)
+        self.executor: Optional[BoundedExecutor] = None
+        self.server: Optional[AsyncWsgiServer] = None
+
+
+    def __enter__(self) -> "LiveServer":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(5)
+        return self
+
+
+    async def _start(self) -> None:
+        self.executor = BoundedExecutor("test-web", self._workers)
+        self.server = AsyncWsgiServer(self._app, "127.0.0.1", self.port, self.executor, self.logger,
+                                      keep_alive_timeout = 5.0, request_timeout = self._request_timeout)
+        await self.server.start()
+
+
+    def __exit__(self, *exc_info) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.close(), self._loop).result(5)
+        self.executor.shutdown(wait = False)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+
+
+    def connect(self) -> "Connection":
+        return Connection(socket.create_connection(("127.0.0.1", self.port), timeout = 5))
+
+
+class Connection:
+    """
+    @brief One client connection; reads responses strictly by their framing so excess bytes are noticed.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buffer = b""
+
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+    def send(self, method: str, path: str, headers: Optional[Dict[str, str]] = None, body: bytes = b"") -> None:
+        lines = [f"{method} {path} HTTP/1.1", "Host: localhost"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        self.sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+
+    def _fill(self) -> None:
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError("Connection closed by the server")
+        self.buffer += data
+
+
+    def _take(self, size: int) -> bytes:
+        while len(self.buffer) < size:
+            self._fill()
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+    def _line(self) -> bytes:
+        while b"\r\n" not in self.buffer:
+            self._fill()
+        line, self.buffer = self.buffer.split(b"\r\n", 1)
+        return line
+
+
+    def response(self, method: str = "GET") -> Tuple[int, Dict[str, str], bytes]:
+        """
+        @brief Reads one response.
+        @return (status code, headers with lower-case names, body).
+        """
+        while b"\r\n\r\n" not in self.buffer:
+            self._fill()
+        head, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status < 200 or status in (204, 304):
+            return status, headers, b""
+        if headers.get("transfer-encoding") == "chunked":
+            body = b""
+            while True:
+                size = int(self._line(), 16)
+                if size == 0:
+                    self._line()
+                    return status, headers, body
+                body += self._take(size)
+                self._line()
+        return status, headers, self._take(int(headers.get("content-length", "0")))
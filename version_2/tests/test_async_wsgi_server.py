@@ -0,0 +1,185 @@
+from support import LiveServer
+
+import threading
+import unittest
+
+
+def conditional_app(environ, start_response):
+    """
+    @brief Streams its body without a Content-Length, the way generator responses do.
+    """
+    path = environ["PATH_INFO"]
+    if path == "/etag":
+        if environ.get("HTTP_IF_NONE_MATCH") == '"v1"':
+            start_response("304 Not Modified", [("ETag", '"v1"')])
+            return iter([b""])
+        start_response("200 OK", [("ETag", '"v1"'), ("Content-Type", "text/plain")])
+        return iter([b"hello", b" world"])
+    if path == "/empty":
+        start_response("204 No Content", [])
+        return iter([b"ignored"])
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return iter([b"next"])
+
+
+class BodylessResponseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = LiveServer(conditional_app).__enter__()
+        self.connection = self.server.connect()
+
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.__exit__(None, None, None)
+
+
+    def test_conditional_get_on_keep_alive(self):
+        self.connection.send("GET", "/etag")
+        status, headers, body = self.connection.response()
+        self.assertEqual((status, body), (200, b"hello world"))
+
+        self.connection.send("GET", "/etag", {"If-None-Match": headers["etag"]})
+        status, headers, body = self.connection.response()
+        self.assertEqual(status, 304)
+        self.assertNotIn("transfer-encoding", headers)
+        self.assertEqual(headers["connection"], "keep-alive")
+
+        # A stray chunk terminator after the 304 would be read as the start of this response.
+        self.connection.send("GET", "/next")
+        status, _, body = self.connection.response()
+        self.assertEqual((status, body), (200, b"next"))
+        self.assertEqual(self.connection.buffer, b"")
+
+
+    def test_no_content_and_head_have_no_body(self):
+        self.connection.send("GET", "/empty")
+        status, headers, _ = self.connection.response()
+        self.assertEqual(status, 204)
+        self.assertNotIn("transfer-encoding", headers)
+
+        self.connection.send("HEAD", "/etag")
+        status, headers, _ = self.connection.response("HEAD")
+        self.assertEqual(status, 200)
+        self.assertNotIn("transfer-encoding", headers)
+
+        self.connection.send("GET", "/next")
+        self.assertEqual(self.connection.response()[2], b"next")
+        self.assertEqual(self.connection.buffer, b"")
+
+
+class HungHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.server = LiveServer(self.app, workers = 1, request_timeout = 0.2).__enter__()
+
+
+    def tearDown(self):
+        self.gate.set()
+        self.server.__exit__(None, None, None)
+
+
+    def app(self, environ, start_response):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            if environ["PATH_INFO"] == "/hang":
+                self.gate.wait(5)
+        finally:
+            with self.lock:
+                self.running -= 1
+        start_response("200 OK", [("Content-Length", "2")])
+        return [b"ok"]
+
+
+    def request(self, path):
+        connection = self.server.connect()
+        try:
+            connection.send("GET", path)
+            return connection.response()[0]
+        finally:
+            connection.close()
+
+
+    def test_timed_out_call_keeps_its_thread_slot(self):
+        self.assertEqual(self.request("/hang"), 503)
+        # The admission slot stays taken while the hung call runs on its thread...
+        self.assertTrue(self.server.executor._slots.locked())
+        # ...so this request waits for it instead of queueing behind it, and times out too.
+        self.assertEqual(self.request("/quick"), 503)
+        self.assertEqual(self.peak, 1)
+
+        self.gate.set()
+        self.assertEqual(self.request("/quick"), 200)
+        self.assertEqual(self.peak, 1)
+
+
+class MalformedRequestTest(unittest.TestCase):
+
+    def test_non_numeric_content_length(self):
+        with LiveServer(conditional_app) as server:
+            connection = server.connect()
+            try:
+                connection.sock.sendall(b"POST /next HTTP/1.1\r\nHost: localhost\r\nContent-Length: ten\r\n\r\n")
+                status, headers, _ = connection.response()
+            finally:
+                connection.close()
+        self.assertEqual(status, 400)
+        self.assertEqual(headers["connection"], "close")
+
+
+def echo_app(environ, start_response):
+    body = environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+class ChunkedRequestTest(unittest.TestCase):
+
+    def exchange(self, raw):
+        with LiveServer(echo_app) as server:
+            connection = server.connect()
+            try:
+                connection.sock.sendall(raw)
+                status, headers, body = connection.response()
+                if headers.get("connection") != "close":
+                    # Whatever follows must be parsed as a new request, not as leftovers of the body.
+                    connection.send("GET", "/next")
+                    return (status, headers, body), connection.response()
+                return (status, headers, body), None
+            finally:
+                connection.close()
+
+
+    def test_chunked_body_is_decoded(self):
+        first, second = self.exchange(b"POST /echo HTTP/1.1\r\nHost: localhost\r\nTransfer-Encoding: chunked\r\n\r\n"
+                                      b"3;ext=1\r\nhel\r\n2\r\nlo\r\n0\r\nX-Trailer: 1\r\n\r\n")
+        self.assertEqual((first[0], first[2]), (200, b"hello"))
+        self.assertEqual((second[0], second[2]), (200, b""))
+
+
+    def test_smuggled_request_is_not_served(self):
+        smuggled = b"GET /smuggled HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        first, second = self.exchange(b"POST /echo HTTP/1.1\r\nHost: localhost\r\nTransfer-Encoding: chunked\r\n"
+                                      b"Content-Length: 4\r\n\r\n0\r\n\r\n" + smuggled)
+        self.assertEqual(first[0], 400)
+        self.assertEqual(first[1]["connection"], "close")
+        self.assertIsNone(second)
+
+
+    def test_unsupported_coding_and_bad_chunk(self):
+        first, _ = self.exchange(b"POST /echo HTTP/1.1\r\nHost: localhost\r\nTransfer-Encoding: gzip, chunked\r\n\r\n")
+        self.assertEqual((first[0], first[1]["connection"]), (501, "close"))
+
+        first, _ = self.exchange(b"POST /echo HTTP/1.1\r\nHost: localhost\r\nTransfer-Encoding: chunked\r\n\r\n"
+                                 b"zz\r\nhello\r\n0\r\n\r\n")
+        self.assertEqual((first[0], first[1]["connection"]), (400, "close"))
+
+
+if __name__ == "__main__":
+    unittest.main()
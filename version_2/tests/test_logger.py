@@ -0,0 +1,69 @@
+import support  # noqa: F401  (puts src/ on the path)
+
+from modules.Logger import Logger
+from modules.Queue import Queue
+import threading
+import time
+import unittest
+
+
+class GatedFiles:
+    """
+    @brief FileManager stand-in whose writes wait for a gate, so the log queue fills up.
+    """
+
+    def __init__(self) -> None:
+        self.gate = threading.Event()
+        self.written = []
+
+
+    def create_dir(self, path):
+        pass
+
+
+    def create_file(self, path):
+        pass
+
+
+    def write_file(self, path, content):
+        self.gate.wait(5)
+        self.written.append(content)
+
+
+class OverflowTest(unittest.TestCase):
+
+    def flush_after_overflow(self, policy):
+        files = GatedFiles()
+        logger = Logger(files, queue_size = 2, overflow = policy)
+        for i in range(10):
+            logger.write_log("Logs/systemActivity.log", "INFO", f"entry {i}")
+        files.gate.set()
+
+        started = time.monotonic()
+        self.assertTrue(logger.flush(timeout = 2))
+        self.assertLess(time.monotonic() - started, 1)
+        return "".join(files.written)
+
+
+    def test_drop_oldest_does_not_stall_flush(self):
+        self.assertIn("entry 9", self.flush_after_overflow(Queue.DROP_OLDEST))
+
+
+    def test_drop_newest_does_not_stall_flush(self):
+        self.assertIn("entry 0", self.flush_after_overflow(Queue.DROP_NEWEST))
+
+
+class QueuePutTest(unittest.TestCase):
+
+    def test_put_reports_losses(self):
+        oldest = Queue(1, Queue.DROP_OLDEST)
+        self.assertEqual((oldest.put("a"), oldest.put("b")), (0, 1))
+        self.assertEqual(oldest.get(), "b")
+
+        newest = Queue(1, Queue.DROP_NEWEST)
+        self.assertEqual((newest.put("a"), newest.put("b")), (0, 1))
+        self.assertEqual(newest.get(), "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import support  # noqa: F401  (puts src/ on the path)
+
+from modules.Recognizers import downmix
+import array
+import unittest
+
+
+class DownmixTest(unittest.TestCase):
+
+    def test_stereo_is_averaged(self):
+        stereo = array.array("h", [100, 300, -200, -400, 32767, 32767, 7]).tobytes()
+        # The trailing half frame is dropped.
+        self.assertEqual(array.array("h", downmix(stereo, 2, 2)).tolist(), [200, -300, 32767])
+
+
+    def test_mono_is_unchanged(self):
+        mono = array.array("h", [1, 2, 3]).tobytes()
+        self.assertIs(downmix(mono, 2, 1), mono)
+
+
+    def test_unsigned_8_bit(self):
+        self.assertEqual(downmix(bytes([0, 255, 128, 130]), 1, 2), bytes([128, 129]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+from support import RecordingLogger
+
+from datetime import datetime
+from modules.Scheduler import CronSchedule, Scheduler
+from modules.ThreadManager import ThreadManager
+import threading
+import time
+import unittest
+
+
+def at(*fields):
+    return datetime(*fields).timestamp()
+
+
+class CronScheduleTest(unittest.TestCase):
+
+    def test_steps_ranges_and_lists(self):
+        cron = CronSchedule("*/15 9-17 * * 1-5")
+        # Friday 17:50 -> Monday 09:00.
+        self.assertEqual(cron.next_after(at(2024, 3, 1, 17, 50)), at(2024, 3, 4, 9, 0))
+        self.assertEqual(cron.next_after(at(2024, 3, 4, 9, 0)), at(2024, 3, 4, 9, 15))
+        self.assertEqual(CronSchedule("0 3,15 * * *").next_after(at(2024, 3, 1, 3, 0, 30)), at(2024, 3, 1, 15, 0))
+
+
+    def test_month_rollover_and_leap_day(self):
+        self.assertEqual(CronSchedule("0 0 1 * *").next_after(at(2024, 12, 15)), at(2025, 1, 1))
+        self.assertEqual(CronSchedule("30 6 29 2 *").next_after(at(2024, 3, 1)), at(2028, 2, 29, 6, 30))
+
+
+    def test_restricted_day_fields_match_either(self):
+        # The 13th or any Friday, as in cron.
+        cron = CronSchedule("0 12 13 * 5")
+        self.assertEqual(cron.next_after(at(2024, 3, 9)), at(2024, 3, 13, 12, 0))
+        self.assertEqual(cron.next_after(at(2024, 3, 13, 12, 0)), at(2024, 3, 15, 12, 0))
+        # 7 is Sunday too.
+        self.assertEqual(CronSchedule("0 0 * * 7").next_after(at(2024, 3, 1)), at(2024, 3, 3))
+
+
+    def test_invalid_expressions(self):
+        for expression in ("* * * *", "60 * * * *", "* 5-2 * * *", "*/0 * * * *", "a * * * *", "* * 31 2 *"):
+            with self.assertRaises(ValueError, msg = expression):
+                CronSchedule(expression).next_after(at(2024, 1, 1))
+
+
+class MissedRunTest(unittest.TestCase):
+    INTERVAL = 10.0
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.pool = ThreadManager(2)
+        self.scheduler = Scheduler(RecordingLogger(), pool = self.pool)
+
+
+    def tearDown(self):
+        self.scheduler.stop()
+        self.pool.shutdown(timeout = 5)
+
+
+    def work(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+
+
+    def run_missed(self, missed, settle):
+        """
+        @brief Schedules a job whose first run was due 5.5 intervals ago (six occurrences missed) and starts.
+        @return The job's entry from Scheduler.jobs() once `settle` says it is done.
+        """
+        job = self.scheduler.add_interval("job", self.INTERVAL, self.work, missed = missed)
+        with self.scheduler._condition:
+            self.scheduler._heap.clear()
+            self.scheduler._schedule(job, time.time() - 5.5 * self.INTERVAL)
+        self.scheduler.start()
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            entry = self.scheduler.jobs()[0]
+            if settle(entry):
+                return entry
+            time.sleep(0.01)
+        self.fail(f"Job did not settle: {entry}")
+
+
+    def test_skip(self):
+        entry = self.run_missed(Scheduler.MISSED_SKIP, lambda e: e["skipped"])
+        time.sleep(0.1)
+        entry = self.scheduler.jobs()[0]
+        self.assertEqual((entry["runs"], entry["skipped"]), (0, 1))
+        self.assertGreater(entry["next_run"], time.time())
+
+
+    def test_run_once(self):
+        entry = self.run_missed(Scheduler.MISSED_RUN_ONCE, lambda e: e["runs"])
+        time.sleep(0.1)
+        entry = self.scheduler.jobs()[0]
+        self.assertEqual((entry["runs"], entry["skipped"]), (1, 0))
+        self.assertGreater(entry["next_run"], time.time())
+
+
+    def test_catch_up_runs_every_occurrence_in_turn(self):
+        entry = self.run_missed(Scheduler.MISSED_CATCH_UP, lambda e: e["runs"] == 6 and not e["running"])
+        self.assertEqual((entry["skipped"], entry["owed"]), (0, 0))
+        # One at a time, although the pool has room for two.
+        self.assertEqual(self.peak, 1)
+        self.assertGreater(entry["next_run"], time.time())
+
+
+    def test_catch_up_without_pool(self):
+        self.scheduler = Scheduler(RecordingLogger())
+        entry = self.run_missed(Scheduler.MISSED_CATCH_UP, lambda e: e["runs"] == 6)
+        self.assertEqual((entry["skipped"], entry["owed"]), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import support  # noqa: F401  (puts src/ on the path)
+
+from modules.ThreadManager import ThreadManager
+import threading
+import unittest
+
+
+class AdmissionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ThreadManager(1, max_pending = 1)
+        self.gate = threading.Event()
+        started = threading.Event()
+        self.pool.submit(lambda: (started.set(), self.gate.wait()))
+        started.wait(5)
+
+
+    def tearDown(self):
+        self.gate.set()
+        self.pool.shutdown(timeout = 5)
+
+
+    def blocked_submit(self):
+        """
+        @brief Starts a submit() that waits for room in the full queue; returns its thread and outcome list.
+        """
+        outcome = []
+
+        def submit():
+            try:
+                outcome.append(self.pool.submit(lambda: "admitted"))
+            except RuntimeError as e:
+                outcome.append(e)
+
+        thread = threading.Thread(target = submit)
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+        return thread, outcome
+
+
+    def test_cancelled_job_frees_its_slot(self):
+        queued = self.pool.submit(lambda: "never")
+        thread, outcome = self.blocked_submit()
+
+        self.assertTrue(queued.cancel())
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.pool.pending(), 1)
+
+        self.gate.set()
+        self.assertEqual(outcome[0].result(5), "admitted")
+
+
+    def test_shutdown_wakes_blocked_submitters(self):
+        self.pool.submit(lambda: "never")
+        thread, outcome = self.blocked_submit()
+
+        self.pool.shutdown(wait = False, cancel_pending = True)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertIsInstance(outcome[0], RuntimeError)
+
+
+if __name__ == "__main__":
+    unittest.main()
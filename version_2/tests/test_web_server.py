@@ -0,0 +1,129 @@
+from support import LiveServer, RecordingLogger
+
+from modules.DataBase import DataBase
+from modules.FileManager import FileManager
+from modules.WebServer import WebServer
+from unittest import mock
+import json
+import os
+import tempfile
+import unittest
+
+
+def temporary_database(directory):
+    """
+    @brief DataBase.__init__ replacement storing the catalog under `directory` instead of the device path.
+    """
+    def init(self, logger, filemanager):
+        self._log = logger
+        self._file = filemanager
+        self._path = os.path.join(directory, "Data")
+        self._db_path = os.path.join(self._path, "database.db")
+        self._table = "components"
+        self._DataBase__initialize()
+    return init
+
+
+class ConditionalCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        with mock.patch.object(DataBase, "__init__", temporary_database(self.directory.name)):
+            self.web = WebServer("127.0.0.1", 0, RecordingLogger(), FileManager(self.directory.name))
+        self.server = LiveServer(self.web.app).__enter__()
+        self.connection = self.server.connect()
+
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.__exit__(None, None, None)
+        self.directory.cleanup()
+
+
+    def add_components(self, count):
+        body = json.dumps({"add": [{"name": f"resistor {i}", "position": i, "description": "metal film 1%"}
+                                   for i in range(count)]}).encode("utf-8")
+        self.connection.send("POST", "/api/components/batch", {"Content-Type": "application/json"}, body)
+        status, _, _ = self.connection.response()
+        self.assertEqual(status, 200)
+
+
+    def test_poll_with_if_none_match(self):
+        self.add_components(2)
+        self.connection.send("GET", "/api/components")
+        status, headers, body = self.connection.response()
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)["items"]), 2)
+        etag = headers["etag"]
+
+        self.connection.send("GET", "/api/components", {"If-None-Match": etag})
+        status, headers, body = self.connection.response()
+        self.assertEqual((status, body), (304, b""))
+        self.assertEqual(headers["etag"], etag)
+        self.assertNotIn("transfer-encoding", headers)
+
+        # The connection is still in step after the 304.
+        self.connection.send("GET", "/api/components?limit=1")
+        status, _, body = self.connection.response()
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)["items"]), 1)
+        self.assertEqual(self.connection.buffer, b"")
+
+
+    def test_gzip_variant_gets_its_own_etag_back(self):
+        self.add_components(20)
+        self.connection.send("GET", "/api/components", {"Accept-Encoding": "gzip"})
+        status, headers, _ = self.connection.response()
+        self.assertEqual((status, headers.get("content-encoding")), (200, "gzip"))
+        etag = headers["etag"]
+        self.assertTrue(etag.endswith('-gzip"'))
+
+        self.connection.send("GET", "/api/components", {"Accept-Encoding": "gzip", "If-None-Match": etag})
+        status, headers, body = self.connection.response()
+        self.assertEqual((status, body), (304, b""))
+        self.assertEqual(headers["etag"], etag)
+
+        # A write changes the generation, so the old validator no longer matches.
+        self.add_components(1)
+        self.connection.send("GET", "/api/components", {"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual(self.connection.response()[0], 200)
+
+
+    def test_head_is_not_compressed(self):
+        self.add_components(20)
+        self.connection.send("GET", "/api/components")
+        _, plain, _ = self.connection.response()
+
+        self.connection.send("HEAD", "/api/components", {"Accept-Encoding": "gzip"})
+        status, headers, _ = self.connection.response("HEAD")
+        self.assertEqual(status, 200)
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual((headers["content-length"], headers["etag"]), (plain["content-length"], plain["etag"]))
+
+        self.connection.send("GET", "/api/components?limit=1")
+        self.assertEqual(self.connection.response()[0], 200)
+        self.assertEqual(self.connection.buffer, b"")
+
+
+class ProfileTimeoutTest(unittest.TestCase):
+
+    def test_profile_fits_in_the_request_timeout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.object(DataBase, "__init__", temporary_database(directory)):
+                web = WebServer("127.0.0.1", 0, RecordingLogger(), FileManager(directory), request_timeout=5.5)
+            with LiveServer(web.app, request_timeout=5.5) as server:
+                connection = server.connect()
+                try:
+                    connection.send("GET", "/admin/profile?seconds=60&format=json")
+                    status, _, body = connection.response()
+                    self.assertEqual(status, 200)
+                    self.assertLess(json.loads(body)["duration_s"], 1.0)
+                    # The sampler is done, so the next run is not refused.
+                    connection.send("GET", "/admin/profile?seconds=0.1&format=json")
+                    self.assertEqual(connection.response()[0], 200)
+                finally:
+                    connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()